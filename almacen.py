@@ -0,0 +1,412 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import compacto
+import datos
+import medicion
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Tablas lógicas → archivo JSON histórico (relativo al directorio de datos)
+ARCHIVOS_JSON = {
+    "tecnicos": "rotaciones.json",
+    "ehs": "rotacion_ehs.json",
+    # Ajustes manuales sobre la rotación calculada (rotacion.MODO = "derivado")
+    "ajustes_tecnicos": "ajustes_rotacion.json",
+    "ajustes_ehs": "ajustes_rotacion_ehs.json",
+}
+ARCHIVO_DB = "rotaciones.db"
+ARCHIVO_COMPACTO = "rotaciones.hrs"
+
+# "sqlite" (por defecto), "compacto" (binario, ver compacto.py) o "json"
+# (formato original, un archivo por tabla)
+BACKEND = os.environ.get("HORAS_ALMACEN", "sqlite")
+
+# Segundos que SQLite espera a que otro proceso suelte la base
+ESPERA_SQLITE = 30
+
+
+@contextmanager
+def bloqueo_archivo(ruta):
+    # Bloqueo exclusivo entre procesos sobre un archivo auxiliar <ruta>.lock
+    with open(ruta + ".lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def escribir_atomico(ruta, contenido):
+    # Archivo temporal en el mismo directorio + rename: nunca queda un archivo truncado
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporal, "wb" if isinstance(contenido, bytes) else "w") as f:
+            f.write(contenido)
+            medicion.contar("bytes.escritos", len(contenido))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+class _Pendiente:
+    __slots__ = ("hecho", "error")
+
+    def __init__(self):
+        self.hecho = False
+        self.error = None
+
+
+class EscrituraAgrupada:
+    """Junta las escrituras concurrentes de este proceso en un solo volcado.
+
+    Cada hilo deja su semana en la cola; el primero que obtiene el turno de
+    escritura vuelca todo lo pendiente de una vez y los demás solo esperan.
+    """
+
+    def __init__(self, volcar):
+        self._volcar = volcar  # volcar({(tabla, clave): valor})
+        self._cola = {}
+        self._avisos = []
+        self._lock_cola = threading.Lock()
+        self._lock_escritura = threading.Lock()
+
+    def guardar(self, tabla, clave, valor):
+        pendiente = _Pendiente()
+        with self._lock_cola:
+            self._cola[(tabla, clave)] = valor
+            self._avisos.append(pendiente)
+
+        with self._lock_escritura:
+            if not pendiente.hecho:
+                with self._lock_cola:
+                    lote, self._cola = self._cola, {}
+                    avisos, self._avisos = self._avisos, []
+                error = None
+                try:
+                    self._volcar(lote)
+                except BaseException as e:
+                    error = e
+                for aviso in avisos:
+                    aviso.error = error
+                    aviso.hecho = True
+
+        if pendiente.error is not None:
+            raise pendiente.error
+
+
+class AlmacenJSON:
+    """Formato original: un archivo JSON por tabla que se reescribe completo.
+
+    Las escrituras se agrupan, se bloquean entre procesos y reemplazan el
+    archivo de forma atómica.
+    """
+
+    def __init__(self, archivos=None):
+        self.archivos = archivos or {t: datos.ruta(a) for t, a in ARCHIVOS_JSON.items()}
+        self._escritura = EscrituraAgrupada(self._volcar)
+
+    def _leer(self, tabla):
+        try:
+            with open(self.archivos[tabla]) as f:
+                contenido = f.read()
+        except FileNotFoundError:
+            return {}
+        medicion.contar("bytes.leidos", len(contenido))
+        return json.loads(contenido)
+
+    def cargar(self, tabla, clave):
+        return self._leer(tabla).get(clave)
+
+    def guardar(self, tabla, clave, valor):
+        self._escritura.guardar(tabla, clave, valor)
+
+    def _volcar(self, lote):
+        por_tabla = {}
+        for (tabla, clave), valor in lote.items():
+            por_tabla.setdefault(tabla, {})[clave] = valor
+        for tabla, cambios in por_tabla.items():
+            ruta = self.archivos[tabla]
+            # Se relee bajo el bloqueo para no perder semanas de otros procesos
+            with bloqueo_archivo(ruta):
+                data = self._leer(tabla)
+                data.update(cambios)
+                escribir_atomico(ruta, json.dumps(data, indent=2))
+
+    def claves(self, tabla):
+        return sorted(self._leer(tabla))
+
+    def version(self):
+        mtimes = []
+        for ruta in self.archivos.values():
+            try:
+                mtimes.append(os.stat(ruta).st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(0)
+        return tuple(mtimes)
+
+
+class AlmacenSQLite:
+    """Una fila por (tabla, semana): lectura y escritura de una semana sin tocar el resto."""
+
+    def __init__(self, ruta=None, importar=None):
+        self.ruta = ruta or datos.ruta(ARCHIVO_DB)
+        # Una conexión compartida por todos los hilos (Streamlit usa un hilo por rerun)
+        # WAL: los lectores no bloquean al escritor; timeout para esperar a otros procesos
+        self._conn = sqlite3.connect(self.ruta, timeout=ESPERA_SQLITE, check_same_thread=False)
+        self._activar_wal()
+        self._lock = threading.RLock()
+        self._escritura = EscrituraAgrupada(self._volcar)
+        self._version = None
+        self._version_revisada = 0.0
+        self._crear_esquema()
+        if importar is None:
+            importar = {t: datos.ruta(a) for t, a in ARCHIVOS_JSON.items()}
+        for tabla, ruta_json in importar.items():
+            self.importar_json(tabla, ruta_json)
+
+    def _activar_wal(self):
+        # Pasar a WAL no espera con el timeout de la conexión: si otro proceso
+        # está creando la misma base se recibe "database is locked" y se reintenta
+        limite = time.monotonic() + ESPERA_SQLITE
+        while True:
+            try:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or time.monotonic() > limite:
+                    raise
+                time.sleep(0.01)
+
+    def _crear_esquema(self):
+        conn = self._conn
+        with self._lock, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS semanas ("
+                " tabla TEXT NOT NULL,"
+                " clave TEXT NOT NULL,"
+                " datos TEXT NOT NULL,"
+                " PRIMARY KEY (tabla, clave)"
+                ") WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS importados (archivo TEXT PRIMARY KEY)"
+            )
+            # Contador de escrituras: cambia cada vez que se guarda una semana
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor INTEGER NOT NULL)"
+            )
+
+    def importar_json(self, tabla, ruta_json):
+        # Se importa una sola vez; lo que ya está en la base tiene prioridad.
+        # BEGIN IMMEDIATE: si varios procesos abren la base a la vez, solo uno
+        # importa y los demás ven la marca en importados
+        conn = self._conn
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ya = conn.execute("SELECT 1 FROM importados WHERE archivo = ?", (ruta_json,)).fetchone()
+                data = {}
+                if not ya:
+                    try:
+                        with open(ruta_json) as f:
+                            data = json.load(f)
+                    except FileNotFoundError:
+                        pass
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO semanas (tabla, clave, datos) VALUES (?, ?, ?)",
+                        [(tabla, clave, json.dumps(valor)) for clave, valor in data.items()],
+                    )
+                    conn.execute("INSERT OR IGNORE INTO importados (archivo) VALUES (?)", (ruta_json,))
+                    self._incrementar_revision(conn)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return len(data)
+
+    def cargar(self, tabla, clave):
+        with self._lock:
+            fila = self._conn.execute(
+                "SELECT datos FROM semanas WHERE tabla = ? AND clave = ?", (tabla, clave)
+            ).fetchone()
+        if not fila:
+            return None
+        medicion.contar("bytes.leidos", len(fila[0]))
+        return json.loads(fila[0])
+
+    def guardar(self, tabla, clave, valor):
+        self._escritura.guardar(tabla, clave, valor)
+
+    def _volcar(self, lote):
+        # Todo el lote en una sola transacción
+        conn = self._conn
+        filas = [(tabla, clave, json.dumps(valor)) for (tabla, clave), valor in lote.items()]
+        medicion.contar("bytes.escritos", sum(len(f[2]) for f in filas))
+        with self._lock, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO semanas (tabla, clave, datos) VALUES (?, ?, ?)",
+                filas,
+            )
+            self._incrementar_revision(conn)
+
+    def _incrementar_revision(self, conn):
+        self._version = None
+        conn.execute(
+            "INSERT INTO meta (clave, valor) VALUES ('revision', 1)"
+            " ON CONFLICT(clave) DO UPDATE SET valor = valor + 1"
+        )
+
+    def version(self):
+        # Se consulta la base como mucho cada INTERVALO_REVISION; las escrituras
+        # de este proceso invalidan el valor recordado
+        ahora = time.monotonic()
+        if self._version is not None and ahora - self._version_revisada < datos.INTERVALO_REVISION:
+            return self._version
+        with self._lock:
+            fila = self._conn.execute("SELECT valor FROM meta WHERE clave = 'revision'").fetchone()
+        self._version = fila[0] if fila else 0
+        self._version_revisada = ahora
+        return self._version
+
+    def claves(self, tabla):
+        with self._lock:
+            filas = self._conn.execute(
+                "SELECT clave FROM semanas WHERE tabla = ? ORDER BY clave", (tabla,)
+            ).fetchall()
+        return [f[0] for f in filas]
+
+
+class AlmacenCompacto:
+    """Historial en formato binario compacto (ver compacto.py), leído con mmap.
+
+    Las escrituras reescriben el archivo completo, que ocupa unos 30 bytes por
+    semana, con el mismo bloqueo y reemplazo atómico que el almacén JSON.
+    """
+
+    def __init__(self, ruta=None, importar=None):
+        self.ruta = ruta or datos.ruta(ARCHIVO_COMPACTO)
+        self._lector = None
+        self._revisado = 0.0
+        self._lock = threading.Lock()
+        self._escritura = EscrituraAgrupada(self._volcar)
+        if not os.path.exists(self.ruta):
+            if importar is None:
+                importar = {t: datos.ruta(a) for t, a in ARCHIVOS_JSON.items()}
+            self.importar_json(importar)
+
+    def importar_json(self, archivos):
+        lote = {}
+        for tabla, ruta_json in archivos.items():
+            try:
+                with open(ruta_json) as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                continue
+            for clave, valor in data.items():
+                lote[(tabla, clave)] = valor
+        self._volcar(lote)
+
+    def _abrir(self):
+        # Se reabre si otro proceso (o este) reemplazó el archivo
+        ahora = time.monotonic()
+        with self._lock:
+            lector = self._lector
+            if lector is not None and ahora - self._revisado < datos.INTERVALO_REVISION:
+                return lector
+            try:
+                info = os.stat(self.ruta)
+            except FileNotFoundError:
+                return None
+            if lector is None or lector.identidad != (info.st_ino, info.st_mtime_ns, info.st_size):
+                self._reemplazar(compacto.ArchivoCompacto(self.ruta))
+                lector = self._lector
+            self._revisado = ahora
+            return lector
+
+    def _reemplazar(self, lector):
+        # Con self._lock tomado: cierra el mmap anterior al cambiar de lector
+        anterior, self._lector = self._lector, lector
+        if anterior is not None:
+            try:
+                anterior.cerrar()
+            except BufferError:
+                pass  # otro hilo lo está leyendo justo ahora; se libera al recolectarlo
+
+    def _leer(self, leer, defecto):
+        # Si otro hilo cerró el lector mientras se usaba, se repite con el nuevo
+        for intento in range(3):
+            lector = self._abrir()
+            if lector is None:
+                return defecto
+            try:
+                return leer(lector)
+            except ValueError:
+                if not lector.cerrado or intento == 2:
+                    raise
+
+    def cargar(self, tabla, clave):
+        return self._leer(lambda lector: lector.cargar(tabla, clave), None)
+
+    def guardar(self, tabla, clave, valor):
+        self._escritura.guardar(tabla, clave, valor)
+
+    def _volcar(self, lote):
+        with bloqueo_archivo(self.ruta):
+            try:
+                actual = compacto.ArchivoCompacto(self.ruta)
+            except FileNotFoundError:
+                tablas = {}
+            else:
+                tablas = actual.todo()
+                actual.cerrar()
+            for (tabla, clave), valor in lote.items():
+                tablas.setdefault(tabla, {})[clave] = valor
+            escribir_atomico(self.ruta, compacto.codificar(tablas))
+        with self._lock:
+            self._reemplazar(None)
+
+    def claves(self, tabla):
+        return self._leer(lambda lector: lector.claves(tabla), [])
+
+    def version(self):
+        lector = self._abrir()
+        return lector.identidad if lector else 0
+
+
+BACKENDS = {
+    "json": AlmacenJSON,
+    "sqlite": AlmacenSQLite,
+    "compacto": AlmacenCompacto,
+}
+
+# Un almacén por sede (directorio de datos), las MAX_SEDES_EN_MEMORIA más usadas
+_almacenes = datos.PorSede(lambda: BACKENDS[BACKEND]())
+
+
+def obtener_almacen():
+    return _almacenes.get()
+
+
+def configurar_almacen(almacen):
+    _almacenes.poner(almacen)
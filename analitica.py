@@ -0,0 +1,161 @@
+"""Carga de trabajo por persona: horas, noches, domingos y días festivos trabajados.
+
+Se guardan sumas prefijas por persona indexadas por semana (desde el lunes de
+INICIO_ROTACION), así el total de cualquier rango de semanas es una resta:
+O(1) por persona y métrica. Cuando rotacion guarda una semana solo se
+recalcula esa semana y se corrigen los prefijos siguientes.
+
+Las semanas son las que muestra la app: ajustes (modo derivado) o semanas
+guardadas (modo persistido), y si no hay, la rotación calculada. El turno de
+lunes festivo cuenta en la semana que termina en ese lunes.
+"""
+import threading
+from array import array
+from datetime import timedelta
+
+import calendario
+import datos
+import rotacion
+from almacen import obtener_almacen
+from exportadores import dias_turno, turnos_semana
+
+METRICAS = ("horas", "noches", "domingos", "festivos")
+
+_lock = threading.RLock()
+_acumulados = datos.PorSede()  # Acumulados de cada sede
+
+
+def semana_vigente(fecha_lunes):
+    # Como semana_exportacion, pero en modo persistido con lo guardado
+    semana_info = rotacion.semana_exportacion(fecha_lunes)
+    if rotacion.MODO != "derivado":
+        # Las semanas se guardan bajo el lunes, también las que empiezan en martes
+        turnos = rotacion.cargar_rotacion(fecha_lunes)
+        supervisores = rotacion.cargar_rotacion_ehs(fecha_lunes)
+        if turnos:
+            semana_info["turnos"] = turnos
+        if supervisores:
+            semana_info["supervisores_ehs"] = supervisores
+    return semana_info
+
+
+def carga_semana(semana_info):
+    """{nombre: (rol, [horas, noches, domingos, festivos])} de una semana."""
+    carga = {}
+    for tipo, _, _, horario, nombres in turnos_semana(semana_info):
+        for dia in dias_turno(horario, semana_info):
+            valores = (horario.duracion / 60, 1 if horario.nocturno else 0,
+                       1 if dia.weekday() == 6 else 0, 1 if calendario.es_festivo(dia) else 0)
+            for nombre in nombres:
+                _, suma = carga.setdefault(nombre, (tipo, [0.0] * len(METRICAS)))
+                for m, valor in enumerate(valores):
+                    suma[m] += valor
+    return carga
+
+
+class Acumulados:
+    """Sumas prefijas por persona: prefijos[persona][m][k] es el total de la
+    métrica m en las semanas 0..k-1."""
+
+    def __init__(self, lunes0, version):
+        self.lunes0 = lunes0
+        self.version = version
+        self.semanas = []       # por semana: carga_semana(...)
+        self.indice = {}        # nombre → posición en personas
+        self.personas = []      # (nombre, rol)
+        self.prefijos = []
+
+    def __len__(self):
+        return len(self.semanas)
+
+    def _semana(self, fecha):
+        return (rotacion.normalizar_a_lunes(fecha) - self.lunes0).days // 7
+
+    def _persona(self, nombre, rol):
+        i = self.indice.get(nombre)
+        if i is None:
+            i = self.indice[nombre] = len(self.personas)
+            self.personas.append((nombre, rol))
+            self.prefijos.append([array("d", bytes(8 * (len(self.semanas) + 1))) for _ in METRICAS])
+        return i
+
+    def extender(self, hasta):
+        # Agrega semanas hasta la que contiene `hasta`
+        n = self._semana(hasta) + 1
+        for k in range(len(self.semanas), n):
+            carga = carga_semana(semana_vigente(self.lunes0 + timedelta(weeks=k)))
+            for nombre, (rol, _) in carga.items():
+                self._persona(nombre, rol)
+            for i, (nombre, _) in enumerate(self.personas):
+                valores = carga[nombre][1] if nombre in carga else (0.0,) * len(METRICAS)
+                for prefijo, valor in zip(self.prefijos[i], valores):
+                    prefijo.append(prefijo[-1] + valor)
+            self.semanas.append(carga)
+
+    def actualizar(self, fecha):
+        # Recalcula la semana de `fecha` y corrige los prefijos que siguen
+        k = self._semana(fecha)
+        if not 0 <= k < len(self.semanas):
+            return
+        anterior = self.semanas[k]
+        nueva = carga_semana(semana_vigente(self.lunes0 + timedelta(weeks=k)))
+        for nombre in anterior.keys() | nueva.keys():
+            antes = anterior[nombre][1] if nombre in anterior else (0.0,) * len(METRICAS)
+            # Quien ya no tiene turnos en la semana pasa a cero
+            despues = nueva[nombre][1] if nombre in nueva else (0.0,) * len(METRICAS)
+            rol = (nueva.get(nombre) or anterior[nombre])[0]
+            i = self._persona(nombre, rol)
+            for prefijo, a, b in zip(self.prefijos[i], antes, despues):
+                if a != b:
+                    for j in range(k + 1, len(prefijo)):
+                        prefijo[j] += b - a
+        self.semanas[k] = nueva
+
+    def totales(self, desde, hasta, rol=None):
+        """[{persona, rol, horas, noches, domingos, festivos}] de las semanas que
+        contienen desde..hasta, sin las personas sin turnos en el rango."""
+        self.extender(hasta)
+        i = max(self._semana(desde), 0)
+        j = max(self._semana(hasta) + 1, i)
+        filas = []
+        for (nombre, rol_persona), prefijos in zip(self.personas, self.prefijos):
+            if rol and rol_persona != rol:
+                continue
+            valores = [p[j] - p[i] for p in prefijos]
+            if any(valores):
+                filas.append({"persona": nombre, "rol": rol_persona, **dict(zip(METRICAS, valores))})
+        filas.sort(key=lambda f: (f["rol"], f["persona"]))
+        return filas
+
+
+def _version():
+    return datos.directorio(), datos.version(), obtener_almacen().version()
+
+
+def obtener():
+    # Acumulados al día; se reconstruyen si cambió el roster o si otro proceso escribió
+    with _lock:
+        acumulados = _acumulados.get()
+        version = _version()
+        if acumulados is None or acumulados.version != version:
+            acumulados = Acumulados(rotacion.normalizar_a_lunes(rotacion.INICIO_ROTACION), version)
+            _acumulados.poner(acumulados)
+        return acumulados
+
+
+def totales(desde, hasta, rol=None):
+    acumulados = obtener()
+    with _lock:
+        return acumulados.totales(desde, hasta, rol)
+
+
+def _semana_guardada(fecha):
+    # Aviso de rotacion: solo se recalcula la semana escrita
+    with _lock:
+        acumulados = _acumulados.get()
+        if acumulados is not None:
+            acumulados.actualizar(fecha)
+            acumulados.version = _version()
+
+
+rotacion.AL_GUARDAR.append(_semana_guardada)
@@ -1,123 +1,157 @@
+import json
+import os
 import streamlit as st
-from datetime import date, timedelta
+from datetime import date
+import datos
+import medicion
+import trabajos
+from almacen import obtener_almacen
+from conflictos import validar
+from modelo import CATALOGO, ehs_desde_dicts, turnos_desde_dicts
 from rotacion import (
-    generar_turnos,
-    guardar_rotacion,
-    cargar_rotacion,
-    generar_ehs,
-    guardar_rotacion_ehs,
-    cargar_rotacion_ehs,
-    normalizar_a_lunes,
-    es_lunes_festivo,
-    lunes_festivo_en_semana,
+    resolver_semana,
+    obtener_semana,
     semanas_desde_inicio
 )
-from pdf_generator import generar_pdf, generar_pdf_multiple
-from rotacion import corregir_horario
+from pdf_generator import nombre_pdf_semana
+from cache_pdf import pdf_semana
+
+# Horizonte por defecto de la programación completa (8 semanas ≈ 2 meses + la actual)
+SEMANAS_PROGRAMACION = int(os.environ.get("HORAS_SEMANAS_PROGRAMACION", 9))
+MAX_SEMANAS_PROGRAMACION = 520
+
+
+@st.cache_data(show_spinner=False)
+def semana_seleccionada(fecha):
+    medicion.contar("app.semana_seleccionada.fallos")
+    return resolver_semana(fecha)
+
+
+@st.cache_data(show_spinner=False)
+def rotacion_semana(clave_rotacion, sede, version_roster, version_almacen):
+    # La sede y las versiones solo forman parte de la clave: si cambian los datos se recarga
+    medicion.contar("app.rotacion_semana.fallos")
+    turnos, supervisores = obtener_semana(clave_rotacion)
+    inicia_en_martes = clave_rotacion.weekday() == 1
+
+    filas_turnos = []
+    for turno in turnos_desde_dicts(turnos):
+        horario = turno.horario.desde_martes() if inicia_en_martes else turno.horario
+        filas_turnos.append({
+            "cuadrilla": turno.nombre(),
+            "vehiculo": turno.vehiculo(),
+            "horario": horario.texto(),
+            "tecnicos": CATALOGO.nombres(turno.personas)
+        })
+
+    supervisores_festivo = []
+    supervisores_normales = []
+    for turno in ehs_desde_dicts(supervisores):
+        horario = turno.horario.desde_martes() if inicia_en_martes else turno.horario
+        fila = {"horario": horario.texto(), "supervisor": CATALOGO.nombres(turno.personas)}
+        if horario.festivo:
+            supervisores_festivo.append(fila)
+        else:
+            supervisores_normales.append(fila)
+
+    conflictos = [c.texto() for c in validar([{
+        "semana": semanas_desde_inicio(clave_rotacion),
+        "fecha_inicio": clave_rotacion,
+        "fecha_fin": clave_rotacion,
+        "turnos": turnos,
+        "supervisores_ehs": supervisores
+    }])]
+
+    return turnos, supervisores, filas_turnos, supervisores_normales, supervisores_festivo, conflictos
+
+
+def con_sede(nombre, funcion, *args):
+    # Lo que Streamlit ejecuta fuera del rerun (datos diferidos de un botón de
+    # descarga, fragmentos) no ve el datos.usar_sede del script: se fija aquí
+    with datos.sede(nombre):
+        return funcion(*args)
+
 
 # Configuración de la página
 st.set_page_config(page_title="Rotación de Técnicos", layout="wide")
 st.title("📅 Rotación de Técnicos por Semana")
 
+# 🏢 Sede (si hay otras en data/sedes/): todo lo que sigue usa sus datos
+opciones_sede = [None] + datos.sedes()
+if len(opciones_sede) > 1:
+    sede = st.session_state.get("sede")
+    sede = st.sidebar.selectbox(
+        "🏢 Sede",
+        opciones_sede,
+        index=opciones_sede.index(sede) if sede in opciones_sede else 0,
+        format_func=lambda s: s or "Principal"
+    )
+    st.session_state["sede"] = sede
+    datos.usar_sede(sede)
+
+# ⏱️ Medición opcional de este rerun (panel al final de la barra lateral)
+# Solo en esta sesión: las demás siguen sin medir
+mostrar_tiempos = st.sidebar.toggle("⏱️ Mostrar tiempos", value=False, key="mostrar_tiempos")
+medicion.usar(mostrar_tiempos)
+if mostrar_tiempos:
+    medicion.iniciar("rerun")
+
 # Selección de fecha
 fecha = st.date_input("Selecciona una fecha", value=date.today())
 
-# 🔁 Normalizar a lunes
-fecha_lunes = normalizar_a_lunes(fecha)
-lunes_festivo = lunes_festivo_en_semana(fecha_lunes)
-
-# Caso 1: el día seleccionado es un lunes festivo → mostrar semana anterior
-if fecha.weekday() == 0 and es_lunes_festivo(fecha):
-    fecha_lunes = fecha_lunes - timedelta(days=7)
-    lunes_festivo = lunes_festivo_en_semana(fecha_lunes)
-
-# Caso 2: si el lunes anterior fue festivo y estamos en martes o más → nueva semana desde martes
-if fecha.weekday() >= 1 and es_lunes_festivo(fecha_lunes):
-    fecha_inicio = fecha_lunes + timedelta(days=1)  # martes
-    fecha_fin = fecha_inicio + timedelta(days=5)    # hasta domingo
-    clave_rotacion = fecha_inicio
-    festivo_texto = ""
-else:
-    # Semana normal o semana que termina en lunes festivo
-    fecha_inicio = fecha_lunes
-    fecha_fin = lunes_festivo if lunes_festivo else fecha_lunes + timedelta(days=6)
-    clave_rotacion = fecha_lunes
-    festivo_texto = f"" if lunes_festivo else ""
-
-
-
-
-# 🔧 Técnicos
-rotacion = cargar_rotacion(clave_rotacion)
-if rotacion:
-    turnos = rotacion
-else:
-    turnos = generar_turnos(clave_rotacion)
-    guardar_rotacion(clave_rotacion, turnos)
-
-# 🔧 Supervisores SST
-rotacion_ehs = cargar_rotacion_ehs(clave_rotacion)
-if rotacion_ehs:
-    supervisores = rotacion_ehs
-else:
-    supervisores = generar_ehs(clave_rotacion)
-    guardar_rotacion_ehs(clave_rotacion, supervisores)
+medicion.contar("app.semana_seleccionada.consultas")
+info_semana = semana_seleccionada(fecha)
+semana = info_semana["semana"]
+fecha_inicio = info_semana["fecha_inicio"]
+fecha_fin = info_semana["fecha_fin"]
+clave_rotacion = info_semana["clave_rotacion"]
+festivo_texto = info_semana["festivo_texto"]
+
+# 🔧 Técnicos y supervisores SST
+medicion.contar("app.rotacion_semana.consultas")
+turnos, supervisores, filas_turnos, supervisores_normales, supervisores_festivo, conflictos = rotacion_semana(
+    clave_rotacion, datos.sede_activa(), datos.version_semana(clave_rotacion), obtener_almacen().version()
+)
 
 # 🗓️ Encabezado de semana
-semana = semanas_desde_inicio(fecha_inicio)
 st.markdown(f"### SEMANA {semana}{festivo_texto} — {fecha_inicio.strftime('%d/%m/%Y')} al {fecha_fin.strftime('%d/%m/%Y')}")
 
+# ⚠️ Cruces de vehículos o personas y descansos cortos dentro de la semana
+if conflictos:
+    with st.expander(f"⚠️ {len(conflictos)} conflictos en la semana"):
+        for texto in conflictos:
+            st.markdown(f"- {texto}")
 
 
-inicia_en_martes = clave_rotacion.weekday() == 1
 
 # 👷 Técnicos
 st.markdown("### 👷 Rotación de Técnicos")
-for asignacion in turnos:
-    horario = corregir_horario(asignacion["horario"], inicia_en_martes)
+for asignacion in filas_turnos:
     st.markdown(f"""
     <div style="border:1px solid #ccc; padding:10px; margin-bottom:10px">
       <strong>{asignacion['cuadrilla']}</strong><br>
-      <em>{asignacion['vehiculo']}</em> — <span>{horario}</span><br>
+      <em>{asignacion['vehiculo']}</em> — <span>{asignacion['horario']}</span><br>
       <strong>Personal Técnico:</strong> {', '.join(asignacion['tecnicos'])}
     </div>
     """, unsafe_allow_html=True)
 
 
 
-# 🛡️ Supervisores SST
-
-supervisores_festivo = []
-supervisores_normales = []
-
-for asignacion in supervisores:
-    horario = corregir_horario(asignacion["horario"], inicia_en_martes)
-    if "Lunes Festivo" in horario:
-        supervisores_festivo.append(asignacion)
-    else:
-        supervisores_normales.append(asignacion)
-
-inicia_en_martes = clave_rotacion.weekday() == 1
-
 # 🛡️ Supervisores SST
 st.markdown("### 🛡️ Supervisión SST")
 
 for asignacion in supervisores_normales:
-    horario = corregir_horario(asignacion["horario"], inicia_en_martes)
-
     st.markdown(f"""
     <div style="border:1px solid #ccc; padding:10px; margin-bottom:10px">
-      <strong>{horario}</strong><br>
+      <strong>{asignacion['horario']}</strong><br>
       <strong>Supervisor SST:</strong> {', '.join(asignacion['supervisor'])}
     </div>
     """, unsafe_allow_html=True)
 
 for asignacion in supervisores_festivo:
-    horario = corregir_horario(asignacion["horario"], inicia_en_martes)
-
     st.markdown(f"""
     <div style="border:2px solid #d9534f; background-color:#f9d6d5; padding:10px; margin-bottom:10px">
-      <strong style="color:#d9534f">{horario}</strong><br>
+      <strong style="color:#d9534f">{asignacion['horario']}</strong><br>
       <strong>Supervisor SST:</strong> {', '.join(asignacion['supervisor'])}
     </div>
     """, unsafe_allow_html=True)
@@ -125,49 +159,96 @@ for asignacion in supervisores_festivo:
 
 
 # 📄 PDF con técnicos y EHS
-# 📄 Botón para descargar semana actual
-if st.button("📄 Descargar semana actual"):
-    ruta = generar_pdf(turnos, semana, fecha_inicio, fecha_fin, supervisores)
-    st.success(f"PDF guardado en: {ruta}")
-
-
-if st.button("📆 Descargar programación completa"):
-    semanas_data = []
-    base = normalizar_a_lunes(fecha)
-
-    for i in range(9):  # 8 semanas ≈ 2 meses
-        fecha_lunes = base + timedelta(weeks=i)
-        lunes_festivo = lunes_festivo_en_semana(fecha_lunes)
-
-        # ¿Hay festivo en este lunes?
-        hay_festivo = es_lunes_festivo(fecha_lunes)
+# 📄 Botón para descargar semana actual (el PDF se genera en memoria al hacer clic)
+st.download_button(
+    "📄 Descargar semana actual",
+    data=lambda s=datos.sede_activa(): con_sede(s, pdf_semana, turnos, semana, fecha_inicio, fecha_fin, supervisores),
+    file_name=nombre_pdf_semana(semana, fecha_inicio),
+    mime="application/pdf"
+)
 
-        # ¿La semana debe comenzar en martes?
-        comenzar_en_martes = hay_festivo
 
-        if comenzar_en_martes:
-            fecha_inicio_semana = fecha_lunes + timedelta(days=1)  # martes
-            fecha_fin_semana = fecha_inicio_semana + timedelta(days=5)  # domingo
-            clave_rotacion = fecha_inicio_semana
-            nota_festivo = ""  # no se marca como festivo
+# 📆 Programación completa: se genera en segundo plano (ver trabajos.py) y la
+# página sigue respondiendo; el fragmento consulta el avance cada segundo
+n_semanas = st.number_input(
+    "Semanas de la programación completa",
+    min_value=1,
+    max_value=MAX_SEMANAS_PROGRAMACION,
+    value=SEMANAS_PROGRAMACION
+)
+clave_trabajo = f"trabajo_programacion:{datos.sede_activa() or ''}"  # uno por sede
+if st.button("📆 Generar programación completa"):
+    st.session_state[clave_trabajo] = trabajos.enviar_programacion(fecha, n_semanas)
+
+
+def mostrar_trabajo(id_trabajo):
+    trabajo = trabajos.estado(id_trabajo)
+    if trabajo is None:
+        return
+    if trabajo.estado == trabajos.LISTO:
+        contenido = trabajos.resultado(id_trabajo)
+        if contenido is None:
+            st.warning("El PDF ya no está en caché; vuelve a generarlo.")
+            return
+        st.download_button(
+            "📆 Descargar programación completa",
+            data=contenido,
+            file_name="programacion_completa.pdf",
+            mime="application/pdf"
+        )
+    elif trabajo.estado == trabajos.ERROR:
+        st.error(f"No se pudo generar la programación: {trabajo.error}")
+    elif trabajo.estado == trabajos.INTERRUMPIDO:
+        st.warning("La generación se interrumpió; vuelve a generarla.")
+    else:
+        sondear_trabajo(id_trabajo, datos.sede_activa())
+
+
+@st.fragment(run_every=1.0)
+def sondear_trabajo(id_trabajo, sede):
+    # Los reruns del fragmento no pasan por el selector de sede
+    trabajo = con_sede(sede, trabajos.estado, id_trabajo)
+    if trabajo is None or trabajo.terminado:
+        # Sin estado (p. ej. se podó) el rerun completo deja de mostrarlo
+        st.rerun(scope="app")
+    texto = f"Semana {trabajo.hechas} de {trabajo.total}" if trabajo.hechas else "En cola..."
+    st.progress(trabajo.avance, text=texto)
+
+
+if clave_trabajo in st.session_state:
+    mostrar_trabajo(st.session_state[clave_trabajo])
+
+
+# ⏱️ Panel de tiempos
+if mostrar_tiempos:
+    registro = medicion.terminar()
+    historial = st.session_state.setdefault("medicion", [])
+    historial.append(json.dumps(registro.a_dict(), ensure_ascii=False))
+    del historial[:-200]
+
+    with st.sidebar:
+        st.markdown(f"### ⏱️ Rerun: {registro.duracion * 1000:.1f} ms")
+        tramos = sorted(registro.tramos.items(), key=lambda t: t[1][1], reverse=True)
+        if tramos:
+            st.dataframe(
+                [
+                    {"tramo": nombre, "llamadas": n, "total ms": round(total * 1000, 2), "propio ms": round(propio * 1000, 2)}
+                    for nombre, (n, total, propio) in tramos
+                ],
+                hide_index=True
+            )
         else:
-            fecha_inicio_semana = fecha_lunes
-            fecha_fin_semana = fecha_lunes + timedelta(days=7)
-            clave_rotacion = fecha_lunes
-            nota_festivo = "■ Semana con festivo" if hay_festivo else ""
-
-        semana_num = semanas_desde_inicio(fecha_lunes)
-        turnos_semana = generar_turnos(clave_rotacion)
-        supervisores_semana = generar_ehs(clave_rotacion)
-
-        semanas_data.append({
-            "semana": semana_num,
-            "fecha_inicio": fecha_inicio_semana,
-            "fecha_fin": fecha_fin_semana,
-            "turnos": turnos_semana,
-            "supervisores_ehs": supervisores_semana,
-            "nota_festivo": nota_festivo
-        })
-
-    ruta = generar_pdf_multiple(semanas_data)
-    st.success(f"PDF completo guardado en: {ruta}")
+            st.caption("Todo salió de caché en este rerun.")
+
+        for cache, (consultas, fallos) in sorted(registro.aciertos().items()):
+            st.markdown(f"**{cache}**: {consultas - fallos}/{consultas} aciertos")
+        leidos = registro.contadores.get("bytes.leidos", 0)
+        escritos = registro.contadores.get("bytes.escritos", 0)
+        st.markdown(f"**Bytes**: {leidos:,} leídos · {escritos:,} escritos")
+
+        st.download_button(
+            "Exportar (JSON lines)",
+            data="\n".join(historial) + "\n",
+            file_name="medicion.jsonl",
+            mime="application/jsonl"
+        )
@@ -0,0 +1,59 @@
+"""Directorio de datos temporal para los benchmarks y las pruebas (tests/).
+
+preparar_directorio copia el roster de data/ a un directorio nuevo y lo deja
+activo con datos.configurar_directorio; quien lo llama restaura el directorio
+original y borra el temporal.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+import almacen  # noqa: E402
+import datos  # noqa: E402
+
+ARCHIVOS_BASE = ("cuadrillas.json", "supervisores.json", "parejas.json", "versiones_roster.json")
+INICIO = date(2025, 10, 20)
+
+
+def preparar_directorio(n_parejas=None, anios_historia=0, backend="sqlite", n_sedes=0, historial=False,
+                        prefijo="horas-bench-"):
+    """Roster de data/ (o uno sintético de n_parejas) en un directorio temporal.
+
+    anios_historia escribe un historial calculado de N años; historial=True
+    copia en cambio el historial guardado de data/.
+    """
+    directorio = tempfile.mkdtemp(prefix=prefijo)
+    archivos = ARCHIVOS_BASE + (tuple(almacen.ARCHIVOS_JSON[t] for t in ("tecnicos", "ehs")) if historial else ())
+    for nombre in archivos:
+        shutil.copy(os.path.join(RAIZ, "data", nombre), directorio)
+    if n_parejas:
+        parejas = [[f"Tecnico {2 * i}", f"Tecnico {2 * i + 1}"] for i in range(n_parejas)]
+        with open(os.path.join(directorio, "parejas.json"), "w") as f:
+            json.dump(parejas, f)
+
+    datos.configurar_directorio(directorio)
+    if anios_historia:
+        from rango import generar_rango
+
+        # Historial escrito como JSON; sqlite y compacto lo importan al abrirse
+        r = generar_rango(INICIO, INICIO + timedelta(weeks=52 * anios_historia - 1))
+        tecnicos = {r.lunes(i).isoformat(): r.turnos(i) for i in range(len(r))}
+        ehs = {r.lunes(i).isoformat(): r.ehs(i) for i in range(len(r))}
+        for tabla, contenido in (("tecnicos", tecnicos), ("ehs", ehs)):
+            with open(os.path.join(directorio, almacen.ARCHIVOS_JSON[tabla]), "w") as f:
+                json.dump(contenido, f, indent=2)
+    almacen.BACKEND = backend
+    almacen.obtener_almacen()  # importación fuera de la medición
+    if n_sedes:
+        import sedes
+
+        for i in range(n_sedes):
+            sedes.crear_sede(f"sede{i:03d}", directorio)
+    return directorio
@@ -0,0 +1,115 @@
+"""Prueba de estrés de escrituras concurrentes sobre el almacén de rotaciones.
+
+Varios procesos, cada uno con varios hilos, guardan semanas propias y además
+pisan las mismas claves compartidas. Al final se comprueba que el archivo se
+puede leer, que no se perdió ninguna semana propia y que cada clave compartida
+contiene uno de los valores escritos. Un proceso que termina con una excepción
+(p. ej. al abrir el almacén) cuenta como error.
+
+Cada backend se prueba --repeticiones veces: las carreras no fallan siempre.
+
+Uso: python benchmarks/estres_almacen.py [json|sqlite|compacto ...] [--repeticiones 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROCESOS = 4
+HILOS = 8
+ESCRITURAS = 25
+CLAVES_COMPARTIDAS = ["2025-10-20", "2025-10-27", "2025-11-03"]
+
+
+def _clave(proceso, hilo, i):
+    # Una semana propia por escritura, lejos de las claves compartidas
+    return (date(2000, 1, 3) + timedelta(weeks=(proceso * HILOS + hilo) * ESCRITURAS + i)).isoformat()
+
+
+def _valor(proceso, hilo, i):
+    return [{"cuadrilla": "Correctivos 1", "tecnicos": [f"p{proceso}", f"h{hilo}", f"i{i}"]}]
+
+
+def _trabajador(backend, directorio, proceso):
+    os.environ["HORAS_ALMACEN"] = backend
+    import almacen
+    import datos
+
+    almacen.BACKEND = backend
+    datos.configurar_directorio(directorio)
+    destino = almacen.obtener_almacen()
+    errores = []
+
+    def hilo(h):
+        try:
+            for i in range(ESCRITURAS):
+                destino.guardar("tecnicos", _clave(proceso, h, i), _valor(proceso, h, i))
+                clave = CLAVES_COMPARTIDAS[i % len(CLAVES_COMPARTIDAS)]
+                destino.guardar("tecnicos", clave, _valor(proceso, h, i))
+                destino.cargar("tecnicos", clave)
+        except Exception as e:  # se informa al proceso principal
+            errores.append(repr(e))
+
+    hilos = [threading.Thread(target=hilo, args=(h,)) for h in range(HILOS)]
+    for t in hilos:
+        t.start()
+    for t in hilos:
+        t.join()
+    return errores
+
+
+def comprobar(backend):
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(PROCESOS) as pool:
+            futuros = [pool.submit(_trabajador, backend, directorio, p) for p in range(PROCESOS)]
+            errores = []
+            for p, futuro in enumerate(futuros):
+                try:
+                    errores.extend(futuro.result())
+                except Exception as e:  # el proceso no terminó limpio
+                    errores.append(f"proceso {p}: {e!r}")
+        duracion = time.perf_counter() - inicio
+
+        import almacen
+        import datos
+
+        almacen.BACKEND = backend
+        datos.configurar_directorio(directorio)
+        lector = almacen.BACKENDS[backend]()
+        claves = set(lector.claves("tecnicos"))
+        faltan = [
+            _clave(p, h, i)
+            for p in range(PROCESOS) for h in range(HILOS) for i in range(ESCRITURAS)
+            if _clave(p, h, i) not in claves
+        ]
+        validos = {
+            str(_valor(p, h, i)) for p in range(PROCESOS) for h in range(HILOS) for i in range(ESCRITURAS)
+        }
+        compartidas_mal = [c for c in CLAVES_COMPARTIDAS if str(lector.cargar("tecnicos", c)) not in validos]
+
+    total = PROCESOS * HILOS * ESCRITURAS * 2
+    print(f"{backend:>6}: {total} escrituras en {duracion:.2f} s, "
+          f"errores={len(errores)}, semanas perdidas={len(faltan)}, compartidas inválidas={len(compartidas_mal)}")
+    for e in errores[:5]:
+        print("   ", e)
+    return not (errores or faltan or compartidas_mal)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("backends", nargs="*", default=["json", "sqlite", "compacto"])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+    resultados = [comprobar(b) for b in args.backends for _ in range(args.repeticiones)]
+    return 0 if all(resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Tiempo de importación de los módulos que carga la app (sin Streamlit) y la CLI.
+
+Corre `python -X importtime` en un proceso nuevo y comprueba que:
+    - ReportLab, holidays y pypdf no se importan hasta que se usan
+    - el tiempo acumulado (mínimo de varias corridas) no pasa del presupuesto
+
+Sale con código 1 si algo falla, para usarlo como prueba.
+
+Uso: python benchmarks/importtime.py [--presupuesto-ms 80] [--corridas 5] [--detalle]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lo que importan app.py y sus páginas (además de streamlit) y la CLI
+MODULOS = ["datos", "medicion", "almacen", "modelo", "rotacion", "pdf_generator", "cache_pdf", "conflictos", "optimizador", "analitica", "trabajos", "horas"]
+PROHIBIDOS = ["reportlab", "holidays", "pypdf", "streamlit"]
+PRESUPUESTO_MS = 80
+
+
+def medir(modulos):
+    # Devuelve [(cumulativo_us, nivel, modulo)] de una corrida en un proceso limpio
+    codigo = f"import sys; sys.path.insert(0, {RAIZ!r}); import {', '.join(modulos)}"
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True, text=True, check=True, cwd=RAIZ,
+    ).stderr
+    filas = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        nivel = (len(nombre) - len(nombre.lstrip())) // 2
+        filas.append((int(acumulado), nivel, nombre.strip()))
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--presupuesto-ms", type=float, default=PRESUPUESTO_MS)
+    parser.add_argument("--corridas", type=int, default=5)
+    parser.add_argument("--detalle", action="store_true", help="los 15 módulos más lentos de la mejor corrida")
+    args = parser.parse_args()
+
+    mejor = None
+    for _ in range(args.corridas):
+        filas = medir(MODULOS)
+        # Solo lo que cuelga de nuestros módulos (no el arranque del intérprete: site, etc.)
+        total = sum(us for us, nivel, nombre in filas if nivel == 0 and nombre in MODULOS) / 1000
+        if mejor is None or total < mejor[0]:
+            mejor = (total, filas)
+    total, filas = mejor
+
+    importados = {nombre.split(".")[0] for _, _, nombre in filas}
+    cargados = [m for m in PROHIBIDOS if m in importados]
+    propios = sorted(((us / 1000, nombre) for us, nivel, nombre in filas if nivel == 0 and nombre in MODULOS),
+                     reverse=True)
+
+    print(f"importar {', '.join(MODULOS)}: {total:.1f} ms (mínimo de {args.corridas}, presupuesto {args.presupuesto_ms:.0f} ms)")
+    for ms, nombre in propios:
+        print(f"  {nombre:<15} {ms:8.1f} ms")
+    if args.detalle:
+        print("Más lentos (acumulado):")
+        for us, _, nombre in sorted(filas, reverse=True)[:15]:
+            print(f"  {nombre:<40} {us / 1000:8.1f} ms")
+
+    ok = True
+    if cargados:
+        print(f"FALLA: se importan al inicio: {', '.join(cargados)}")
+        ok = False
+    if total > args.presupuesto_ms:
+        print(f"FALLA: {total:.1f} ms supera el presupuesto de {args.presupuesto_ms:.0f} ms")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""Tiempo de exportación de PDF para horizontes de 52 y 520 semanas.
+
+Uso: python benchmarks/pdf.py [semanas ...]
+"""
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rotacion import semanas_exportacion  # noqa: E402
+import pdf_generator  # noqa: E402
+
+
+def datos_semanas(n, desde=date(2025, 10, 20)):
+    return list(semanas_exportacion(desde, n))
+
+
+def main(horizontes):
+    for n in horizontes:
+        semanas_data = datos_semanas(n)
+        inicio = time.perf_counter()
+        pdf_generator.generar_pdf_multiple(semanas_data)
+        total = time.perf_counter() - inicio
+        print(f"{n:>4} semanas: {total:8.3f} s  ({total / n * 1000:6.2f} ms/semana)")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [52, 520])
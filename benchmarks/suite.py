@@ -0,0 +1,276 @@
+"""Suite de benchmarks de los caminos calientes: generación de turnos, calendario,
+almacén de rotaciones y exportación a PDF.
+
+Cada caso corre en un directorio de datos temporal (roster sintético de N
+parejas y/o historial de N años ya guardado) y se mide:
+    - latencia: mediana y mínimo de varias repeticiones
+    - pico de memoria: tracemalloc sobre una llamada aparte
+    - E/S: archivos abiertos con open() y, en Linux, llamadas read/write del
+      proceso (/proc/self/io, incluye SQLite)
+
+Los resultados se guardan por máquina en benchmarks/resultados/<máquina>.json;
+--comparar marca los casos más lentos que la línea base (por defecto +25 %).
+
+Uso:
+    python benchmarks/suite.py                  # todos los casos
+    python benchmarks/suite.py pdf almacen      # solo casos cuyo nombre contiene el filtro
+    python benchmarks/suite.py --rapido         # sin los tamaños más grandes
+    python benchmarks/suite.py --guardar        # guarda como línea base
+    python benchmarks/suite.py --comparar       # compara con la línea base (exit 1 si hay regresiones)
+"""
+import argparse
+import builtins
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from entorno import INICIO, RAIZ, preparar_directorio
+
+import almacen
+import analitica
+import calendario
+import datos
+import optimizador
+import pdf_generator
+import rotacion
+import sedes
+from rango import generar_rango
+
+DIRECTORIO_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+TIEMPO_MINIMO = 0.2   # segundos de repeticiones por caso
+MAX_REPETICIONES = 2000
+TOLERANCIA = 0.25
+
+
+# ---------- entorno de cada caso: entorno.preparar_directorio ----------
+
+class ContadorES:
+    """Cuenta open() y, si existe /proc/self/io, las llamadas read/write."""
+
+    def __init__(self):
+        self.aperturas = 0
+        self._open = None
+
+    def _leer_proc(self):
+        try:
+            with self._open("/proc/self/io") as f:
+                campos = dict(linea.split(": ") for linea in f.read().splitlines())
+            return int(campos["syscr"]), int(campos["syscw"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def __enter__(self):
+        self._open = builtins.open
+        original = self._open
+
+        def contar(*args, **kwargs):
+            self.aperturas += 1
+            return original(*args, **kwargs)
+
+        self._inicio = self._leer_proc()
+        builtins.open = contar
+        return self
+
+    def __exit__(self, *exc):
+        builtins.open = self._open
+        fin = self._leer_proc()
+        if self._inicio and fin:
+            # Se descuenta la lectura de /proc de la medición inicial
+            self.lecturas = fin[0] - self._inicio[0] - 1
+            self.escrituras = fin[1] - self._inicio[1]
+        else:
+            self.lecturas = self.escrituras = None
+
+
+def medir(funcion, repeticiones=None):
+    # Calentamiento (cachés de roster y calendario), luego tiempos y E/S por llamada
+    funcion()
+    tiempos = []
+    with ContadorES() as es:
+        limite = time.perf_counter() + TIEMPO_MINIMO
+        while len(tiempos) < (repeticiones or MAX_REPETICIONES):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+            if repeticiones is None and time.perf_counter() > limite and len(tiempos) >= 3:
+                break
+    n = len(tiempos)
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mediana_s": statistics.median(tiempos),
+        "min_s": min(tiempos),
+        "repeticiones": n,
+        "pico_kb": round(pico / 1024, 1),
+        "aperturas": round(es.aperturas / n, 2),
+        "lecturas": None if es.lecturas is None else round(es.lecturas / n, 2),
+        "escrituras": None if es.escrituras is None else round(es.escrituras / n, 2),
+    }
+
+
+# ---------- casos ----------
+
+def casos(rapido):
+    parejas = (5, 50) if rapido else (5, 50, 500)
+    anios = (1, 5) if rapido else (1, 5, 20)
+    horizontes = (1, 52) if rapido else (1, 52, 520)
+
+    for n in parejas:
+        yield f"generar_turnos/parejas={n}", dict(n_parejas=n), \
+            lambda: rotacion.generar_turnos(date(2026, 3, 2)), None
+        yield f"generar_ehs/parejas={n}", dict(n_parejas=n), \
+            lambda: rotacion.generar_ehs(date(2026, 3, 2)), None
+        yield f"generar_rango/parejas={n}/52sem", dict(n_parejas=n), \
+            lambda: generar_rango(INICIO, INICIO + timedelta(weeks=51)), None
+
+    lunes = [INICIO + timedelta(weeks=i) for i in range(520)]
+    yield "lunes_festivo_en_semana/520sem", {}, \
+        lambda: [calendario.lunes_festivo_en_semana(d) for d in lunes], None
+
+    for backend in almacen.BACKENDS:
+        for a in anios:
+            semanas = [INICIO + timedelta(weeks=i) for i in range(52 * a)]
+            estado = {"i": 0}
+
+            def cargar(semanas=semanas, estado=estado):
+                estado["i"] = (estado["i"] + 7) % len(semanas)
+                return rotacion.cargar_rotacion(semanas[estado["i"]])
+
+            def guardar(semanas=semanas, estado=estado):
+                estado["i"] = (estado["i"] + 7) % len(semanas)
+                fecha = semanas[estado["i"]]
+                rotacion.guardar_rotacion(fecha, rotacion.generar_turnos(fecha))
+
+            yield f"cargar_rotacion/{backend}/{a}a", dict(anios_historia=a, backend=backend), cargar, None
+            yield f"guardar_rotacion/{backend}/{a}a", dict(anios_historia=a, backend=backend), guardar, \
+                (20 if backend != "sqlite" else None)
+
+    semana = rotacion.resolver_semana(date(2026, 3, 4))
+    yield "generar_pdf/1sem", {}, lambda: pdf_generator.generar_pdf(
+        rotacion.generar_turnos(semana["clave_rotacion"]), semana["semana"], semana["fecha_inicio"],
+        semana["fecha_fin"], rotacion.generar_ehs(semana["clave_rotacion"])
+    ), None
+    for n in horizontes:
+        semanas_data = list(rotacion.semanas_exportacion(INICIO, n))
+        yield f"generar_pdf_multiple/{n}sem", {}, \
+            lambda semanas_data=semanas_data: pdf_generator.generar_pdf_multiple(semanas_data), \
+            (1 if n >= 520 else None)
+
+    # Replanificar un año ya optimizado tras una ausencia (6 parejas: una de reserva)
+    ausencia = [("Tecnico 4", INICIO + timedelta(weeks=10), INICIO + timedelta(weeks=10, days=6))]
+    estado_plan = {}
+
+    def replanificar():
+        if not estado_plan:
+            optimizador.guardar_plan(optimizador.planificar(INICIO, 52, ausencias=[]))
+            estado_plan["guardado"] = True
+        return optimizador.planificar(INICIO, 52, ausencias=ausencia, solo_conflictos=True)
+
+    # Totales de todas las personas en 5 años (sumas prefijas ya construidas) y
+    # guardar una semana con la analítica al día
+    yield "analitica/totales/5a", dict(anios_historia=5), \
+        lambda: analitica.totales(INICIO, INICIO + timedelta(weeks=52 * 5 - 1)), None
+
+    def guardar_con_analitica():
+        analitica.totales(INICIO, INICIO + timedelta(weeks=52 * 5 - 1))
+        rotacion.guardar_rotacion(INICIO + timedelta(weeks=3), rotacion.generar_turnos(INICIO + timedelta(weeks=3)))
+
+    yield "analitica/guardar_rotacion/5a", dict(anios_historia=5), guardar_con_analitica, None
+
+    yield "optimizador/replanificar/52sem", dict(n_parejas=6), replanificar, 3
+
+    # La misma semana en todas las sedes, en este proceso: con más sedes que
+    # datos.MAX_SEDES_EN_MEMORIA cada vuelta vuelve a abrir sus almacenes
+    for n in (10, 50) if rapido else (10, 50, 200):
+        yield f"sedes/generar_semana/{n}", dict(n_sedes=n), \
+            lambda: sedes.generar_semana(date(2026, 3, 3), procesos=1), 3
+
+
+# ---------- resultados ----------
+
+def ruta_resultados():
+    return os.path.join(DIRECTORIO_RESULTADOS, f"{platform.node() or 'local'}.json")
+
+
+def comparar(resultados, base, tolerancia):
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if not anterior:
+            continue
+        cambio = actual["mediana_s"] / anterior["mediana_s"] - 1
+        marca = ""
+        if cambio > tolerancia:
+            marca = "  ← REGRESIÓN"
+            regresiones.append(nombre)
+        print(f"  {nombre:<42} {anterior['mediana_s'] * 1e3:10.3f} → {actual['mediana_s'] * 1e3:10.3f} ms"
+              f"  ({cambio:+.0%}){marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("filtros", nargs="*")
+    parser.add_argument("--rapido", action="store_true")
+    parser.add_argument("--guardar", action="store_true")
+    parser.add_argument("--comparar", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    args = parser.parse_args()
+
+    directorio_original = datos.DATA_DIR
+    resultados = {}
+    print(f"{'caso':<42} {'mediana ms':>11} {'mín ms':>10} {'pico KB':>9} {'open':>6} {'read':>7} {'write':>7}")
+    for nombre, entorno, funcion, repeticiones in casos(args.rapido):
+        if args.filtros and not any(f in nombre for f in args.filtros):
+            continue
+        directorio = preparar_directorio(**entorno)
+        try:
+            r = resultados[nombre] = medir(funcion, repeticiones)
+        finally:
+            datos.configurar_directorio(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+        print(f"{nombre:<42} {r['mediana_s'] * 1e3:11.3f} {r['min_s'] * 1e3:10.3f} {r['pico_kb']:9.1f} "
+              f"{r['aperturas']:6} {r['lecturas'] if r['lecturas'] is not None else '-':>7} "
+              f"{r['escrituras'] if r['escrituras'] is not None else '-':>7}")
+
+    ruta = ruta_resultados()
+    codigo = 0
+    if args.comparar:
+        try:
+            with open(ruta) as f:
+                base = json.load(f)["casos"]
+        except FileNotFoundError:
+            print(f"\nNo hay línea base en {ruta}; usar --guardar primero")
+            return 1
+        print(f"\nComparación con {ruta}:")
+        regresiones = comparar(resultados, base, args.tolerancia)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones (> {args.tolerancia:.0%})")
+            codigo = 1
+
+    if args.guardar:
+        base = {}
+        if os.path.exists(ruta):
+            with open(ruta) as f:
+                base = json.load(f)["casos"]
+        base.update(resultados)
+        os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+        with open(ruta, "w") as f:
+            json.dump({"python": platform.python_version(), "casos": base}, f, indent=2, sort_keys=True)
+        print(f"\nLínea base guardada en {ruta}")
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
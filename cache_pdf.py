@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import datos
+import medicion
+import rotacion
+from almacen import obtener_almacen
+from pdf_generator import generar_pdf
+from rotacion import normalizar_a_lunes
+
+# Cambiar cuando cambie el diseño del PDF para no servir versiones viejas
+VERSION_PLANTILLA = 1
+
+MAX_BYTES_MEMORIA = 32 * 1024 * 1024
+MAX_BYTES_DISCO = 256 * 1024 * 1024
+DIRECTORIO = "cache_pdf"
+
+_lock = threading.Lock()
+_memoria = OrderedDict()  # clave → bytes, en orden de uso
+_bytes_memoria = 0
+
+
+def _serializar(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+
+def clave_cache(entradas):
+    # Hash estable de las entradas + versión de plantilla (y la sede, si hay una
+    # activa). Las entradas deben incluir todo lo que lee la generación: los
+    # turnos de la semana, o el roster y los ajustes (ver entradas_programacion);
+    # así otras escrituras del almacén no cambian la clave
+    clave = {
+        "entradas": entradas,
+        "plantilla": VERSION_PLANTILLA,
+    }
+    if datos.sede_activa() is not None:
+        clave["sede"] = datos.sede_activa()
+    contenido = json.dumps(
+        clave,
+        sort_keys=True,
+        ensure_ascii=False,
+        default=_serializar,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _ruta(clave):
+    return os.path.join(datos.ruta(DIRECTORIO), f"{clave}.pdf")
+
+
+def _guardar_memoria(clave, contenido):
+    global _bytes_memoria
+    with _lock:
+        if clave in _memoria:
+            _memoria.move_to_end(clave)
+            return
+        _memoria[clave] = contenido
+        _bytes_memoria += len(contenido)
+        while _bytes_memoria > MAX_BYTES_MEMORIA and len(_memoria) > 1:
+            _, viejo = _memoria.popitem(last=False)
+            _bytes_memoria -= len(viejo)
+
+
+def _leer_disco(clave):
+    ruta = _ruta(clave)
+    try:
+        with open(ruta, "rb") as f:
+            contenido = f.read()
+    except FileNotFoundError:
+        return None
+    os.utime(ruta)  # el mtime marca el último uso para el desalojo
+    return contenido
+
+
+def _guardar_disco(clave, contenido):
+    directorio = datos.ruta(DIRECTORIO)
+    os.makedirs(directorio, exist_ok=True)
+    temporal = f"{_ruta(clave)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(contenido)
+    os.replace(temporal, _ruta(clave))
+    _desalojar_disco(directorio)
+
+
+def _desalojar_disco(directorio):
+    archivos = []
+    total = 0
+    for entrada in os.scandir(directorio):
+        if entrada.name.endswith(".pdf"):
+            info = entrada.stat()
+            archivos.append((info.st_mtime_ns, info.st_size, entrada.path))
+            total += info.st_size
+    archivos.sort()
+    for _, tamano, ruta in archivos:
+        if total <= MAX_BYTES_DISCO:
+            break
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+        total -= tamano
+
+
+def buscar(clave):
+    """Bytes en caché (memoria o disco) para una clave de clave_cache, o None."""
+    with _lock:
+        contenido = _memoria.get(clave)
+        if contenido is not None:
+            _memoria.move_to_end(clave)
+            return contenido
+
+    contenido = _leer_disco(clave)
+    if contenido is not None:
+        medicion.contar("bytes.leidos", len(contenido))
+        _guardar_memoria(clave, contenido)
+    return contenido
+
+
+def guardar(clave, contenido):
+    _guardar_disco(clave, contenido)
+    medicion.contar("bytes.escritos", len(contenido))
+    _guardar_memoria(clave, contenido)
+
+
+def obtener_o_generar(entradas, generar):
+    """Devuelve los bytes en caché para `entradas` o llama a generar() y los guarda."""
+    clave = clave_cache(entradas)
+    medicion.contar("cache_pdf.consultas")
+    contenido = buscar(clave)
+    if contenido is None:
+        medicion.contar("cache_pdf.fallos")
+        contenido = generar()
+        guardar(clave, contenido)
+    return contenido
+
+
+def pdf_semana(turnos, semana, fecha_inicio, fecha_fin, supervisores_ehs, nota_festivo="", normalizado=False):
+    entradas = {
+        "tipo": "semana",
+        "turnos": turnos,
+        "supervisores_ehs": supervisores_ehs,
+        "semana": semana,
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "nota_festivo": nota_festivo,
+        "normalizado": normalizado,
+    }
+    return obtener_o_generar(entradas, lambda: generar_pdf(
+        turnos, semana, fecha_inicio, fecha_fin, supervisores_ehs, nota_festivo, normalizado
+    ))
+
+
+def _ajustes_en_rango(desde, hasta):
+    # {tabla: {clave: semana}} de los ajustes manuales con clave en [desde, hasta)
+    almacen = obtener_almacen()
+    desde, hasta = desde.isoformat(), hasta.isoformat()
+    return {
+        tabla: {clave: almacen.cargar(tabla, clave) for clave in almacen.claves(tabla) if desde <= clave < hasta}
+        for tabla in ("ajustes_tecnicos", "ajustes_ehs")
+    }
+
+
+def entradas_programacion(fecha, n_semanas):
+    # Entradas del PDF de la programación completa (lo genera trabajos.enviar_programacion):
+    # solo depende de la fecha base, el horizonte, las versiones del roster
+    # vigentes en esas semanas y, en modo derivado, de los ajustes de esas
+    # semanas (semana_exportacion no lee las semanas guardadas)
+    desde = normalizar_a_lunes(fecha)
+    roster = []
+    for i in range(n_semanas):
+        version = datos.version_semana(desde + timedelta(weeks=i))
+        if version not in roster:
+            roster.append(version)
+    entradas = {"tipo": "programacion", "desde": desde, "semanas": n_semanas, "roster": roster}
+    if rotacion.MODO == "derivado":
+        entradas["ajustes"] = _ajustes_en_rango(desde, desde + timedelta(weeks=n_semanas))
+    return entradas
+
+
+def limpiar():
+    global _bytes_memoria
+    with _lock:
+        _memoria.clear()
+        _bytes_memoria = 0
+    directorio = datos.ruta(DIRECTORIO)
+    if os.path.isdir(directorio):
+        for entrada in os.scandir(directorio):
+            if entrada.name.endswith(".pdf"):
+                os.remove(entrada.path)
@@ -0,0 +1,91 @@
+import bisect
+import threading
+from datetime import timedelta
+
+import medicion
+
+# Margen de años que se cargan alrededor del primero consultado
+MARGEN_ANIOS = 2
+
+_lock = threading.Lock()
+
+
+class _Calendario:
+    """Años cargados, festivos e índices derivados. Nunca se modifica: cada
+    carga publica uno nuevo con una sola asignación, así quien lee sin el lock
+    ve los años y sus índices siempre juntos."""
+    __slots__ = ("anios", "festivos", "lunes_festivos", "semana_a_festivo")
+
+    def __init__(self, anios=frozenset(), festivos=frozenset()):
+        self.anios = frozenset(anios)
+        self.festivos = frozenset(festivos)   # festivos oficiales + días no laborables de la empresa
+        lunes = sorted(d for d in self.festivos if d.weekday() == 0)
+        mapa = {d: d for d in lunes}
+        for d in lunes:
+            mapa.setdefault(d - timedelta(days=7), d)
+        self.lunes_festivos = lunes           # ordenados, para bisect
+        self.semana_a_festivo = mapa          # lunes → lunes festivo de esa semana (él mismo o el siguiente)
+
+
+_calendario = _Calendario()
+
+
+def _cargar_anios(desde, hasta):
+    # Devuelve el calendario con los años desde..hasta cargados
+    global _calendario
+    calendario = _calendario
+    anios = calendario.anios
+    if desde in anios and hasta in anios and (hasta - desde < 2 or anios.issuperset(range(desde, hasta + 1))):
+        return calendario
+    with _lock:
+        calendario = _calendario
+        faltan = [a for a in range(desde, hasta + 1) if a not in calendario.anios]
+        if not faltan:
+            return calendario
+        # Se carga un bloque de años de una vez para no volver a construir el calendario
+        rango = range(min(faltan) - MARGEN_ANIOS, max(faltan) + MARGEN_ANIOS + 1)
+        rango = [a for a in rango if a not in calendario.anios]
+        # holidays se importa en la primera consulta, no al importar este módulo
+        import holidays
+
+        with medicion.tramo("calendario.cargar_anios"):
+            nuevos = holidays.Colombia(years=rango).keys()
+        calendario = _calendario = _Calendario(calendario.anios.union(rango), calendario.festivos.union(nuevos))
+        return calendario
+
+
+def agregar_no_laborables(fechas):
+    global _calendario
+    fechas = list(fechas)
+    if not fechas:
+        return
+    _cargar_anios(min(fechas).year, max(fechas).year)
+    with _lock:
+        _calendario = _Calendario(_calendario.anios, _calendario.festivos.union(fechas))
+
+
+def es_festivo(fecha):
+    return fecha in _cargar_anios(fecha.year, fecha.year).festivos
+
+
+def es_lunes_festivo(fecha):
+    fecha_lunes = fecha - timedelta(days=fecha.weekday())
+    return es_festivo(fecha_lunes)
+
+
+def lunes_festivo_en_semana(fecha_lunes):
+    # Primer lunes festivo entre fecha_lunes y 7 días después (incluye el lunes siguiente)
+    fin = fecha_lunes + timedelta(days=7)
+    calendario = _cargar_anios(fecha_lunes.year, fin.year)
+    if fecha_lunes.weekday() == 0:
+        return calendario.semana_a_festivo.get(fecha_lunes)
+    lunes = calendario.lunes_festivos
+    i = bisect.bisect_left(lunes, fecha_lunes)
+    if i < len(lunes) and lunes[i] <= fin:
+        return lunes[i]
+    return None
+
+
+def lunes_festivos(desde, hasta):
+    lunes = _cargar_anios(desde.year, hasta.year).lunes_festivos
+    return lunes[bisect.bisect_left(lunes, desde):bisect.bisect_right(lunes, hasta)]
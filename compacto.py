@@ -0,0 +1,226 @@
+"""Formato binario compacto para el historial de rotaciones.
+
+Cada fila de una semana se guarda como dos enteros de 16 bits: una plantilla
+(la fila sin las personas: cuadrilla, vehículo, horario...) y un grupo (la
+lista de personas). Ambos se codifican en un diccionario común, así una semana
+de técnicos ocupa ~30 bytes en lugar de ~2 KB de JSON.
+
+Estructura del archivo:
+    cabecera   "<4sHIII"  magia, versión, n_semanas, pos_indice, pos_diccionario
+    registros  por semana, pares (plantilla, grupo) "<HH"
+    índice     n_semanas × "<HiIH" (tabla, ordinal de la fecha, posición, largo),
+               ordenado por (tabla, fecha) para búsqueda binaria
+    diccionario JSON {"tablas": [...], "plantillas": [...], "grupos": [...]}
+
+Una plantilla es [k, pares]: los pares [campo, valor] de la fila en orden y
+la posición k del campo de personas (su valor en pares se ignora). Una semana
+que no es una lista de filas se guarda completa como plantilla "cruda" (grupo
+0xFFFF), de modo que la ida y vuelta es siempre sin pérdidas.
+"""
+import copy
+import json
+import mmap
+import os
+import struct
+from datetime import date
+
+MAGIA = b"HRS1"
+VERSION = 2
+CABECERA = struct.Struct("<4sHIII")
+ENTRADA = struct.Struct("<HiIH")
+FILA = struct.Struct("<HH")
+CRUDO = 0xFFFF
+
+# Clave de la lista de personas en cada tipo de fila
+CAMPOS_PERSONAS = ("tecnicos", "supervisor")
+
+
+def _separar(fila):
+    # Plantilla = [posición de las personas, pares [campo, valor] en orden]
+    if not isinstance(fila, dict):
+        return None, None
+    pares = []
+    k = personas = None
+    for campo, valor in fila.items():
+        if campo in CAMPOS_PERSONAS and personas is None and isinstance(valor, list):
+            k, personas = len(pares), valor
+            pares.append([campo, None])
+        else:
+            pares.append([campo, valor])
+    if personas is None:
+        return None, None
+    return json.dumps([k, pares], ensure_ascii=False, separators=(",", ":")), personas
+
+
+def _unir(plantilla, personas):
+    # Fila nueva: los valores mutables de la plantilla en caché se copian
+    k, pares = plantilla
+    fila = {campo: copy.deepcopy(valor) if isinstance(valor, (list, dict)) else valor for campo, valor in pares}
+    fila[pares[k][0]] = personas
+    return fila
+
+
+class _Diccionario:
+    def __init__(self):
+        self.valores = []
+        self._ids = {}
+
+    def id(self, texto):
+        i = self._ids.get(texto)
+        if i is None:
+            i = self._ids[texto] = len(self.valores)
+            if i >= CRUDO:
+                raise ValueError("Demasiadas entradas distintas para el formato compacto")
+            self.valores.append(texto)
+        return i
+
+
+def codificar(tablas):
+    """tablas: {tabla: {"YYYY-MM-DD": semana}} → bytes"""
+    nombres = sorted(tablas)
+    plantillas = _Diccionario()
+    grupos = _Diccionario()
+    registros = bytearray()
+    indice = []
+    pos_base = CABECERA.size
+
+    for t, tabla in enumerate(nombres):
+        for clave, semana in tablas[tabla].items():
+            inicio = len(registros)
+            filas = []
+            if isinstance(semana, list):
+                for fila in semana:
+                    plantilla, personas = _separar(fila)
+                    if plantilla is None:
+                        filas = None
+                        break
+                    filas.append((plantillas.id(plantilla),
+                                  grupos.id(json.dumps(personas, ensure_ascii=False, separators=(",", ":")))))
+            else:
+                filas = None
+            if filas is None:
+                # Semana con otra forma (p. ej. un ajuste manual): se guarda tal cual
+                filas = [(plantillas.id(json.dumps(semana, ensure_ascii=False, separators=(",", ":"))), CRUDO)]
+            for p, g in filas:
+                registros += FILA.pack(p, g)
+            indice.append((t, date.fromisoformat(clave).toordinal(), pos_base + inicio, len(filas)))
+
+    indice.sort()
+    pos_indice = pos_base + len(registros)
+    pos_diccionario = pos_indice + ENTRADA.size * len(indice)
+    diccionario = json.dumps(
+        {"tablas": nombres, "plantillas": plantillas.valores, "grupos": grupos.valores},
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode("utf-8")
+
+    salida = bytearray(CABECERA.pack(MAGIA, VERSION, len(indice), pos_indice, pos_diccionario))
+    salida += registros
+    for entrada in indice:
+        salida += ENTRADA.pack(*entrada)
+    salida += diccionario
+    return bytes(salida)
+
+
+class ArchivoCompacto:
+    """Lector sobre un mmap: abrir cuesta leer la cabecera y el diccionario;
+    cada semana se busca en el índice con búsqueda binaria."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            info = os.fstat(f.fileno())
+            self.identidad = (info.st_ino, info.st_mtime_ns, info.st_size)
+            if os.name == "nt":
+                # En Windows un archivo mapeado no se puede reemplazar con os.replace
+                self._datos = f.read()
+            else:
+                self._datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, version, self.n_semanas, self._pos_indice, pos_diccionario = CABECERA.unpack_from(self._datos, 0)
+        if magia != MAGIA or version != VERSION:
+            raise ValueError(f"{ruta} no es un archivo de rotaciones compacto")
+        diccionario = json.loads(bytes(self._datos[pos_diccionario:]).decode("utf-8"))
+        self.tablas = {nombre: i for i, nombre in enumerate(diccionario["tablas"])}
+        self._plantillas_json = diccionario["plantillas"]
+        self._grupos_json = diccionario["grupos"]
+        self._plantillas = {}
+        self._grupos = {}
+
+    def cerrar(self):
+        if isinstance(self._datos, mmap.mmap):
+            self._datos.close()
+
+    @property
+    def cerrado(self):
+        return isinstance(self._datos, mmap.mmap) and self._datos.closed
+
+    def _entrada(self, i):
+        return ENTRADA.unpack_from(self._datos, self._pos_indice + i * ENTRADA.size)
+
+    def _buscar(self, t, ordinal):
+        bajo, alto = 0, self.n_semanas
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._entrada(medio)[:2] < (t, ordinal):
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo
+
+    def _plantilla(self, i):
+        valor = self._plantillas.get(i)
+        if valor is None:
+            valor = self._plantillas[i] = json.loads(self._plantillas_json[i])
+        return valor
+
+    def _grupo(self, i):
+        valor = self._grupos.get(i)
+        if valor is None:
+            valor = self._grupos[i] = json.loads(self._grupos_json[i])
+        return valor
+
+    def _leer(self, pos, n):
+        filas = [FILA.unpack_from(self._datos, pos + k * FILA.size) for k in range(n)]
+        if len(filas) == 1 and filas[0][1] == CRUDO:
+            return json.loads(self._plantillas_json[filas[0][0]])
+        return [_unir(self._plantilla(p), list(self._grupo(g))) for p, g in filas]  # objetos nuevos en cada lectura
+
+    def cargar(self, tabla, clave):
+        t = self.tablas.get(tabla)
+        if t is None:
+            return None
+        try:
+            ordinal = date.fromisoformat(clave).toordinal()
+        except ValueError:
+            return None
+        i = self._buscar(t, ordinal)
+        if i < self.n_semanas:
+            t_i, ordinal_i, pos, n = self._entrada(i)
+            if (t_i, ordinal_i) == (t, ordinal):
+                return self._leer(pos, n)
+        return None
+
+    def semanas(self, tabla):
+        # (clave, semana) en orden de fecha
+        t = self.tablas.get(tabla)
+        if t is None:
+            return
+        for i in range(self._buscar(t, -2**31), self.n_semanas):
+            t_i, ordinal, pos, n = self._entrada(i)
+            if t_i != t:
+                break
+            yield date.fromordinal(ordinal).isoformat(), self._leer(pos, n)
+
+    def claves(self, tabla):
+        t = self.tablas.get(tabla)
+        if t is None:
+            return []
+        claves = []
+        for i in range(self._buscar(t, -2**31), self.n_semanas):
+            t_i, ordinal, _, _ = self._entrada(i)
+            if t_i != t:
+                break
+            claves.append(date.fromordinal(ordinal).isoformat())
+        return claves
+
+    def todo(self):
+        return {tabla: dict(self.semanas(tabla)) for tabla in self.tablas}
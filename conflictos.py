@@ -0,0 +1,109 @@
+"""Validación de la programación: vehículos o personas con dos turnos a la vez
+y descansos menores al mínimo entre turnos, también entre semanas.
+
+Cada turno se convierte en intervalos (uno por día trabajado) que se indexan
+por vehículo y por persona; cada índice se recorre ordenado por inicio con un
+heap de los intervalos abiertos: O(n log n + conflictos).
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from exportadores import dias_turno, turnos_semana
+
+DESCANSO_MINIMO = timedelta(hours=10)
+
+# Tipos de conflicto
+VEHICULO = "vehiculo"
+PERSONA = "persona"
+DESCANSO = "descanso"
+
+
+@dataclass(frozen=True, slots=True)
+class Intervalo:
+    inicio: datetime
+    fin: datetime
+    semana: int
+    turno: str      # "Correctivos 3 13:00 - 22:00 Lun-Sab"
+
+
+@dataclass(frozen=True, slots=True)
+class Conflicto:
+    tipo: str
+    recurso: str    # placa o nombre
+    a: Intervalo
+    b: Intervalo
+
+    def texto(self):
+        if self.tipo == DESCANSO:
+            horas = (self.b.inicio - self.a.fin).total_seconds() / 3600
+            return (f"{self.recurso}: {horas:.1f} h de descanso entre «{self.a.turno}» "
+                    f"(termina {self.a.fin:%d/%m %H:%M}) y «{self.b.turno}» (empieza {self.b.inicio:%d/%m %H:%M})")
+        inicio = max(self.a.inicio, self.b.inicio)
+        fin = min(self.a.fin, self.b.fin)
+        return (f"{self.recurso}: «{self.a.turno}» y «{self.b.turno}» se cruzan "
+                f"el {inicio:%d/%m} de {inicio:%H:%M} a {fin:%H:%M}")
+
+
+def intervalos(semanas):
+    """Produce (vehiculo, personas, Intervalo) por día trabajado de cada turno."""
+    for semana_info in semanas:
+        for tipo, nombre, vehiculo, horario, personas in turnos_semana(semana_info):
+            etiqueta = f"{nombre} {horario.texto()}"
+            for dia in dias_turno(horario, semana_info):
+                inicio = datetime.combine(dia, time(horario.inicio // 60, horario.inicio % 60))
+                yield vehiculo, personas, Intervalo(inicio, inicio + timedelta(minutes=horario.duracion),
+                                                    semana_info["semana"], etiqueta)
+
+
+def _cruces(tipo, recurso, ordenados):
+    # ordenados por inicio; el heap guarda (fin, orden, intervalo) de los abiertos
+    abiertos = []
+    for i, intervalo in enumerate(ordenados):
+        while abiertos and abiertos[0][0] <= intervalo.inicio:
+            heapq.heappop(abiertos)
+        for fin, _, otro in abiertos:
+            if fin > intervalo.inicio:
+                yield Conflicto(tipo, recurso, otro, intervalo)
+        heapq.heappush(abiertos, (intervalo.fin, i, intervalo))
+
+
+def _descansos(recurso, ordenados, minimo):
+    # Se compara con el turno anterior que termina más tarde
+    anterior = None
+    for intervalo in ordenados:
+        if anterior is not None and anterior.fin <= intervalo.inicio < anterior.fin + minimo:
+            yield Conflicto(DESCANSO, recurso, anterior, intervalo)
+        if anterior is None or intervalo.fin > anterior.fin:
+            anterior = intervalo
+
+
+def validar(semanas, descanso_minimo=DESCANSO_MINIMO, vehiculos=True, personas=True):
+    """Conflictos de un iterable de semanas (como las de semanas_exportacion),
+    ordenados por fecha. descanso_minimo=None omite la revisión de descansos."""
+    por_vehiculo = {}
+    por_persona = {}
+    for vehiculo, nombres, intervalo in intervalos(semanas):
+        if vehiculos and vehiculo:
+            por_vehiculo.setdefault(vehiculo, []).append(intervalo)
+        if personas:
+            for nombre in nombres:
+                por_persona.setdefault(nombre, []).append(intervalo)
+
+    conflictos = []
+    for indice, tipo in ((por_vehiculo, VEHICULO), (por_persona, PERSONA)):
+        for recurso, lista in indice.items():
+            lista.sort(key=lambda i: (i.inicio, i.fin))
+            conflictos.extend(_cruces(tipo, recurso, lista))
+            if tipo == PERSONA and descanso_minimo:
+                conflictos.extend(_descansos(recurso, lista, descanso_minimo))
+    conflictos.sort(key=lambda c: (c.b.inicio, c.tipo, c.recurso))
+    return conflictos
+
+
+def resumen(conflictos):
+    # {tipo: cantidad}
+    conteo = {}
+    for c in conflictos:
+        conteo[c.tipo] = conteo.get(c.tipo, 0) + 1
+    return conteo
@@ -0,0 +1,232 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+
+import medicion
+
+# Directorio de datos: HORAS_DATA_DIR o la carpeta data/ junto a este archivo
+DATA_DIR = os.environ.get(
+    "HORAS_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"),
+)
+
+# Sedes: cada una tiene su directorio <DATA_DIR>/sedes/<nombre> con los mismos
+# archivos que data/. Sin sede activa se usa DATA_DIR (una sola sede)
+DIRECTORIO_SEDES = "sedes"
+_sede = contextvars.ContextVar("sede", default=None)
+
+# Sedes cuyos datos cargados y almacén se mantienen en memoria (las menos usadas
+# recientemente se descartan y se vuelven a abrir si se piden de nuevo)
+MAX_SEDES_EN_MEMORIA = int(os.environ.get("HORAS_MAX_SEDES", 16))
+
+# Segundos entre revisiones del mtime de un archivo ya cargado
+INTERVALO_REVISION = 1.0
+
+
+class PorSede:
+    """Un valor por directorio de datos; guarda los de las MAX_SEDES_EN_MEMORIA
+    sedes usadas más recientemente."""
+
+    def __init__(self, crear=None):
+        self._crear = crear
+        self._lock = threading.Lock()
+        self._valores = OrderedDict()  # directorio → valor, en orden de uso
+
+    def get(self):
+        clave = directorio()
+        valor = self._valores.get(clave)
+        if valor is not None:
+            try:
+                self._valores.move_to_end(clave)
+            except KeyError:
+                pass  # otro hilo lo descartó mientras tanto
+            return valor
+        if self._crear is None:
+            return None
+        with self._lock:
+            valor = self._valores.get(clave)
+            if valor is None:
+                valor = self._crear()
+                self._poner(clave, valor)
+        return valor
+
+    def poner(self, valor):
+        with self._lock:
+            self._poner(directorio(), valor)
+
+    def _poner(self, clave, valor):
+        self._valores[clave] = valor
+        self._valores.move_to_end(clave)
+        while len(self._valores) > MAX_SEDES_EN_MEMORIA:
+            self._valores.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._valores.clear()
+
+
+_lock = threading.Lock()
+_caches = PorSede(dict)  # por sede: (ruta, transformar) → [mtime, revisado_en, valor]
+
+
+def configurar_directorio(ruta_directorio):
+    global DATA_DIR
+    DATA_DIR = os.path.abspath(ruta_directorio)
+    invalidar()
+
+
+def invalidar():
+    # Olvida lo cargado sin esperar a la próxima revisión de mtimes
+    with _lock:
+        _caches.limpiar()
+
+
+def _validar_sede(nombre):
+    if nombre is not None and (not nombre or nombre.startswith(".") or "/" in nombre or os.sep in nombre):
+        raise ValueError(f"Nombre de sede inválido: {nombre!r}")
+
+
+@contextmanager
+def sede(nombre):
+    # Dentro del bloque (y en este hilo o tarea) se usan los datos de la sede `nombre`
+    _validar_sede(nombre)
+    token = _sede.set(nombre)
+    try:
+        yield
+    finally:
+        _sede.reset(token)
+
+
+def usar_sede(nombre):
+    # Como sede(), pero hasta el final del contexto actual (p. ej. un rerun de Streamlit)
+    _validar_sede(nombre)
+    _sede.set(nombre)
+
+
+def sede_activa():
+    return _sede.get()
+
+
+def directorio():
+    nombre = _sede.get()
+    if nombre is None:
+        return DATA_DIR
+    return os.path.join(DATA_DIR, DIRECTORIO_SEDES, nombre)
+
+
+def sedes():
+    # Nombres de las sedes configuradas (directorios con versiones del roster)
+    raiz = os.path.join(DATA_DIR, DIRECTORIO_SEDES)
+    if not os.path.isdir(raiz):
+        return []
+    return sorted(
+        e.name for e in os.scandir(raiz)
+        if e.is_dir() and os.path.exists(os.path.join(e.path, ARCHIVO_VERSIONES))
+    )
+
+
+def ruta(nombre):
+    return os.path.join(directorio(), nombre)
+
+
+def cargar_json(nombre, transformar=None):
+    # Devuelve el contenido parseado (y transformado) desde caché mientras el
+    # archivo no cambie; el mtime solo se consulta cada INTERVALO_REVISION.
+    # El valor es compartido: no se debe modificar.
+    clave = (ruta(nombre), transformar)
+    medicion.contar("datos.consultas")
+    ahora = time.monotonic()
+    cache = _caches.get()
+    entrada = cache.get(clave)
+    if entrada is not None and ahora - entrada[1] < INTERVALO_REVISION:
+        return entrada[2]
+
+    mtime = os.stat(clave[0]).st_mtime_ns
+    if entrada is not None and entrada[0] == mtime:
+        entrada[1] = ahora
+        return entrada[2]
+
+    with medicion.tramo("datos.cargar_json"), open(clave[0]) as f:
+        contenido = f.read()
+        valor = json.loads(contenido)
+        if transformar is not None:
+            valor = transformar(valor)
+    medicion.contar("datos.fallos")
+    medicion.contar("bytes.leidos", len(contenido))
+    with _lock:
+        cache[clave] = [mtime, ahora, valor]
+    return valor
+
+
+ARCHIVOS_ROSTER = ("parejas.json", "cuadrillas.json", "supervisores.json")
+
+# Versiones del roster con fecha efectiva. Cada entrada:
+#   {"desde": "YYYY-MM-DD", "semana_inicial": n,
+#    "parejas": archivo, "cuadrillas": archivo, "supervisores": archivo,
+#    "administrativo": [nombres]}
+# Una semana usa la versión vigente en su lunes y su rotación es
+# (semanas del lunes desde "desde") + semana_inicial.
+ARCHIVO_VERSIONES = "versiones_roster.json"
+CAMPOS_VERSION = ("parejas", "cuadrillas", "supervisores")
+# Supervisor SST del turno administrativo si la versión no lo indica
+ADMINISTRATIVO = ["Jeimy Pachon"]
+
+
+def _versiones(entradas):
+    versiones = []
+    for entrada in entradas:
+        version = {"semana_inicial": 0, "administrativo": ADMINISTRATIVO,
+                   **dict(zip(CAMPOS_VERSION, ARCHIVOS_ROSTER)), **entrada}
+        version["desde"] = date.fromisoformat(entrada["desde"])
+        versiones.append(version)
+    versiones.sort(key=lambda v: v["desde"])
+    return [v["desde"] for v in versiones], versiones
+
+
+def cargar_versiones_roster():
+    return cargar_json(ARCHIVO_VERSIONES, _versiones)[1]
+
+
+def version_roster(fecha):
+    # Versión vigente en `fecha` (búsqueda binaria por fecha efectiva); antes de
+    # la primera se usa la primera
+    fechas, versiones = cargar_json(ARCHIVO_VERSIONES, _versiones)
+    return versiones[max(bisect_right(fechas, fecha) - 1, 0)]
+
+
+def _mtime(nombre):
+    cargar_json(nombre)
+    return _caches.get()[(ruta(nombre), None)][0]
+
+
+def version():
+    # mtimes de las versiones del roster y de todos sus archivos, revisados con
+    # el mismo intervalo que cargar_json
+    archivos = sorted({v[c] for v in cargar_versiones_roster() for c in CAMPOS_VERSION})
+    return (_mtime(ARCHIVO_VERSIONES),) + tuple(_mtime(nombre) for nombre in archivos)
+
+
+def version_semana(fecha):
+    # Como version(), pero solo de la versión vigente en `fecha`: agregar una
+    # versión nueva no invalida las semanas anteriores a ella
+    v = version_roster(fecha)
+    return ((v["desde"], v["semana_inicial"], tuple(v["administrativo"]))
+            + tuple((v[c], _mtime(v[c])) for c in CAMPOS_VERSION))
+
+
+def cargar_parejas():
+    return cargar_json("parejas.json")
+
+
+def cargar_cuadrillas():
+    return cargar_json("cuadrillas.json")
+
+
+def cargar_supervisores():
+    return cargar_json("supervisores.json")
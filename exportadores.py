@@ -0,0 +1,248 @@
+"""Exportación en streaming a iCalendar (.ics), CSV y Excel (.xlsx).
+
+Cada exportador recibe un iterable de semanas como las de semanas_exportacion
+(turnos como modelos o como dicts) y escribe fila por fila: un export de
+varios años usa la misma memoria que el de una semana.
+
+El .xlsx se escribe directamente como zip + XML, sin dependencias.
+"""
+import csv
+import re
+import zipfile
+from datetime import datetime, time, timedelta, timezone
+
+from calendario import lunes_festivo_en_semana
+from modelo import CATALOGO, como_turnos, como_turnos_ehs
+
+COLUMNAS = ["semana", "fecha_inicio", "fecha_fin", "tipo", "cuadrilla", "vehiculo", "horario", "personas"]
+
+ZONA_HORARIA = "America/Bogota"
+_VTIMEZONE = [
+    # Colombia: UTC-5 todo el año, sin horario de verano
+    "BEGIN:VTIMEZONE",
+    f"TZID:{ZONA_HORARIA}",
+    "BEGIN:STANDARD",
+    "DTSTART:19700101T000000",
+    "TZOFFSETFROM:-0500",
+    "TZOFFSETTO:-0500",
+    "TZNAME:-05",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+]
+
+
+def _lunes(fecha):
+    return fecha - timedelta(days=fecha.weekday())
+
+
+def turnos_semana(semana_info):
+    """(tipo, cuadrilla, vehiculo, horario, personas) de una semana, con los
+    horarios como se muestran en el PDF (corregidos si la semana empieza en martes)."""
+    inicia_en_martes = semana_info["fecha_inicio"].weekday() == 1
+    corregir = inicia_en_martes and not semana_info.get("normalizado", False)
+    for turno in como_turnos(semana_info["turnos"]):
+        nombre, vehiculo = CATALOGO.cuadrillas[turno.cuadrilla]
+        horario = turno.horario.desde_martes() if corregir else turno.horario
+        yield "tecnicos", nombre, vehiculo, horario, CATALOGO.nombres(turno.personas)
+    for turno in como_turnos_ehs(semana_info["supervisores_ehs"]):
+        horario = turno.horario.desde_martes() if inicia_en_martes else turno.horario
+        yield "ehs", "Supervisión SST", "", horario, CATALOGO.nombres(turno.personas)
+
+
+def filas(semanas, personas=None):
+    # Filas de COLUMNAS; con `personas` solo los turnos de alguna de ellas
+    for semana_info in semanas:
+        base = [semana_info["semana"], semana_info["fecha_inicio"].isoformat(), semana_info["fecha_fin"].isoformat()]
+        for tipo, nombre, vehiculo, horario, nombres in turnos_semana(semana_info):
+            if personas and not any(p in personas for p in nombres):
+                continue
+            yield base + [tipo, nombre if tipo == "tecnicos" else "", vehiculo, horario.texto(), "; ".join(nombres)]
+
+
+# ---------- CSV ----------
+
+def exportar_csv(semanas, destino, personas=None):
+    """destino: archivo de texto abierto con newline=""."""
+    escritor = csv.writer(destino)
+    escritor.writerow(COLUMNAS)
+    n = 0
+    for fila in filas(semanas, personas):
+        escritor.writerow(fila)
+        n += 1
+    return n
+
+
+# ---------- iCalendar ----------
+
+def dias_turno(horario, semana_info):
+    """Días de la semana en que se trabaja `horario`.
+
+    La semana va de fecha_inicio (martes si el lunes fue festivo) al domingo;
+    el turno de lunes festivo cae en el lunes festivo siguiente.
+    """
+    if horario.inicio < 0:
+        return []  # Administrativo o texto libre: sin hora
+    lunes = _lunes(semana_info["fecha_inicio"])
+    if horario.festivo:
+        festivo = lunes_festivo_en_semana(lunes)
+        return [festivo] if festivo and festivo != lunes else []
+    dia = semana_info["fecha_inicio"]
+    dias = []
+    while dia <= lunes + timedelta(days=6):
+        if horario.dias & (1 << dia.weekday()):
+            dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+def _tramos(dias):
+    # Días consecutivos → (primer día, cantidad)
+    tramos = []
+    for dia in dias:
+        if tramos and tramos[-1][0] + timedelta(days=tramos[-1][1]) == dia:
+            tramos[-1][1] += 1
+        else:
+            tramos.append([dia, 1])
+    return tramos
+
+
+def _texto_ics(texto):
+    return texto.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _plegar(linea):
+    # RFC 5545: líneas de máximo 75 octetos, continuadas con CRLF + espacio
+    if len(linea.encode("utf-8")) <= 75:
+        return linea + "\r\n"
+    partes, actual, tamano = [], [], 0
+    for caracter in linea:
+        n = len(caracter.encode("utf-8"))
+        if tamano + n > (75 if not partes else 74):
+            partes.append("".join(actual))
+            actual, tamano = [], 0
+        actual.append(caracter)
+        tamano += n
+    partes.append("".join(actual))
+    return "\r\n ".join(partes) + "\r\n"
+
+
+def _uid(*partes):
+    return re.sub(r"[^A-Za-z0-9]+", "-", "-".join(partes)).strip("-").lower() + "@horas"
+
+
+def exportar_ics(semanas, destino, personas=None, nombre="Rotación de turnos"):
+    """Un VEVENT por turno y por persona (con RRULE para los días seguidos).
+
+    destino: archivo de texto abierto con newline="". Los UID son estables,
+    así que importar de nuevo un rango actualiza los eventos en lugar de duplicarlos.
+    """
+    def escribir(linea):
+        destino.write(_plegar(linea))
+
+    sello = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    for linea in ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Horas//Rotacion de turnos//ES",
+                  "CALSCALE:GREGORIAN", f"X-WR-CALNAME:{_texto_ics(nombre)}", f"X-WR-TIMEZONE:{ZONA_HORARIA}",
+                  *_VTIMEZONE]:
+        escribir(linea)
+
+    eventos = 0
+    for semana_info in semanas:
+        for tipo, titulo, vehiculo, horario, nombres in turnos_semana(semana_info):
+            resumen = f"{titulo} ({vehiculo})" if vehiculo else titulo
+            for primer_dia, cantidad in _tramos(dias_turno(horario, semana_info)):
+                inicio = datetime.combine(primer_dia, time(horario.inicio // 60, horario.inicio % 60))
+                fin = inicio + timedelta(minutes=horario.duracion)
+                for persona in nombres:
+                    if personas and persona not in personas:
+                        continue
+                    escribir("BEGIN:VEVENT")
+                    escribir(f"UID:{_uid(inicio.strftime('%Y%m%dT%H%M'), tipo, titulo, persona)}")
+                    escribir(f"DTSTAMP:{sello}")
+                    escribir(f"DTSTART;TZID={ZONA_HORARIA}:{inicio:%Y%m%dT%H%M%S}")
+                    escribir(f"DTEND;TZID={ZONA_HORARIA}:{fin:%Y%m%dT%H%M%S}")
+                    if cantidad > 1:
+                        escribir(f"RRULE:FREQ=DAILY;COUNT={cantidad}")
+                    escribir(f"SUMMARY:{_texto_ics(f'{resumen} — {persona}')}")
+                    escribir("DESCRIPTION:" + _texto_ics(
+                        f"Semana {semana_info['semana']}\nHorario: {horario.texto()}\nPersonal: {', '.join(nombres)}"
+                    ))
+                    escribir("END:VEVENT")
+                    eventos += 1
+    escribir("END:VCALENDAR")
+    return eventos
+
+
+# ---------- Excel ----------
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Turnos" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_ANCHOS = [8, 12, 12, 10, 28, 10, 26, 48]
+
+
+def _escapar(texto):
+    # xml.sax.saxutils.escape importa urllib (~20 ms); esto basta para texto de celdas
+    return texto.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _celda(valor):
+    if isinstance(valor, (int, float)):
+        return f"<c><v>{valor}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{_escapar(str(valor))}</t></is></c>'
+
+
+def exportar_xlsx(semanas, destino, personas=None):
+    """destino: ruta o archivo binario. La hoja se comprime mientras se escribe."""
+    n = 0
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as libro:
+        libro.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        libro.writestr("_rels/.rels", _RELS)
+        libro.writestr("xl/workbook.xml", _WORKBOOK)
+        libro.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        with libro.open("xl/worksheets/sheet1.xml", "w") as hoja:
+            columnas = "".join(
+                f'<col min="{i}" max="{i}" width="{ancho}" customWidth="1"/>' for i, ancho in enumerate(_ANCHOS, 1)
+            )
+            hoja.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/>'
+                f'</sheetView></sheetViews><cols>{columnas}</cols><sheetData>'
+                f'<row>{"".join(_celda(c) for c in COLUMNAS)}</row>'
+            ).encode("utf-8"))
+            for fila in filas(semanas, personas):
+                hoja.write(f'<row>{"".join(_celda(c) for c in fila)}</row>'.encode("utf-8"))
+                n += 1
+            hoja.write(b"</sheetData></worksheet>")
+    return n
@@ -0,0 +1,296 @@
+"""Línea de comandos para trabajos desatendidos (sin Streamlit).
+
+    python -m horas export --desde 2026-01-01 --hasta 2026-03-31 --formato pdf,json,csv
+    python -m horas export --desde 2026-01-01 --semanas 52 --formato ics,xlsx --persona "Oscar Roa"
+    python -m horas export --desde 2026-01-01 --semanas 9 --por-semana --procesos 4
+    python -m horas precalcular --desde 2026-01-01 --hasta 2026-12-31
+    python -m horas validar --desde 2026-01-01 --semanas 520 --tipos persona,descanso
+    python -m horas optimizar --desde 2026-01-05 --semanas 52 --ausencia "Oscar Roa:2026-03-09:2026-03-15" --guardar
+    python -m horas --sede bogota export --desde 2026-01-01 --semanas 4 --formato csv
+    python -m horas sedes --desde 2026-03-02 --salida salida/sedes --objetivo-ms 2000
+
+ReportLab solo se importa si se pide formato pdf.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import datos
+import exportadores
+from rotacion import normalizar_a_lunes, obtener_semana, resolver_semana, semanas_exportacion
+from modelo import semana_en_dicts
+
+FORMATOS = ("pdf", "json", "csv", "ics", "xlsx")
+
+
+def _fecha(texto):
+    try:
+        return date.fromisoformat(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha inválida (se espera AAAA-MM-DD): {texto}")
+
+
+def _positivo(texto):
+    # Entero >= 1 (--semanas, --procesos)
+    try:
+        valor = int(texto)
+    except ValueError:
+        valor = 0
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"se espera un entero mayor que 0: {texto}")
+    return valor
+
+
+def _formatos(texto):
+    formatos = [f.strip().lower() for f in texto.split(",") if f.strip()]
+    desconocidos = [f for f in formatos if f not in FORMATOS]
+    if desconocidos or not formatos:
+        raise argparse.ArgumentTypeError(f"formatos válidos: {', '.join(FORMATOS)}")
+    return formatos
+
+
+def _ausencia(texto):
+    # "Nombre:AAAA-MM-DD[:AAAA-MM-DD]"
+    partes = texto.split(":")
+    try:
+        desde = date.fromisoformat(partes[1])
+        hasta = date.fromisoformat(partes[2]) if len(partes) > 2 else desde
+    except (IndexError, ValueError):
+        raise argparse.ArgumentTypeError(f"ausencia inválida (se espera Nombre:AAAA-MM-DD[:AAAA-MM-DD]): {texto}")
+    return partes[0].strip(), desde, hasta
+
+
+def _sede(texto):
+    if texto not in datos.sedes():
+        raise argparse.ArgumentTypeError(f"sede desconocida: {texto} (sedes: {', '.join(datos.sedes()) or 'ninguna'})")
+    return texto
+
+
+def rango_semanas(desde, hasta=None, semanas=None):
+    # Lunes de la primera semana y número de semanas (ambos extremos incluidos)
+    lunes = normalizar_a_lunes(desde)
+    if semanas is None:
+        semanas = (normalizar_a_lunes(hasta or desde) - lunes).days // 7 + 1
+    return lunes, max(semanas, 0)
+
+
+def _json_semanas(semanas, destino):
+    # Una semana a la vez: la lista completa nunca está en memoria
+    destino.write("[")
+    for i, semana_info in enumerate(semanas):
+        destino.write(",\n" if i else "\n")
+        destino.write(json.dumps(semana_en_dicts(semana_info), indent=2, ensure_ascii=False,
+                                 default=lambda d: d.isoformat()))
+    destino.write("\n]\n")
+
+
+def exportar(semanas, formatos, ruta_base, procesos=1, personas=None):
+    """Escribe las semanas en un archivo por formato: <ruta_base>.<formato>.
+
+    semanas() devuelve un iterable nuevo en cada llamada, así cada formato
+    recorre las semanas en streaming.
+    """
+    rutas = []
+    for formato in formatos:
+        ruta = f"{ruta_base}.{formato}"
+        if formato == "pdf":
+            from pdf_generator import generar_pdf_multiple
+            generar_pdf_multiple(semanas(), ruta=ruta, procesos=procesos)
+        elif formato == "xlsx":
+            exportadores.exportar_xlsx(semanas(), ruta, personas)
+        else:
+            with open(ruta, "w", encoding="utf-8", newline="") as f:
+                if formato == "json":
+                    _json_semanas(semanas(), f)
+                elif formato == "csv":
+                    exportadores.exportar_csv(semanas(), f, personas)
+                else:
+                    exportadores.exportar_ics(semanas(), f, personas)
+        rutas.append(ruta)
+    return rutas
+
+
+def _exportar_semana(args):
+    # Trabajo de un proceso: una semana, todos los formatos
+    semana, formatos, directorio, personas = args
+    nombre = f"turnos_semana_{semana['semana']}_{semana['fecha_inicio'].isoformat()}"
+    return exportar(lambda: [semana], formatos, os.path.join(directorio, nombre), personas=personas)
+
+
+def comando_export(args):
+    lunes, n = rango_semanas(args.desde, args.hasta, args.semanas)
+    os.makedirs(args.salida, exist_ok=True)
+    inicio = time.perf_counter()
+
+    if args.por_semana:
+        # Los ids del catálogo son propios de cada proceso: a los workers van dicts
+        trabajos = [(semana_en_dicts(s), args.formatos, args.salida, args.personas)
+                    for s in semanas_exportacion(lunes, n)]
+        if args.procesos == 1:
+            rutas = [r for t in trabajos for r in _exportar_semana(t)]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+                rutas = [r for rs in pool.map(_exportar_semana, trabajos) for r in rs]
+    else:
+        fin = lunes + timedelta(weeks=n - 1)
+        nombre = f"programacion_{lunes.isoformat()}_{fin.isoformat()}"
+        rutas = exportar(lambda: semanas_exportacion(lunes, n), args.formatos,
+                         os.path.join(args.salida, nombre), args.procesos, args.personas)
+
+    for ruta in rutas if args.verbose or len(rutas) <= 10 else rutas[:3] + ["..."] + rutas[-3:]:
+        print(ruta)
+    print(f"{n} semanas, {len(rutas)} archivos en {time.perf_counter() - inicio:.2f} s", file=sys.stderr)
+    return 0
+
+
+def comando_precalcular(args):
+    # Resuelve cada semana como lo hace la app; en modo persistido queda guardada
+    lunes, n = rango_semanas(args.desde, args.hasta, args.semanas)
+    inicio = time.perf_counter()
+    for i in range(n):
+        dia = lunes + timedelta(weeks=i, days=1)  # martes: cae en la semana aunque el lunes sea festivo
+        obtener_semana(resolver_semana(dia)["clave_rotacion"])
+    print(f"{n} semanas precalculadas en {time.perf_counter() - inicio:.2f} s", file=sys.stderr)
+    return 0
+
+
+def comando_validar(args):
+    # Sale con 1 si hay conflictos de los tipos pedidos (útil en trabajos nocturnos)
+    import conflictos
+
+    lunes, n = rango_semanas(args.desde, args.hasta, args.semanas)
+    inicio = time.perf_counter()
+    encontrados = [
+        c for c in conflictos.validar(semanas_exportacion(lunes, n), timedelta(hours=args.descanso_horas))
+        if c.tipo in args.tipos
+    ]
+    for c in encontrados[:args.limite] if args.limite else encontrados:
+        print(f"[{c.tipo}] semana {c.b.semana}: {c.texto()}")
+    conteo = ", ".join(f"{tipo}={k}" for tipo, k in sorted(conflictos.resumen(encontrados).items())) or "ninguno"
+    print(f"{n} semanas validadas en {time.perf_counter() - inicio:.2f} s; conflictos: {conteo}", file=sys.stderr)
+    return 1 if encontrados else 0
+
+
+def comando_optimizar(args):
+    # Sale con 1 si quedan restricciones duras sin resolver (p. ej. una ausencia sin reemplazo)
+    import optimizador
+
+    lunes, n = rango_semanas(args.desde, args.hasta, args.semanas)
+    inicio = time.perf_counter()
+    plan = optimizador.crear_plan(lunes, n, optimizador.cargar_ausencias() + (args.ausencias or []),
+                                  "regla" if args.desde_regla else "actual", timedelta(hours=args.descanso_horas))
+    antes = plan.duras
+    plan.optimizar(plan.ventana_conflictos() if args.solo_conflictos else None, args.iteraciones, args.semilla)
+    cambiadas = plan.semanas_cambiadas()
+    print(f"{n} semanas optimizadas en {time.perf_counter() - inicio:.2f} s", file=sys.stderr)
+    print(f"restricciones duras: {antes} → {plan.duras}")
+    print(f"casillas cambiadas: {plan.cambios} en {len(cambiadas)} semanas")
+    for titulo, problema in (("técnicos", plan.problema_tecnicos), ("SST", plan.problema_ehs)):
+        print(f"{titulo}: " + ", ".join(f"{c} {a}-{b}" for c, (a, b) in problema.resumen().items()))
+    pendientes = plan.semanas_con_conflictos()
+    if pendientes:
+        print("sin resolver: " + ", ".join(plan.clave(w).isoformat() for w in pendientes))
+    if args.guardar:
+        claves = optimizador.guardar_plan(plan)
+        print(f"{len(claves)} semanas guardadas", file=sys.stderr)
+    return 1 if pendientes else 0
+
+
+def comando_sedes(args):
+    # Sale con 1 si alguna sede falla o si el total supera --objetivo-ms
+    import sedes
+
+    objetivo_ms = args.objetivo_ms or sedes.OBJETIVO_MS
+    inicio = time.perf_counter()
+    resultados = sedes.generar_semana(args.desde, args.sedes, args.procesos, args.salida)
+    total_ms = (time.perf_counter() - inicio) * 1000
+    errores = [r for r in resultados if r.error]
+    for r in resultados if args.verbose else errores:
+        print(f"{r.sede}: " + (r.error or f"semana {r.semana}, {r.turnos} turnos, {r.ms:.1f} ms"
+                               + (f" → {r.archivo}" if r.archivo else "")))
+    lenta = max(resultados, key=lambda r: r.ms, default=None)
+    print(f"{len(resultados)} sedes en {total_ms:.0f} ms (objetivo {objetivo_ms:.0f} ms)"
+          + (f"; la más lenta: {lenta.sede} {lenta.ms:.1f} ms" if lenta else ""), file=sys.stderr)
+    return 1 if errores or total_ms > objetivo_ms else 0
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="horas", description="Rotación de técnicos sin interfaz")
+    parser.add_argument("--sede", type=_sede, help="trabajar con los datos de data/sedes/<sede> (por defecto data/)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def rango(p):
+        p.add_argument("--desde", type=_fecha, default=date.today(), help="fecha dentro de la primera semana")
+        grupo = p.add_mutually_exclusive_group()
+        grupo.add_argument("--hasta", type=_fecha, help="fecha dentro de la última semana")
+        grupo.add_argument("--semanas", type=_positivo, help="número de semanas desde --desde")
+
+    export = sub.add_parser("export", help="exportar semanas a pdf/json/csv")
+    rango(export)
+    export.add_argument("--formato", dest="formatos", type=_formatos, default=["pdf"],
+                        help=f"lista separada por comas: {','.join(FORMATOS)} (por defecto pdf)")
+    export.add_argument("--persona", dest="personas", action="append",
+                        help="solo los turnos de esta persona en ics/csv/xlsx (se puede repetir)")
+    export.add_argument("--salida", default="salida", help="directorio de salida (por defecto ./salida)")
+    export.add_argument("--por-semana", action="store_true", help="un archivo por semana y formato")
+    export.add_argument("--procesos", type=_positivo, default=1,
+                        help="procesos en paralelo (por semana, o por bloques en el pdf combinado)")
+    export.add_argument("-v", "--verbose", action="store_true", help="listar todos los archivos escritos")
+    export.set_defaults(funcion=comando_export)
+
+    precalcular = sub.add_parser("precalcular", help="generar y guardar las semanas del rango")
+    rango(precalcular)
+    precalcular.set_defaults(funcion=comando_precalcular)
+
+    validar = sub.add_parser("validar", help="buscar cruces de vehículos/personas y descansos cortos")
+    rango(validar)
+    validar.add_argument("--tipos", type=lambda t: t.split(","), default=["vehiculo", "persona", "descanso"],
+                         help="tipos a reportar: vehiculo,persona,descanso (por defecto todos)")
+    validar.add_argument("--descanso-horas", type=float, default=10, help="descanso mínimo entre turnos (horas)")
+    validar.add_argument("--limite", type=int, default=50, help="máximo de conflictos a listar (0 = todos)")
+    validar.set_defaults(funcion=comando_validar)
+
+    optimizar = sub.add_parser("optimizar", help="repartir turnos con descansos, ausencias y equidad")
+    rango(optimizar)
+    optimizar.add_argument("--ausencia", dest="ausencias", type=_ausencia, action="append",
+                           help="Nombre:AAAA-MM-DD[:AAAA-MM-DD], además de data/ausencias.json (se puede repetir)")
+    optimizar.add_argument("--desde-regla", action="store_true",
+                           help="partir de la rotación fija en lugar de lo guardado")
+    optimizar.add_argument("--solo-conflictos", action="store_true",
+                           help="mover solo las semanas con restricciones violadas y sus vecinas")
+    optimizar.add_argument("--descanso-horas", type=float, default=10, help="descanso mínimo entre turnos (horas)")
+    optimizar.add_argument("--iteraciones", type=int, help="movimientos a probar (por defecto 200 por semana)")
+    optimizar.add_argument("--semilla", type=int, default=0)
+    optimizar.add_argument("--guardar", action="store_true",
+                           help="guardar las semanas cambiadas (ajustes en modo derivado)")
+    optimizar.set_defaults(funcion=comando_optimizar)
+
+    sedes = sub.add_parser("sedes", help="generar la semana de --desde en todas las sedes en paralelo")
+    sedes.add_argument("--desde", type=_fecha, default=date.today(), help="fecha dentro de la semana")
+    sedes.add_argument("--sede", dest="sedes", type=_sede, action="append",
+                       help="solo esta sede (se puede repetir; por defecto todas las de data/sedes/)")
+    sedes.add_argument("--procesos", type=_positivo, help="procesos en paralelo (por defecto todos los núcleos)")
+    sedes.add_argument("--salida", help="escribir además el PDF de cada sede en <salida>/<sede>/")
+    sedes.add_argument("--objetivo-ms", type=float, default=None, help="latencia máxima del total (por defecto 2000 ms)")
+    sedes.add_argument("-v", "--verbose", action="store_true", help="listar todas las sedes")
+    sedes.set_defaults(funcion=comando_sedes)
+    return parser
+
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "hasta", None) and args.hasta < args.desde:
+        parser.error(f"--hasta ({args.hasta}) es anterior a --desde ({args.desde})")
+    if args.sede:
+        datos.usar_sede(args.sede)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
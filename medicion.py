@@ -0,0 +1,163 @@
+"""Medición ligera de los caminos calientes: tramos con tiempo y contadores.
+
+Las mediciones van al registro del hilo actual (uno por rerun de Streamlit,
+ver iniciar/terminar); sin registro o con la medición apagada cada punto
+medido cuesta solo la comprobación de activa().
+
+Convención de contadores: "<cache>.consultas" y "<cache>.fallos" para las
+cachés, "bytes.leidos" y "bytes.escritos" para E/S.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# HORAS_MEDICION=1 la activa desde el inicio en todo el proceso; también con activar()
+ACTIVO = os.environ.get("HORAS_MEDICION") == "1"
+# Encendida o apagada solo en el contexto actual (p. ej. la sesión de Streamlit
+# que corre el rerun); None sigue a ACTIVO
+_activa = contextvars.ContextVar("medicion_activa", default=None)
+# Si se define, cada registro terminado se agrega como una línea JSON
+ARCHIVO = os.environ.get("HORAS_MEDICION_ARCHIVO")
+
+_local = threading.local()
+_lock_archivo = threading.Lock()
+_NULO = nullcontext()
+
+
+class Registro:
+    def __init__(self, etiqueta=""):
+        self.etiqueta = etiqueta
+        self.inicio = time.time()
+        self.duracion = None
+        self.tramos = {}       # nombre → [llamadas, segundos totales, segundos propios]
+        self.contadores = {}
+        self._pila = []        # tiempo de los tramos hijos del tramo abierto
+
+    def contar(self, nombre, n=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    def aciertos(self):
+        # {cache: (consultas, fallos)} a partir de los contadores
+        tasas = {}
+        for nombre, consultas in self.contadores.items():
+            if nombre.endswith(".consultas"):
+                cache = nombre[:-len(".consultas")]
+                tasas[cache] = (consultas, self.contadores.get(cache + ".fallos", 0))
+        return tasas
+
+    def a_dict(self):
+        return {
+            "etiqueta": self.etiqueta,
+            "inicio": self.inicio,
+            "duracion_ms": None if self.duracion is None else round(self.duracion * 1000, 3),
+            "tramos": {
+                nombre: {"llamadas": n, "total_ms": round(total * 1000, 3), "propio_ms": round(propio * 1000, 3)}
+                for nombre, (n, total, propio) in self.tramos.items()
+            },
+            "contadores": dict(self.contadores),
+        }
+
+
+class _Tramo:
+    __slots__ = ("nombre", "registro", "t0")
+
+    def __init__(self, nombre, registro):
+        self.nombre = nombre
+        self.registro = registro
+
+    def __enter__(self):
+        self.registro._pila.append(0.0)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        total = time.perf_counter() - self.t0
+        pila = self.registro._pila
+        hijos = pila.pop()
+        if pila:
+            pila[-1] += total
+        entrada = self.registro.tramos.get(self.nombre)
+        if entrada is None:
+            entrada = self.registro.tramos[self.nombre] = [0, 0.0, 0.0]
+        entrada[0] += 1
+        entrada[1] += total
+        entrada[2] += total - hijos
+        return False
+
+
+def activar(valor=True):
+    # Para todo el proceso
+    global ACTIVO
+    ACTIVO = valor
+
+
+def usar(valor):
+    # Solo hasta el final del contexto actual, sin tocar a las demás sesiones
+    _activa.set(valor)
+
+
+def activa():
+    valor = _activa.get()
+    return ACTIVO if valor is None else valor
+
+
+def actual():
+    return getattr(_local, "registro", None)
+
+
+def iniciar(etiqueta=""):
+    registro = _local.registro = Registro(etiqueta)
+    return registro
+
+
+def terminar():
+    # Cierra el registro del hilo y, si hay ARCHIVO, lo exporta
+    registro = actual()
+    _local.registro = None
+    if registro is None:
+        return None
+    registro.duracion = time.time() - registro.inicio
+    if ARCHIVO:
+        exportar(registro, ARCHIVO)
+    return registro
+
+
+def exportar(registro, ruta):
+    linea = json.dumps(registro.a_dict(), ensure_ascii=False)
+    with _lock_archivo, open(ruta, "a", encoding="utf-8") as f:
+        f.write(linea + "\n")
+
+
+def tramo(nombre):
+    if not activa():
+        return _NULO
+    registro = actual()
+    if registro is None:
+        return _NULO
+    return _Tramo(nombre, registro)
+
+
+def medido(nombre=None):
+    """Decorador: mide cada llamada como un tramo (por defecto "modulo.funcion")."""
+    def decorar(funcion):
+        etiqueta = nombre or f"{funcion.__module__}.{funcion.__qualname__}"
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not activa():
+                return funcion(*args, **kwargs)
+            with tramo(etiqueta):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorar
+
+
+def contar(nombre, n=1):
+    if activa():
+        registro = actual()
+        if registro is not None:
+            registro.contar(nombre, n)
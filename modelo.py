@@ -0,0 +1,251 @@
+"""Modelo compacto de la programación: horarios con minutos y máscara de días,
+cuadrillas y personas como enteros. Los textos ("06:00 - 14:00 Lun-Sab") solo
+se leen al entrar y se generan al salir (JSON, PDF, pantalla).
+"""
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+DIAS = ["Lun", "Mar", "Mie", "Jue", "Vie", "Sab", "Dom"]
+_INDICE_DIA = {d: i for i, d in enumerate(DIAS)}
+
+LUN, MAR, MIE, JUE, VIE, SAB, DOM = (1 << i for i in range(7))
+LUN_SAB = LUN | MAR | MIE | JUE | VIE | SAB
+DOM_VIE = DOM | LUN | MAR | MIE | JUE | VIE
+
+# Formato del texto original
+FORMATO_TECNICO = 0   # "06:00 - 14:00 Lun-Sab"
+FORMATO_EHS = 1       # "Lun - Sab 06:00 - 14:00"
+
+_HORAS = r"(\d{2}):(\d{2}) - (\d{2}):(\d{2})"
+_RE_TECNICO = re.compile(rf"^{_HORAS} (\w{{3}})-(\w{{3}})$")
+_RE_EHS = re.compile(rf"^(\w{{3}}) - (\w{{3}}) {_HORAS}$")
+_RE_DOMINGO_TECNICO = re.compile(rf"^{_HORAS} Domingo$")
+_RE_DOMINGO_EHS = re.compile(rf"^Domingo {_HORAS}$")
+_RE_FESTIVO = re.compile(rf"^Lunes Festivo {_HORAS}$")
+
+
+def _rango_dias(primero, ultimo):
+    mascara = 0
+    i = primero
+    while True:
+        mascara |= 1 << i
+        if i == ultimo:
+            return mascara
+        i = (i + 1) % 7
+
+
+def _minutos(h, m):
+    return int(h) * 60 + int(m)
+
+
+def _hhmm(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+@dataclass(frozen=True, slots=True)
+class Horario:
+    inicio: int = -1        # minutos desde medianoche (-1: sin hora, p. ej. Administrativo)
+    fin: int = -1           # si fin <= inicio el turno termina al día siguiente
+    dias: int = 0           # máscara, bit 0 = lunes ... bit 6 = domingo
+    primer_dia: int = 0     # día con el que empieza el rango (Dom-Vie empieza en domingo)
+    formato: int = FORMATO_TECNICO
+    festivo: bool = False   # turno de lunes festivo
+    administrativo: bool = False
+    libre: str = ""         # texto que no sigue ningún formato conocido, se conserva tal cual
+
+    @property
+    def nocturno(self):
+        return self.inicio >= 0 and self.fin <= self.inicio
+
+    @property
+    def duracion(self):
+        if self.inicio < 0:
+            return 0
+        return (self.fin - self.inicio) % (24 * 60) or 24 * 60
+
+    def desde_martes(self):
+        # Equivalente a corregir_horario(..., True): Lun-Sab → Mar-Sab, Dom-Vie → Lun-Vie
+        if self.dias in (LUN_SAB, DOM_VIE) and not (self.festivo or self.administrativo or self.libre):
+            primero = 1 << self.primer_dia
+            return _crear(self.inicio, self.fin, self.dias & ~primero, (self.primer_dia + 1) % 7,
+                          self.formato, False, False)
+        return self
+
+    def texto(self):
+        return _texto(self)
+
+
+@lru_cache(maxsize=None)
+def _crear(inicio, fin, dias, primer_dia, formato, festivo, administrativo, libre=""):
+    # Instancias compartidas: dos horarios iguales son el mismo objeto
+    return Horario(inicio, fin, dias, primer_dia, formato, festivo, administrativo, libre)
+
+
+@lru_cache(maxsize=None)
+def _texto(h):
+    if h.libre:
+        return h.libre
+    if h.administrativo:
+        return "Administrativo"
+    horas = f"{_hhmm(h.inicio)} - {_hhmm(h.fin)}"
+    if h.festivo:
+        return f"Lunes Festivo {horas}"
+    if h.dias == DOM:
+        return f"{horas} Domingo" if h.formato == FORMATO_TECNICO else f"Domingo {horas}"
+    ultimo = (h.primer_dia + bin(h.dias).count("1") - 1) % 7
+    if h.formato == FORMATO_TECNICO:
+        return f"{horas} {DIAS[h.primer_dia]}-{DIAS[ultimo]}"
+    return f"{DIAS[h.primer_dia]} - {DIAS[ultimo]} {horas}"
+
+
+@lru_cache(maxsize=None)
+def parse_horario(texto):
+    if texto == "Administrativo":
+        return _crear(-1, -1, 0, 0, FORMATO_EHS, False, True)
+    m = _RE_FESTIVO.match(texto)
+    if m:
+        return _crear(_minutos(*m.group(1, 2)), _minutos(*m.group(3, 4)), LUN, 0, FORMATO_TECNICO, True, False)
+    for regex, formato in ((_RE_DOMINGO_TECNICO, FORMATO_TECNICO), (_RE_DOMINGO_EHS, FORMATO_EHS)):
+        m = regex.match(texto)
+        if m:
+            return _crear(_minutos(*m.group(1, 2)), _minutos(*m.group(3, 4)), DOM, 6, formato, False, False)
+    m = _RE_TECNICO.match(texto)
+    if m:
+        h1, m1, h2, m2, d1, d2 = m.groups()
+        formato = FORMATO_TECNICO
+    else:
+        m = _RE_EHS.match(texto)
+        if not m:
+            return _crear(-1, -1, 0, 0, FORMATO_TECNICO, "Lunes Festivo" in texto, False, texto)
+        d1, d2, h1, m1, h2, m2 = m.groups()
+        formato = FORMATO_EHS
+    if d1 not in _INDICE_DIA or d2 not in _INDICE_DIA:
+        return _crear(-1, -1, 0, 0, formato, False, False, texto)
+    primero, ultimo = _INDICE_DIA[d1], _INDICE_DIA[d2]
+    return _crear(_minutos(h1, m1), _minutos(h2, m2), _rango_dias(primero, ultimo), primero,
+                  formato, False, False)
+
+
+class Catalogo:
+    """Nombres de personas y cuadrillas (nombre, vehículo) como enteros."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.personas = []
+        self._id_persona = {}
+        self.cuadrillas = []
+        self._id_cuadrilla = {}
+
+    def persona(self, nombre):
+        i = self._id_persona.get(nombre)
+        if i is None:
+            with self._lock:
+                i = self._id_persona.get(nombre)
+                if i is None:
+                    i = self._id_persona[nombre] = len(self.personas)
+                    self.personas.append(nombre)
+        return i
+
+    def cuadrilla(self, nombre, vehiculo):
+        clave = (nombre, vehiculo)
+        i = self._id_cuadrilla.get(clave)
+        if i is None:
+            with self._lock:
+                i = self._id_cuadrilla.get(clave)
+                if i is None:
+                    i = self._id_cuadrilla[clave] = len(self.cuadrillas)
+                    self.cuadrillas.append(clave)
+        return i
+
+    def grupo(self, nombres):
+        return tuple(self.persona(n) for n in nombres)
+
+    def nombres(self, ids):
+        return [self.personas[i] for i in ids]
+
+
+CATALOGO = Catalogo()
+
+
+@dataclass(frozen=True, slots=True)
+class Turno:
+    """Una fila de técnicos: cuadrilla, horario y pareja asignada."""
+    cuadrilla: int
+    horario: Horario
+    personas: tuple
+
+    def a_dict(self, catalogo=CATALOGO):
+        nombre, vehiculo = catalogo.cuadrillas[self.cuadrilla]
+        return {
+            "cuadrilla": nombre,
+            "vehiculo": vehiculo,
+            "horario": self.horario.texto(),
+            "tecnicos": catalogo.nombres(self.personas)
+        }
+
+    def nombre(self, catalogo=CATALOGO):
+        return catalogo.cuadrillas[self.cuadrilla][0]
+
+    def vehiculo(self, catalogo=CATALOGO):
+        return catalogo.cuadrillas[self.cuadrilla][1]
+
+
+@dataclass(frozen=True, slots=True)
+class TurnoEHS:
+    """Una fila de supervisión SST."""
+    horario: Horario
+    personas: tuple
+
+    def a_dict(self, catalogo=CATALOGO):
+        return {
+            "horario": self.horario.texto(),
+            "supervisor": catalogo.nombres(self.personas)
+        }
+
+
+def turno_desde_dict(asignacion, catalogo=CATALOGO):
+    return Turno(
+        catalogo.cuadrilla(asignacion["cuadrilla"], asignacion["vehiculo"]),
+        parse_horario(asignacion["horario"]),
+        catalogo.grupo(asignacion["tecnicos"])
+    )
+
+
+def ehs_desde_dict(asignacion, catalogo=CATALOGO):
+    return TurnoEHS(parse_horario(asignacion["horario"]), catalogo.grupo(asignacion["supervisor"]))
+
+
+def turnos_desde_dicts(asignaciones, catalogo=CATALOGO):
+    return [turno_desde_dict(a, catalogo) for a in asignaciones]
+
+
+def ehs_desde_dicts(asignaciones, catalogo=CATALOGO):
+    return [ehs_desde_dict(a, catalogo) for a in asignaciones]
+
+
+def turnos_a_dicts(turnos, catalogo=CATALOGO):
+    return [t.a_dict(catalogo) for t in turnos]
+
+
+def ehs_a_dicts(turnos, catalogo=CATALOGO):
+    return [t.a_dict(catalogo) for t in turnos]
+
+
+def como_turnos(turnos):
+    # Acepta modelos o dicts como los guardados en el almacén
+    return [t if isinstance(t, Turno) else turno_desde_dict(t) for t in turnos]
+
+
+def como_turnos_ehs(supervisores_ehs):
+    return [t if isinstance(t, TurnoEHS) else ehs_desde_dict(t) for t in supervisores_ehs]
+
+
+def semana_en_dicts(semana_info):
+    # Semana de semana_exportacion con sus listas como dicts (JSON, otros procesos)
+    return {
+        **semana_info,
+        "turnos": [t.a_dict() if isinstance(t, Turno) else t for t in semana_info["turnos"]],
+        "supervisores_ehs": [t.a_dict() if isinstance(t, TurnoEHS) else t for t in semana_info["supervisores_ehs"]],
+    }
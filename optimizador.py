@@ -0,0 +1,488 @@
+"""Optimizador de la rotación: alternativa a la rotación fija por módulo.
+
+Por cada semana del horizonte decide qué pareja hace cada cuadrilla, qué
+supervisor hace cada turno SST y quién hace el Domingo y el Lunes Festivo
+(en la regla fija, siempre el de Correctivos 2 / el del primer turno SST).
+
+Restricciones duras (PESO_DURO cada una):
+    - nadie con dos turnos a la vez ni con menos del descanso mínimo entre turnos
+    - nadie asignado en un día de ausencia (data/ausencias.json o parámetro)
+Objetivos blandos: repartir domingos, festivos y semanas de noche (suma de
+cuadrados por persona) y cambiar lo menos posible el plan de referencia.
+
+Búsqueda local (recocido simulado) con evaluación delta: cada movimiento
+cambia una semana y solo se recalcula el costo de las personas afectadas en
+esa semana y sus vecinas. El costo es ITERACIONES_POR_SEMANA movimientos por
+semana que se mueve: replanificar un año tras una ausencia (solo_conflictos,
+partiendo de un plan sin conflictos) toma entre 0,25 y 0,6 s; optimizar el
+año completo, varios segundos.
+"""
+import math
+import os
+import random
+from datetime import date, timedelta
+
+import datos
+import rotacion
+from conflictos import DESCANSO_MINIMO
+from exportadores import dias_turno
+from modelo import CATALOGO, Turno, TurnoEHS, ehs_a_dicts, parse_horario, turnos_a_dicts
+from rango import generar_rango, indice_correctivo_2
+from rotacion import (
+    EHS_ADMINISTRATIVO,
+    EHS_DOMINGO,
+    EHS_TURNO_1,
+    EHS_TURNO_2,
+    EHS_TURNO_3,
+    HORARIO_FESTIVO,
+)
+
+ARCHIVO_AUSENCIAS = "ausencias.json"  # [{"persona": ..., "desde": "AAAA-MM-DD", "hasta": "AAAA-MM-DD"}]
+
+PESO_DURO = 1000
+PESO_DOMINGO = 4
+PESO_FESTIVO = 4
+PESO_NOCHE = 2
+PESO_CAMBIO = 5
+
+ITERACIONES_POR_SEMANA = 200
+LARGO_MEDIO = 3             # semanas seguidas de un intercambio (distribución exponencial)
+LARGO_MAXIMO = 12
+PROBABILIDAD_EXTRA = 0.3    # de mover un Domingo/Festivo en lugar de intercambiar
+TEMPERATURA_INICIAL = 40.0
+TEMPERATURA_FINAL = 0.5
+
+# Tipos de casilla
+ROTATIVO = 0
+DOMINGO = 1
+FESTIVO = 2
+
+CATEGORIAS = ("domingos", "festivos", "noches")
+_PESOS = (PESO_DOMINGO, PESO_FESTIVO, PESO_NOCHE)
+
+_MINUTOS_DIA = 24 * 60
+
+
+class Casilla:
+    """Un turno de una semana que se asigna a un recurso (pareja o supervisor)."""
+    __slots__ = ("tipo", "horario", "cuadrilla", "intervalos", "categoria")
+
+    def __init__(self, tipo, horario, cuadrilla, intervalos):
+        self.tipo = tipo
+        self.horario = horario
+        self.cuadrilla = cuadrilla      # solo técnicos
+        self.intervalos = intervalos    # ((inicio, fin), ...) en minutos desde el lunes de la semana 0
+        if tipo == DOMINGO:
+            self.categoria = 0
+        elif tipo == FESTIVO:
+            self.categoria = 1
+        else:
+            self.categoria = 2 if horario.nocturno else None
+
+
+class Problema:
+    """Asignación de recursos a casillas semana por semana, con su costo al día.
+
+    casillas[w]: lista de Casilla; recursos[w]: grupos (tuplas de ids de persona)
+    disponibles; asignacion[w][s]: índice en recursos[w]. Las casillas ROTATIVO
+    de una semana tienen recursos distintos: los movimientos intercambian
+    recursos, así que eso se mantiene.
+    """
+
+    def __init__(self, casillas, recursos, referencia, ausentes, descanso, fijas=()):
+        self.casillas = casillas
+        self.recursos = recursos
+        self.referencia = referencia
+        self.asignacion = [list(fila) for fila in referencia]
+        self.ausentes = ausentes        # id de persona → set de días (desde el lunes de la semana 0)
+        self.descanso = descanso        # minutos
+        self.fijas = set(fijas)         # semanas que no se tocan (ajustes que no encajan en el roster)
+        self._por_persona = [None] * len(casillas)  # caché por semana: persona → intervalos
+        self.conteos = [{} for _ in CATEGORIAS]
+        for w, fila in enumerate(self.asignacion):
+            for s, r in enumerate(fila):
+                self._contar(w, s, r, 1)
+        self.duras = sum(self._duras(p, w, anterior=False) for w, p in self._personas_semana())
+        self.cambios = 0
+        self.blando = sum(peso * sum(c * c for c in conteo.values()) for peso, conteo in zip(_PESOS, self.conteos))
+
+    @property
+    def costo(self):
+        return PESO_DURO * self.duras + self.blando + PESO_CAMBIO * self.cambios
+
+    def _personas_semana(self):
+        for w, grupos in enumerate(self.recursos):
+            for p in {p for grupo in grupos for p in grupo}:
+                yield w, p
+
+    def _contar(self, w, s, r, signo):
+        # Actualiza conteos y devuelve el cambio del costo blando
+        categoria = self.casillas[w][s].categoria
+        if categoria is None:
+            return 0
+        conteo = self.conteos[categoria]
+        delta = 0
+        for p in self.recursos[w][r]:
+            c = conteo.get(p, 0)
+            conteo[p] = c + signo
+            delta += 2 * c * signo + 1
+        return _PESOS[categoria] * delta
+
+    def _asignar(self, w, s, r):
+        anterior = self.asignacion[w][s]
+        delta = self._contar(w, s, anterior, -1) + self._contar(w, s, r, 1)
+        self.asignacion[w][s] = r
+        self._por_persona[w] = None
+        referencia = self.referencia[w][s]
+        self.cambios += (r != referencia) - (anterior != referencia)
+        return delta
+
+    def intervalos(self, p, w):
+        # Turnos de p en la semana w ordenados por inicio. Los inicios crecen de
+        # una semana a la siguiente (el festivo cae antes del martes siguiente),
+        # así que concatenar semanas seguidas mantiene el orden
+        if not 0 <= w < len(self.casillas):
+            return ()
+        por_persona = self._por_persona[w]
+        if por_persona is None:
+            por_persona = self._por_persona[w] = {}
+            grupos = self.recursos[w]
+            for casilla, r in zip(self.casillas[w], self.asignacion[w]):
+                for persona in grupos[r]:
+                    por_persona.setdefault(persona, []).extend(casilla.intervalos)
+            for lista in por_persona.values():
+                lista.sort()
+        return por_persona.get(p, ())
+
+    def _duras(self, p, w, anterior=True):
+        # Pares de turnos de p a menos del descanso mínimo (o cruzados) con al
+        # menos uno en la semana w, contra la misma semana, la siguiente y, si
+        # `anterior`, la anterior; más los turnos en días de ausencia
+        propios = self.intervalos(p, w)
+        if not propios:
+            return 0
+        previos = self.intervalos(p, w - 1) if anterior else ()
+        todos = [*previos, *propios, *self.intervalos(p, w + 1)]
+        desde, hasta = len(previos), len(previos) + len(propios)
+        d = self.descanso
+        n = 0
+        for i in range(hasta):
+            limite = todos[i][1] + d
+            for j in range(max(i + 1, desde), hasta if i < desde else len(todos)):
+                if todos[j][0] >= limite:
+                    break
+                n += 1
+        dias = self.ausentes.get(p)
+        if dias:
+            for a0, a1 in propios:
+                if any(dia in dias for dia in range(a0 // _MINUTOS_DIA, (a1 - 1) // _MINUTOS_DIA + 1)):
+                    n += 1
+        return n
+
+    def _local(self, personas, w):
+        return sum(self._duras(p, w) for p in personas)
+
+    def duras_semana(self, w):
+        return self._local({p for grupo in self.recursos[w] for p in grupo}, w)
+
+    def _mover(self, w, cambios):
+        # Aplica [(casilla, recurso)] y devuelve el cambio de costo
+        grupos = self.recursos[w]
+        fila = self.asignacion[w]
+        personas = set()
+        for s, r in cambios:
+            personas.update(grupos[fila[s]])
+            personas.update(grupos[r])
+        antes = self._local(personas, w)
+        cambios_antes = self.cambios
+        blando = sum(self._asignar(w, s, r) for s, r in cambios)
+        duras = self._local(personas, w) - antes
+        self.duras += duras
+        self.blando += blando
+        return PESO_DURO * duras + blando + PESO_CAMBIO * (self.cambios - cambios_antes)
+
+    def _intercambio(self, w, a, b):
+        # Cambios de la semana w al intercambiar los grupos a y b (b puede estar
+        # libre esa semana); None si alguno no está en el roster de la semana
+        grupos = self.recursos[w]
+        try:
+            ia, ib = grupos.index(a), grupos.index(b)
+        except ValueError:
+            return None
+        return [(s, ib if r == ia else ia) for s, r in enumerate(self.asignacion[w]) if r == ia or r == ib]
+
+    def _movimiento(self, w, permitidas, azar):
+        # [(semana, cambios)]: dos recursos intercambian todo lo suyo durante unas
+        # semanas seguidas (casi siempre pocas), o un Domingo/Festivo pasa a otro recurso
+        grupos = self.recursos[w]
+        if len(grupos) < 2:
+            return []
+        if azar.random() < PROBABILIDAD_EXTRA:
+            fila = self.asignacion[w]
+            s = azar.choice([s for s, c in enumerate(self.casillas[w]) if c.tipo != ROTATIVO])
+            r = azar.randrange(len(grupos))
+            return [] if r == fila[s] else [(w, [(s, r)])]
+        a, b = azar.sample(grupos, 2)
+        movimiento = []
+        for v in range(w, w + min(LARGO_MAXIMO, 1 + int(azar.expovariate(1 / LARGO_MEDIO)))):
+            cambios = self._intercambio(v, a, b) if v in permitidas else None
+            if cambios is None:
+                break
+            if cambios:
+                movimiento.append((v, cambios))
+        return movimiento
+
+    def optimizar(self, semanas=None, iteraciones=None, semilla=0):
+        """Recocido simulado sobre `semanas` (por defecto todas las no fijas).
+        Devuelve el número de movimientos aceptados."""
+        permitidas = set(range(len(self.casillas)) if semanas is None else semanas) - self.fijas
+        semanas = sorted(permitidas)
+        if not semanas:
+            return 0
+        if iteraciones is None:
+            iteraciones = ITERACIONES_POR_SEMANA * len(semanas)
+        azar = random.Random(semilla)
+        enfriamiento = (TEMPERATURA_FINAL / TEMPERATURA_INICIAL) ** (1 / max(iteraciones, 1))
+        temperatura = TEMPERATURA_INICIAL
+        aceptados = 0
+        for _ in range(iteraciones):
+            temperatura *= enfriamiento
+            movimiento = self._movimiento(azar.choice(semanas), permitidas, azar)
+            if not movimiento:
+                continue
+            deshacer = [(v, [(s, self.asignacion[v][s]) for s, _ in cambios]) for v, cambios in movimiento]
+            delta = sum(self._mover(v, cambios) for v, cambios in movimiento)
+            if delta <= 0 or azar.random() < math.exp(-delta / temperatura):
+                aceptados += 1
+            else:
+                for v, cambios in reversed(deshacer):
+                    self._mover(v, cambios)
+        return aceptados
+
+    def resumen(self):
+        # {categoría: (mínimo, máximo)} entre las personas del horizonte
+        personas = {p for grupos in self.recursos for grupo in grupos for p in grupo}
+        return {
+            nombre: (min(conteo.get(p, 0) for p in personas), max(conteo.get(p, 0) for p in personas))
+            for nombre, conteo in zip(CATEGORIAS, self.conteos)
+        }
+
+
+# ---------- ausencias ----------
+
+def cargar_ausencias():
+    # [(nombre, desde, hasta)] del archivo de ausencias, si existe
+    if not os.path.exists(datos.ruta(ARCHIVO_AUSENCIAS)):
+        return []
+    return [
+        (a["persona"], date.fromisoformat(a["desde"]), date.fromisoformat(a.get("hasta", a["desde"])))
+        for a in datos.cargar_json(ARCHIVO_AUSENCIAS)
+    ]
+
+
+def _dias_ausentes(ausencias, lunes0):
+    ausentes = {}
+    for nombre, desde, hasta in ausencias:
+        dias = ausentes.setdefault(CATALOGO.persona(nombre), set())
+        dias.update(range((desde - lunes0).days, (hasta - lunes0).days + 1))
+    return ausentes
+
+
+# ---------- plan ----------
+
+def _intervalos(horario, clave, lunes0):
+    return tuple(
+        ((dia - lunes0).days * _MINUTOS_DIA + horario.inicio,
+         (dia - lunes0).days * _MINUTOS_DIA + horario.inicio + horario.duracion)
+        for dia in dias_turno(horario, {"fecha_inicio": clave})
+    )
+
+
+def _indice(grupos, nombres):
+    try:
+        return grupos.index(CATALOGO.grupo(nombres))
+    except ValueError:
+        return None
+
+
+def _desde_guardado(casillas, grupos, guardado, regla, clave_casilla, clave_guardado, personas):
+    # Asignación de una semana guardada (ajuste o rotación persistida) en índices
+    # de casilla/recurso; None si no encaja en el roster de la semana
+    if guardado is None:
+        return list(regla)
+    por_clave = {clave_casilla(c): s for s, c in enumerate(casillas)}
+    fila = [None] * len(casillas)
+    for turno in guardado:
+        s = por_clave.get(clave_guardado(turno))
+        if s is None:
+            continue
+        fila[s] = _indice(grupos, turno[personas])
+    if None in fila:
+        return None
+    return fila
+
+
+class Plan:
+    """Horizonte optimizado: técnicos y SST como dos Problema sobre las mismas
+    semanas. turnos_modelo/ehs_modelo devuelven lo mismo que generar_*_modelo
+    con las asignaciones del plan."""
+
+    def __init__(self, rango, tecnicos, ehs):
+        self.rango = rango
+        self.problema_tecnicos = tecnicos
+        self.problema_ehs = ehs
+
+    def __len__(self):
+        return len(self.rango)
+
+    def clave(self, i):
+        return self.rango.clave(i)
+
+    def turnos_modelo(self, i):
+        problema = self.problema_tecnicos
+        grupos = problema.recursos[i]
+        asignaciones = [
+            Turno(c.cuadrilla, c.horario, grupos[r]) for c, r in zip(problema.casillas[i], problema.asignacion[i])
+        ]
+        if problema.casillas[i][-1].tipo == FESTIVO:
+            asignaciones.insert(0, asignaciones.pop())
+        return asignaciones
+
+    def ehs_modelo(self, i):
+        problema = self.problema_ehs
+        grupos = problema.recursos[i]
+        asignaciones = [TurnoEHS(c.horario, grupos[r]) for c, r in zip(problema.casillas[i], problema.asignacion[i])]
+        if self.rango.festivo[i]:
+            asignaciones.insert(0, asignaciones.pop())
+        asignaciones.insert(-1, TurnoEHS(EHS_ADMINISTRATIVO, self.rango.rosters[self.rango.versiones[i]][4]))
+        return asignaciones
+
+    def turnos(self, i):
+        return turnos_a_dicts(self.turnos_modelo(i))
+
+    def ehs(self, i):
+        return ehs_a_dicts(self.ehs_modelo(i))
+
+    @property
+    def duras(self):
+        return self.problema_tecnicos.duras + self.problema_ehs.duras
+
+    @property
+    def cambios(self):
+        return self.problema_tecnicos.cambios + self.problema_ehs.cambios
+
+    def semanas_con_conflictos(self):
+        return [w for w in range(len(self)) if self.problema_tecnicos.duras_semana(w) or self.problema_ehs.duras_semana(w)]
+
+    def ventana_conflictos(self):
+        # Semanas con restricciones duras violadas y sus vecinas
+        return sorted({v for w in self.semanas_con_conflictos() for v in (w - 1, w, w + 1) if 0 <= v < len(self)})
+
+    def semanas_cambiadas(self):
+        return [
+            w for w in range(len(self))
+            if self.problema_tecnicos.asignacion[w] != self.problema_tecnicos.referencia[w]
+            or self.problema_ehs.asignacion[w] != self.problema_ehs.referencia[w]
+        ]
+
+    def optimizar(self, semanas=None, iteraciones=None, semilla=0):
+        return (self.problema_tecnicos.optimizar(semanas, iteraciones, semilla)
+                + self.problema_ehs.optimizar(semanas, iteraciones, semilla))
+
+
+def crear_plan(desde, n_semanas, ausencias=None, referencia="actual", descanso=DESCANSO_MINIMO):
+    """Plan de n_semanas desde el lunes de `desde`, todavía sin optimizar.
+
+    referencia="actual" parte de lo que muestra la app (ajustes o semanas
+    guardadas, si no la regla fija); "regla" parte de la rotación por módulo.
+    ausencias: [(nombre, desde, hasta)]; por defecto las de data/ausencias.json.
+    """
+    lunes0 = rotacion.normalizar_a_lunes(desde)
+    r = generar_rango(lunes0, lunes0 + timedelta(weeks=n_semanas - 1))
+    if ausencias is None:
+        ausencias = cargar_ausencias()
+    ausentes = _dias_ausentes(ausencias, lunes0)
+    minutos = int(descanso.total_seconds() // 60)
+
+    tec = ([], [], [], [])    # casillas, recursos, referencia, fijas
+    ehs = ([], [], [], [])
+    for i in range(len(r)):
+        clave = r.clave(i)
+        martes = r.martes[i]
+        roster, cuadrillas, domingo, supervisores, _ = r.rosters[r.versiones[i]]
+
+        casillas = []
+        for cuadrilla, horario in cuadrillas:
+            horario = horario.desde_martes() if martes else horario
+            casillas.append(Casilla(ROTATIVO, horario, cuadrilla, _intervalos(horario, clave, lunes0)))
+        fila = list(r.parejas[i * r.ancho:i * r.ancho + len(cuadrillas)])
+        k = indice_correctivo_2(cuadrillas)
+        if k is not None:
+            # regla: Domingo y Festivo para Correctivos 2 (sin esa cuadrilla no hay)
+            if domingo:
+                cuadrilla, horario = domingo
+                casillas.append(Casilla(DOMINGO, horario, cuadrilla, _intervalos(horario, clave, lunes0)))
+                fila.append(fila[k])
+            if r.festivo[i]:
+                vehiculo = CATALOGO.cuadrillas[cuadrillas[k][0]][1]
+                casillas.append(Casilla(FESTIVO, HORARIO_FESTIVO, CATALOGO.cuadrilla("Correctivos Lunes Festivo", vehiculo),
+                                        _intervalos(HORARIO_FESTIVO, clave, lunes0)))
+                fila.append(fila[k])
+        _agregar_semana(tec, i, casillas, roster, fila, referencia, clave,
+                        rotacion.cargar_ajuste(clave)[0] if rotacion.MODO == "derivado" else rotacion.cargar_rotacion(clave),
+                        lambda c: CATALOGO.cuadrillas[c.cuadrilla][0], lambda t: t["cuadrilla"], "tecnicos")
+
+        casillas = [
+            Casilla(ROTATIVO, h, None, _intervalos(h.desde_martes() if martes else h, clave, lunes0))
+            for h in (EHS_TURNO_1, EHS_TURNO_2, EHS_TURNO_3)
+        ]
+        casillas.append(Casilla(DOMINGO, EHS_DOMINGO, None, _intervalos(EHS_DOMINGO, clave, lunes0)))
+        fila = list(r.supervisores[i * 3:(i + 1) * 3])
+        fila.append(fila[0])  # regla: Domingo y Festivo para el primer turno
+        if r.festivo[i]:
+            casillas.append(Casilla(FESTIVO, HORARIO_FESTIVO, None, _intervalos(HORARIO_FESTIVO, clave, lunes0)))
+            fila.append(fila[0])
+        _agregar_semana(ehs, i, casillas, supervisores, fila, referencia, clave,
+                        rotacion.cargar_ajuste(clave)[1] if rotacion.MODO == "derivado"
+                        else rotacion.cargar_rotacion_ehs(clave),
+                        lambda c: c.horario, lambda t: parse_horario(t["horario"]), "supervisor")
+
+    return Plan(r, Problema(*tec[:3], ausentes, minutos, tec[3]), Problema(*ehs[:3], ausentes, minutos, ehs[3]))
+
+
+def _agregar_semana(problema, i, casillas, grupos, regla, referencia, clave, guardado,
+                    clave_casilla, clave_guardado, personas):
+    lista_casillas, recursos, filas, fijas = problema
+    lista_casillas.append(casillas)
+    recursos.append(grupos)
+    fila = regla if referencia == "regla" else _desde_guardado(
+        casillas, grupos, guardado, regla, clave_casilla, clave_guardado, personas)
+    if fila is None:
+        # Ajuste manual con personas fuera del roster: se respeta tal cual
+        fila = regla
+        fijas.append(i)
+    filas.append(fila)
+
+
+def planificar(desde, n_semanas, ausencias=None, referencia="actual", solo_conflictos=False,
+               iteraciones=None, semilla=0, descanso=DESCANSO_MINIMO):
+    """Crea y optimiza un plan. solo_conflictos=True mueve solo las semanas con
+    restricciones duras violadas y sus vecinas (replanificar tras una ausencia)."""
+    plan = crear_plan(desde, n_semanas, ausencias, referencia, descanso)
+    plan.optimizar(plan.ventana_conflictos() if solo_conflictos else None, iteraciones, semilla)
+    return plan
+
+
+def guardar_plan(plan, semanas=None):
+    """Guarda las semanas cambiadas: como ajustes en modo derivado, como
+    rotación guardada en modo persistido. Devuelve las claves escritas."""
+    claves = []
+    for w in plan.semanas_cambiadas() if semanas is None else semanas:
+        clave = plan.clave(w)
+        if rotacion.MODO == "derivado":
+            rotacion.guardar_ajuste(clave, plan.turnos(w), plan.ehs(w))
+        else:
+            rotacion.guardar_rotacion(clave, plan.turnos(w))
+            rotacion.guardar_rotacion_ehs(clave, plan.ehs(w))
+        claves.append(clave)
+    return claves
@@ -0,0 +1,61 @@
+import streamlit as st
+from datetime import date, timedelta
+import analitica
+import datos
+
+ROLES = {"👷 Técnicos": "tecnicos", "🛡️ Supervisión SST": "ehs"}
+NOMBRES_METRICAS = {"horas": "Horas", "noches": "Noches", "domingos": "Domingos", "festivos": "Festivos"}
+
+st.set_page_config(page_title="Carga de trabajo", layout="wide")
+st.title("📊 Carga de trabajo por persona")
+
+# 🏢 Sede elegida en la página principal
+opciones_sede = [None] + datos.sedes()
+if len(opciones_sede) > 1:
+    sede = st.session_state.get("sede")
+    sede = st.sidebar.selectbox(
+        "🏢 Sede",
+        opciones_sede,
+        index=opciones_sede.index(sede) if sede in opciones_sede else 0,
+        format_func=lambda s: s or "Principal"
+    )
+    st.session_state["sede"] = sede
+    datos.usar_sede(sede)
+
+# 🗓️ Rango (por semanas completas: de la semana de "desde" a la de "hasta")
+hoy = date.today()
+col_desde, col_hasta, col_rol = st.columns([1, 1, 2])
+desde = col_desde.date_input("Desde", value=date(hoy.year, 1, 1))
+hasta = col_hasta.date_input("Hasta", value=hoy)
+rol = col_rol.radio("Personal", list(ROLES), horizontal=True)
+
+if hasta < desde:
+    st.warning("La fecha final es anterior a la inicial.")
+    st.stop()
+
+filas = analitica.totales(desde, hasta, ROLES[rol])
+lunes = desde - timedelta(days=desde.weekday())
+domingo = hasta + timedelta(days=6 - hasta.weekday())
+st.caption(f"Semanas del {lunes.strftime('%d/%m/%Y')} al {domingo.strftime('%d/%m/%Y')}; "
+           "el turno de lunes festivo cuenta en la semana que termina en ese lunes.")
+
+if not filas:
+    st.info("No hay turnos en el rango.")
+    st.stop()
+
+# ⚖️ Equidad: diferencia entre quien más y quien menos tiene
+columnas = st.columns(len(NOMBRES_METRICAS))
+for columna, (metrica, nombre) in zip(columnas, NOMBRES_METRICAS.items()):
+    valores = [f[metrica] for f in filas]
+    columna.metric(nombre, f"{min(valores):g} – {max(valores):g}", f"diferencia {max(valores) - min(valores):g}",
+                   delta_color="off")
+
+# 📋 Totales por persona
+st.dataframe(
+    [{"Persona": f["persona"], **{nombre: f[m] for m, nombre in NOMBRES_METRICAS.items()}} for f in filas],
+    hide_index=True,
+)
+
+# 📊 Comparación
+metrica = st.selectbox("Métrica", list(NOMBRES_METRICAS), format_func=NOMBRES_METRICAS.get)
+st.bar_chart([{"persona": f["persona"], metrica: f[metrica]} for f in filas], x="persona", y=metrica, horizontal=True)
@@ -1,253 +1,267 @@
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import letter
+# ReportLab se importa dentro de cada función: importar este módulo es barato
+# y las sesiones que no exportan nunca lo cargan
+import io
 import os
-from datetime import timedelta
-from rotacion import corregir_horario
+import medicion
+from modelo import CATALOGO, como_turnos, como_turnos_ehs, semana_en_dicts
 
 
-def generar_pdf_multiple(semanas_data, nombre_archivo="programacion_completa.pdf"):
-    ruta_descargas = os.path.join(os.path.expanduser("~"), "Downloads", nombre_archivo)
-    doc = SimpleDocTemplate(ruta_descargas, pagesize=letter)
-    elementos = []
-    estilos = getSampleStyleSheet()
+_plantillas = None
 
-    for semana_info in semanas_data:
-        semana = semana_info["semana"]
-        fecha_inicio = semana_info["fecha_inicio"]
-        fecha_fin = semana_info["fecha_fin"]
-        turnos = semana_info["turnos"]
-        supervisores_ehs = semana_info["supervisores_ehs"]
-        nota_festivo = semana_info.get("nota_festivo", "")
-        inicia_en_martes = fecha_inicio.weekday() == 1
-
-        # 🗓️ Título
-        titulo = Paragraph(
-            f"<b>SEMANA {semana}</b><br/>{fecha_inicio.strftime('%d/%m/%Y')} – {fecha_fin.strftime('%d/%m/%Y')}"
-            + (f"<br/><i>{nota_festivo}</i>" if nota_festivo else ""),
-            estilos["Title"]
-        )
-        elementos.append(titulo)
-        elementos.append(Spacer(1, 20))
-
-        # 👷 Técnicos
-        elementos.append(Paragraph("👷 Rotación de Técnicos", estilos["Heading2"]))
-        datos_tecnicos = [["Cuadrilla", "Horario", "Personal Técnico"]]
-        turno_festivo = None
-        turnos_normales = []
-
-        for asignacion in turnos:
-            if asignacion["cuadrilla"] == "Correctivos Lunes Festivo":
-                turno_festivo = asignacion
-            else:
-                turnos_normales.append(asignacion)
-
-        for asignacion in turnos_normales:
-            horario = asignacion["horario"]
-            horario = corregir_horario(horario, inicia_en_martes)
-
-            datos_tecnicos.append([
-                f"{asignacion['cuadrilla']}\n{asignacion['vehiculo']}",
-                horario,
-                ", ".join(asignacion["tecnicos"])
-            ])
-
-        if turno_festivo:
-            horario = turno_festivo["horario"]
-            horario = corregir_horario(horario, inicia_en_martes)
-
-            datos_tecnicos.append([
-                f"{turno_festivo['cuadrilla']}\n{turno_festivo['vehiculo']}",
-                horario,
-                ", ".join(turno_festivo["tecnicos"])
-            ])
-
-        tabla_tecnicos = Table(datos_tecnicos, colWidths=[150, 180, 170])
-        tabla_tecnicos.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
+
+def obtener_plantillas():
+    # Estilos y TableStyle se construyen una sola vez por proceso
+    global _plantillas
+    if _plantillas is None:
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import TableStyle
+
+        estilos = getSampleStyleSheet()
+        encabezado = [
             ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
             ("ALIGN", (0, 0), (-1, -1), "CENTER"),
             ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
             ("FONTSIZE", (0, 0), (-1, 0), 12),
             ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
+        ]
+        tecnicos = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
+            *encabezado,
             ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
             ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-        elementos.append(tabla_tecnicos)
-        elementos.append(Spacer(1, 30))
-
-        # 🛡️ Supervisores SST
-        elementos.append(Paragraph("🛡️ Supervisión SST", estilos["Heading2"]))
-        datos_ehs = [["Horario", "Supervisor SST"]]
-        turno_festivo_ehs = None
-        supervisores_ehs_normales = []
-
-        for asignacion in supervisores_ehs:
-            if "Lunes Festivo" in asignacion["horario"]:
-                turno_festivo_ehs = asignacion
-            else:
-                supervisores_ehs_normales.append(asignacion)
-
-        for asignacion in supervisores_ehs_normales:
-            horario = asignacion["horario"]
-            horario = corregir_horario(horario, inicia_en_martes)
-
-            datos_ehs.append([
-                horario,
-                ", ".join(asignacion["supervisor"])
-            ])
-
-        if turno_festivo_ehs:
-            horario = turno_festivo_ehs["horario"]
-            horario = corregir_horario(horario, inicia_en_martes)
-
-            datos_ehs.append([
-                horario,
-                ", ".join(turno_festivo_ehs["supervisor"])
-            ])
-
-        tabla_ehs = Table(datos_ehs, colWidths=[200, 300])
-        tabla_ehs.setStyle(TableStyle([
+        ])
+        ehs = TableStyle([
             ("BACKGROUND", (0, 0), (-1, 0), colors.darkgreen),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTSIZE", (0, 0), (-1, 0), 12),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
-            ("ROWBACKGROUNDS", (0, 1), (-1, -2 if turno_festivo_ehs else -1), [colors.beige, colors.lightgrey]),
+            *encabezado,
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.beige, colors.lightgrey]),
             ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-
-        if turno_festivo_ehs:
-            tabla_ehs.setStyle(TableStyle([
-                ("BACKGROUND", (0, -1), (-1, -1), colors.lightcoral),
-                ("TEXTCOLOR", (0, -1), (-1, -1), colors.black),
-                ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
-            ]))
-
-        elementos.append(tabla_ehs)
-        elementos.append(PageBreak())
-
-    doc.build(elementos)
-    return ruta_descargas
-
+        ])
+        # Última fila resaltada para el turno de lunes festivo
+        ehs_festivo = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.darkgreen),
+            *encabezado,
+            ("ROWBACKGROUNDS", (0, 1), (-1, -2), [colors.beige, colors.lightgrey]),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+            ("BACKGROUND", (0, -1), (-1, -1), colors.lightcoral),
+            ("TEXTCOLOR", (0, -1), (-1, -1), colors.black),
+            ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+        ])
+        _plantillas = {
+            "titulo": estilos["Title"],
+            "subtitulo": estilos["Heading2"],
+            "tecnicos": tecnicos,
+            "ehs": ehs,
+            "ehs_festivo": ehs_festivo,
+        }
+    return _plantillas
+
+
+def filas_tecnicos(turnos, inicia_en_martes, normalizado=False):
+    # turnos: lista de modelo.Turno o de dicts como los guardados en el almacén
+    # normalizado: horarios ya corregidos, como los devuelve generar_turnos
+    # El turno de lunes festivo va siempre al final de la tabla
+    filas = [["Cuadrilla", "Horario", "Personal Técnico"]]
+    festivo = None
+    corregir = inicia_en_martes and not normalizado
+    for turno in como_turnos(turnos):
+        nombre, vehiculo = CATALOGO.cuadrillas[turno.cuadrilla]
+        horario = turno.horario.desde_martes() if corregir else turno.horario
+        fila = [
+            f"{nombre}\n{vehiculo}",
+            horario.texto(),
+            ", ".join(CATALOGO.nombres(turno.personas))
+        ]
+        if nombre == "Correctivos Lunes Festivo":
+            festivo = fila
+        else:
+            filas.append(fila)
+    if festivo:
+        filas.append(festivo)
+    return filas
+
+
+def filas_ehs(supervisores_ehs, inicia_en_martes):
+    # generar_ehs no corrige los horarios: siempre se corrigen aquí
+    filas = [["Horario", "Supervisor SST"]]
+    festivo = None
+    for turno in como_turnos_ehs(supervisores_ehs):
+        horario = turno.horario.desde_martes() if inicia_en_martes else turno.horario
+        fila = [horario.texto(), ", ".join(CATALOGO.nombres(turno.personas))]
+        if turno.horario.festivo:
+            festivo = fila
+        else:
+            filas.append(fila)
+    if festivo:
+        filas.append(festivo)
+    return filas, festivo is not None
 
 
+@medicion.medido()
+def seccion_semana(semana, fecha_inicio, fecha_fin, turnos, supervisores_ehs,
+                   nota_festivo="", normalizado=False):
+    from reportlab.platypus import Paragraph, Spacer, Table
 
-def generar_pdf(turnos, semana, fecha_inicio, fecha_fin, supervisores_ehs, nota_festivo=""):
-   
-    nombre_archivo = f"turnos_semana_{semana}_{fecha_inicio.strftime('%Y-%m-%d')}.pdf"
-    ruta_descargas = os.path.join(os.path.expanduser("~"), "Downloads", nombre_archivo)
-    doc = SimpleDocTemplate(ruta_descargas, pagesize=letter)
-    elementos = []
-    estilos = getSampleStyleSheet()
+    plantillas = obtener_plantillas()
     inicia_en_martes = fecha_inicio.weekday() == 1
 
     # 🗓️ Título
     titulo = Paragraph(
         f"<b>SEMANA {semana}</b><br/>{fecha_inicio.strftime('%d/%m/%Y')} – {fecha_fin.strftime('%d/%m/%Y')}"
         + (f"<br/><i>{nota_festivo}</i>" if nota_festivo else ""),
-        estilos["Title"]
+        plantillas["titulo"]
     )
-    elementos.append(titulo)
-    elementos.append(Spacer(1, 20))
 
     # 👷 Técnicos
-    elementos.append(Paragraph("👷 Rotación de Técnicos", estilos["Heading2"]))
-    datos_tecnicos = [["Cuadrilla", "Horario", "Personal Técnico"]]
-    turno_festivo = None
-    turnos_normales = []
-
-    for asignacion in turnos:
-        if asignacion["cuadrilla"] == "Correctivos Lunes Festivo":
-            turno_festivo = asignacion
-        else:
-            turnos_normales.append(asignacion)
-
-    for asignacion in turnos_normales:
-        horario = asignacion["horario"]
-        horario = corregir_horario(horario, inicia_en_martes)
-
-        datos_tecnicos.append([
-            f"{asignacion['cuadrilla']}\n{asignacion['vehiculo']}",
-            horario,
-            ", ".join(asignacion["tecnicos"])
-        ])
-
-    if turno_festivo:
-        horario = turno_festivo["horario"]
-        horario = corregir_horario(horario, inicia_en_martes)
-
-        datos_tecnicos.append([
-            f"{turno_festivo['cuadrilla']}\n{turno_festivo['vehiculo']}",
-            horario,
-            ", ".join(turno_festivo["tecnicos"])
-        ])
-
-    tabla_tecnicos = Table(datos_tecnicos, colWidths=[150, 180, 170])
-    tabla_tecnicos.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightblue),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 12),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.whitesmoke, colors.lightgrey]),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elementos.append(tabla_tecnicos)
-    elementos.append(Spacer(1, 30))
+    tabla_tecnicos = Table(filas_tecnicos(turnos, inicia_en_martes, normalizado), colWidths=[150, 180, 170])
+    tabla_tecnicos.setStyle(plantillas["tecnicos"])
 
     # 🛡️ Supervisores SST
-    elementos.append(Paragraph("🛡️ Supervisión SST", estilos["Heading2"]))
-    datos_ehs = [["Horario", "Supervisor SST"]]
-    turno_festivo_ehs = None
-    supervisores_ehs_normales = []
-
-    for asignacion in supervisores_ehs:
-        if "Lunes Festivo" in asignacion["horario"]:
-            turno_festivo_ehs = asignacion
-        else:
-            supervisores_ehs_normales.append(asignacion)
-
-    for asignacion in supervisores_ehs_normales:
-        horario = asignacion["horario"]
-        horario = corregir_horario(horario, inicia_en_martes)
-
-        datos_ehs.append([
-            horario,
-            ", ".join(asignacion["supervisor"])
-        ])
-
-    if turno_festivo_ehs:
-        horario = turno_festivo_ehs["horario"]
-        horario = corregir_horario(horario, inicia_en_martes)
-
-        datos_ehs.append([
-            horario,
-            ", ".join(turno_festivo_ehs["supervisor"])
-        ])
-
+    datos_ehs, hay_festivo = filas_ehs(supervisores_ehs, inicia_en_martes)
     tabla_ehs = Table(datos_ehs, colWidths=[200, 300])
-    tabla_ehs.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.darkgreen),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, 0), 12),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 10),
-        ("ROWBACKGROUNDS", (0, 1), (-1, -2 if turno_festivo_ehs else -1), [colors.beige, colors.lightgrey]),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-
-    if turno_festivo_ehs:
-        tabla_ehs.setStyle(TableStyle([
-            ("BACKGROUND", (0, -1), (-1, -1), colors.lightcoral),
-            ("TEXTCOLOR", (0, -1), (-1, -1), colors.black),
-            ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
-        ]))
-
-    elementos.append(tabla_ehs)
+    tabla_ehs.setStyle(plantillas["ehs_festivo" if hay_festivo else "ehs"])
+
+    return [
+        titulo,
+        Spacer(1, 20),
+        Paragraph("👷 Rotación de Técnicos", plantillas["subtitulo"]),
+        tabla_tecnicos,
+        Spacer(1, 30),
+        Paragraph("🛡️ Supervisión SST", plantillas["subtitulo"]),
+        tabla_ehs,
+    ]
+
+
+@medicion.medido("pdf_generator.dibujar_semana")
+def _dibujar_semana(canvas, elementos):
+    # Mismo marco que SimpleDocTemplate (márgenes de 1 pulgada); una semana que
+    # no cabe continúa en la página siguiente
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Frame
+    from reportlab.platypus.doctemplate import LayoutError
+
+    ancho, alto = letter
+    while elementos:
+        marco = Frame(inch, inch, ancho - 2 * inch, alto - 2 * inch)
+        pendientes = len(elementos)
+        marco.addFromList(elementos, canvas)
+        if len(elementos) == pendientes:
+            raise LayoutError("Un elemento de la semana no cabe en una página")
+        canvas.showPage()
+
+
+def exportar_semanas(semanas_data, destino, total=None):
+    """Escribe el PDF semana por semana y produce (semanas_hechas, total) tras cada una.
+
+    semanas_data puede ser un generador: solo se mantienen en memoria los
+    elementos de la semana en curso. destino es una ruta o un archivo binario.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen.canvas import Canvas
+
+    canvas = Canvas(destino, pagesize=letter)
+    hechas = 0
+    for semana_info in semanas_data:
+        _dibujar_semana(canvas, seccion_semana(
+            semana_info["semana"],
+            semana_info["fecha_inicio"],
+            semana_info["fecha_fin"],
+            semana_info["turnos"],
+            semana_info["supervisores_ehs"],
+            semana_info.get("nota_festivo", ""),
+            semana_info.get("normalizado", False),
+        ))
+        hechas += 1
+        yield hechas, total
+    canvas.save()
+
+
+def _renderizar_bloque(bloque):
+    # Se ejecuta en un proceso del pool: devuelve el PDF del bloque en memoria
+    buffer = io.BytesIO()
+    for _ in exportar_semanas(bloque, buffer):
+        pass
+    return buffer.getvalue()
+
+
+def exportar_semanas_paralelo(semanas_data, destino, procesos=None, tam_bloque=None):
+    """Renderiza bloques de semanas en un ProcessPoolExecutor y los une en orden.
+
+    Produce (semanas_hechas, total) a medida que terminan los bloques. Las páginas
+    son las mismas que las de exportar_semanas. Requiere pypdf para unir las partes.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError as e:
+        raise ImportError("La exportación en paralelo requiere pypdf (pip install pypdf)") from e
+
+    # Los ids del catálogo son propios de cada proceso: a los workers van dicts
+    semanas_data = [semana_en_dicts(s) for s in semanas_data]
+    total = len(semanas_data)
+    procesos = procesos or os.cpu_count() or 1
+    if not tam_bloque:
+        # Unos pocos bloques por proceso para repartir la carga
+        tam_bloque = max(1, -(-total // (procesos * 4)))
+    bloques = [semanas_data[i:i + tam_bloque] for i in range(0, total, tam_bloque)]
+
+    partes = [None] * len(bloques)
+    hechas = 0
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {pool.submit(_renderizar_bloque, b): i for i, b in enumerate(bloques)}
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            partes[i] = futuro.result()
+            hechas += len(bloques[i])
+            yield hechas, total
+
+    escritor = PdfWriter()
+    for parte in partes:
+        escritor.append(PdfReader(io.BytesIO(parte)))
+    escritor.write(destino)
+
+
+def nombre_pdf_semana(semana, fecha_inicio):
+    return f"turnos_semana_{semana}_{fecha_inicio.strftime('%Y-%m-%d')}.pdf"
+
+
+def _guardar(contenido, ruta):
+    if ruta:
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+        medicion.contar("bytes.escritos", len(contenido))
+    return contenido
+
+
+@medicion.medido()
+def generar_pdf_multiple(semanas_data, ruta=None, progreso=None, total=None, procesos=1):
+    # Devuelve los bytes del PDF; si se da ruta, además lo escribe en disco.
+    # procesos > 1 (o None = todos los núcleos) usa el pool de procesos
+    buffer = io.BytesIO()
+    if procesos == 1:
+        if total is None and hasattr(semanas_data, "__len__"):
+            total = len(semanas_data)
+        pasos = exportar_semanas(semanas_data, buffer, total)
+    else:
+        pasos = exportar_semanas_paralelo(semanas_data, buffer, procesos)
+    for hechas, total in pasos:
+        if progreso:
+            progreso(hechas, total)
+    return _guardar(buffer.getvalue(), ruta)
+
+
+@medicion.medido()
+def generar_pdf(turnos, semana, fecha_inicio, fecha_fin, supervisores_ehs, nota_festivo="", normalizado=False,
+                ruta=None):
+    # Devuelve los bytes del PDF; si se da ruta, además lo escribe en disco
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elementos = seccion_semana(semana, fecha_inicio, fecha_fin, turnos, supervisores_ehs,
+                               nota_festivo, normalizado)
     doc.build(elementos)
-    return ruta_descargas
+    return _guardar(buffer.getvalue(), ruta)
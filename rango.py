@@ -0,0 +1,156 @@
+from array import array
+from datetime import timedelta
+
+import calendario
+import datos
+from modelo import CATALOGO, Turno, TurnoEHS, ehs_a_dicts, turnos_a_dicts
+from rotacion import (
+    EHS_ADMINISTRATIVO,
+    EHS_DOMINGO,
+    EHS_TURNO_1,
+    EHS_TURNO_2,
+    EHS_TURNO_3,
+    HORARIO_FESTIVO,
+    cuadrilla_domingo,
+    cuadrillas_modelo,
+    grupos_roster,
+    normalizar_a_lunes,
+    semana_rotacion,
+    semanas_desde_inicio,
+)
+
+N_TURNOS_EHS = 3
+
+
+def indice_correctivo_2(cuadrillas):
+    # Posición de "Correctivos 2" en las cuadrillas rotativas, o None (como generar_turnos_modelo)
+    return next((k for k, (cuadrilla, _) in enumerate(cuadrillas)
+                 if CATALOGO.cuadrillas[cuadrilla][0] == "Correctivos 2"), None)
+
+
+class RangoTurnos:
+    """Resultado columnar de generar_rango.
+
+    Por semana i: lunes0 + 7*i, número de semana, si inicia en martes (lunes festivo),
+    si lleva turno de lunes festivo, versión del roster (índice en `rosters`),
+    índice de pareja por cuadrilla (fila i de `parejas`, de ancho `ancho`) e
+    índice de supervisor por turno rotativo (fila i de `supervisores`).
+    """
+
+    def __init__(self, lunes0, semanas, martes, festivo, versiones, parejas, supervisores, rosters, ancho):
+        self.lunes0 = lunes0
+        self.semanas = semanas
+        self.martes = martes
+        self.festivo = festivo
+        self.versiones = versiones
+        self.parejas = parejas
+        self.supervisores = supervisores
+        self.rosters = rosters  # (parejas, cuadrillas, domingo, supervisores, administrativo) por versión
+        self.ancho = ancho
+
+    def __len__(self):
+        return len(self.semanas)
+
+    def lunes(self, i):
+        return self.lunes0 + timedelta(weeks=i)
+
+    def clave(self, i):
+        lunes = self.lunes(i)
+        return lunes + timedelta(days=1) if self.martes[i] else lunes
+
+    def turnos_modelo(self, i):
+        # Mismo resultado que generar_turnos_modelo(self.clave(i))
+        inicia_en_martes = self.martes[i]
+        roster, cuadrillas, domingo, _, _ = self.rosters[self.versiones[i]]
+        fila = self.parejas[i * self.ancho:i * self.ancho + len(cuadrillas)]
+        asignaciones = []
+        for (cuadrilla, horario), p in zip(cuadrillas, fila):
+            if inicia_en_martes:
+                horario = horario.desde_martes()
+            asignaciones.append(Turno(cuadrilla, horario, roster[p]))
+
+        k = indice_correctivo_2(cuadrillas)
+        if k is None:
+            return asignaciones
+        correctivo_2 = asignaciones[k]
+        if domingo:
+            asignaciones.append(Turno(*domingo, correctivo_2.personas))
+        if self.festivo[i]:
+            asignaciones.insert(0, Turno(
+                CATALOGO.cuadrilla("Correctivos Lunes Festivo", correctivo_2.vehiculo()),
+                HORARIO_FESTIVO,
+                correctivo_2.personas
+            ))
+        return asignaciones
+
+    def ehs_modelo(self, i):
+        # Mismo resultado que generar_ehs_modelo(self.clave(i))
+        _, _, _, lista, administrativo = self.rosters[self.versiones[i]]
+        s1, s2, s3 = (lista[s] for s in self.supervisores[i * 3:(i + 1) * 3])
+        asignaciones = [
+            TurnoEHS(EHS_TURNO_1, s1),
+            TurnoEHS(EHS_TURNO_2, s2),
+            TurnoEHS(EHS_TURNO_3, s3),
+            TurnoEHS(EHS_ADMINISTRATIVO, administrativo),
+            TurnoEHS(EHS_DOMINGO, s1),
+        ]
+        if self.festivo[i]:
+            asignaciones.insert(0, TurnoEHS(HORARIO_FESTIVO, s1))
+        return asignaciones
+
+    def turnos(self, i):
+        return turnos_a_dicts(self.turnos_modelo(i))
+
+    def ehs(self, i):
+        return ehs_a_dicts(self.ehs_modelo(i))
+
+
+def generar_rango(inicio, fin):
+    lunes0 = normalizar_a_lunes(inicio)
+    n = (normalizar_a_lunes(fin) - lunes0).days // 7 + 1
+    if n <= 0:
+        n = 0
+
+    # Semanas consecutivas → números consecutivos desde la primera
+    s0 = semanas_desde_inicio(lunes0)
+    semanas = array("l", range(s0, s0 + n))
+
+    # Lunes festivos del rango (incluye el lunes siguiente a la última semana)
+    ultimo = lunes0 + timedelta(weeks=n)
+    festivos = {(d - lunes0).days // 7 for d in calendario.lunes_festivos(lunes0, ultimo)}
+    martes = bytearray(1 if i in festivos else 0 for i in range(n))
+    # Turno de lunes festivo: semana que empieza en lunes y termina en lunes festivo
+    festivo = bytearray(1 if (i + 1) in festivos and i not in festivos else 0 for i in range(n))
+
+    # Versión del roster por semana: cambia solo en las fechas efectivas
+    rosters = []
+    indice_version = {}
+    versiones = array("B")
+    rotacion = array("l")
+    for i in range(n):
+        lunes = lunes0 + timedelta(weeks=i)
+        version = datos.version_roster(lunes)
+        clave = version["desde"]
+        if clave not in indice_version:
+            indice_version[clave] = len(rosters)
+            rosters.append((
+                datos.cargar_json(version["parejas"], grupos_roster),
+                datos.cargar_json(version["cuadrillas"], cuadrillas_modelo),
+                datos.cargar_json(version["cuadrillas"], cuadrilla_domingo),
+                datos.cargar_json(version["supervisores"], grupos_roster),
+                CATALOGO.grupo(version["administrativo"]),
+            ))
+        versiones.append(indice_version[clave])
+        rotacion.append(semana_rotacion(lunes, version))
+
+    # parejas_rotadas[j] == parejas[(j - offset) % n_parejas]
+    ancho = max((len(c) for _, c, _, _, _ in rosters), default=0)
+    parejas = array("H", bytes(2 * ancho * n))
+    supervisores = array("B")
+    for i in range(n):
+        roster, cuadrillas, _, lista, _ = rosters[versiones[i]]
+        s = rotacion[i]
+        for j in range(len(cuadrillas)):
+            parejas[i * ancho + j] = (j - s) % len(roster)
+        supervisores.extend((k - s) % N_TURNOS_EHS for k in range(N_TURNOS_EHS))
+    return RangoTurnos(lunes0, semanas, martes, festivo, versiones, parejas, supervisores, rosters, ancho)
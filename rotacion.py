@@ -1,39 +1,71 @@
 import json
+import os
 from datetime import date, timedelta
-import holidays
-
-CO_HOLIDAYS = holidays.Colombia()
-
-CUADRILLAS = [
-    {"nombre": "Correctivos 1", "vehiculo": "WFR 538", "horario": "06:00 - 14:00 Lun-Sab"},
-    {"nombre": "Correctivos 2", "vehiculo": "LSY 026", "horario": "10:00 - 19:00 Lun-Sab"},
-    {"nombre": "Correctivos 3", "vehiculo": "WFR 538", "horario": "13:00 - 22:00 Lun-Sab"},
-    {"nombre": "Correctivos 4", "vehiculo": "LQO 596", "horario": "13:30 - 21:00 Lun-Sab"},
-    {"nombre": "Correctivos 5", "vehiculo": "LSY 026", "horario": "21:00 - 06:00 Dom-Vie"},
-    {"nombre": "Domingo",        "vehiculo": "LSY 026", "horario": "08:00 - 18:00 Domingo"}
-]
-SUPERVISORES = [
-    ["Nathaly Mendivelso"],
-    ["Andres Bautista"],
-    ["Oscar Roa"]
-]
-
-HORARIOS_EHS = [
-    {"horario": "Lun - Sab 06:00 - 14:00", "tipo": "rotativo"},
-    {"horario": "Lun - Sab 13:00 - 22:00", "tipo": "rotativo"},
-    {"horario": "Dom - Vie 21:00 - 06:00", "tipo": "rotativo"},
-    {"horario": "Administrativo", "tipo": "fijo", "supervisor": ["Jeimy Pachon"]},
-    {"horario": "Domingo 08:00 - 18:00", "tipo": "dinámico"}  # lo hace el del primer turno
-]
-
-
-def cargar_parejas():
-    with open("data/parejas.json") as f:
-        return json.load(f)
-
-def generar_turnos(fecha_base):
-    parejas = cargar_parejas()
+import calendario
+import datos
+import medicion
+from almacen import bloqueo_archivo, escribir_atomico, obtener_almacen
+from modelo import (
+    CATALOGO, Turno, TurnoEHS, ehs_a_dicts, ehs_desde_dicts, parse_horario, turnos_a_dicts,
+    turnos_desde_dicts
+)
+
+# Ancla de la rotación: toda semana se calcula a partir de esta fecha y del roster
+INICIO_ROTACION = date(2025, 10, 14)
+
+# "persistido": la primera vez que se consulta una semana se genera y se guarda.
+# "derivado": cada semana se calcula al vuelo y el almacén solo guarda los
+# ajustes manuales (tablas "ajustes_tecnicos" y "ajustes_ehs").
+MODO = os.environ.get("HORAS_MODO", "persistido")
+
+# Funciones que reciben la fecha de cada semana guardada (p. ej. analitica)
+AL_GUARDAR = []
+
+def cargar_parejas(fecha=None):
+    if fecha is None:
+        return datos.cargar_parejas()
+    return datos.cargar_json(datos.version_roster(fecha)["parejas"])
+
+def cargar_cuadrillas(fecha=None):
+    if fecha is None:
+        return datos.cargar_cuadrillas()
+    return datos.cargar_json(datos.version_roster(fecha)["cuadrillas"])
+
+def cargar_supervisores(fecha=None):
+    if fecha is None:
+        return datos.cargar_supervisores()
+    return datos.cargar_json(datos.version_roster(fecha)["supervisores"])
+
+def semana_rotacion(fecha_lunes, version):
+    # Posición en la rotación dentro de una versión del roster
+    return (fecha_lunes - version["desde"]).days // 7 + version["semana_inicial"]
+
+def grupos_roster(parejas):
+    return [CATALOGO.grupo(pareja) for pareja in parejas]
+
+def cuadrillas_modelo(cuadrillas):
+    return [
+        (CATALOGO.cuadrilla(c["nombre"], c["vehiculo"]), parse_horario(c["horario"]))
+        for c in cuadrillas
+        if c["nombre"].startswith("Correctivos")
+    ]
+
+def cuadrilla_domingo(cuadrillas):
+    # (cuadrilla, horario) de la entrada "Domingo", o None si la versión no la tiene
+    return next(
+        ((CATALOGO.cuadrilla(c["nombre"], c["vehiculo"]), parse_horario(c["horario"]))
+         for c in cuadrillas if c["nombre"] == "Domingo"),
+        None
+    )
+
+HORARIO_FESTIVO = parse_horario("Lunes Festivo 08:00 - 18:00")
+
+
+@medicion.medido()
+def generar_turnos_modelo(fecha_base):
     fecha_lunes = normalizar_a_lunes(fecha_base)
+    version = datos.version_roster(fecha_lunes)
+    parejas = datos.cargar_json(version["parejas"], grupos_roster)
     asignaciones = []
 
     # Detectar si hay lunes festivo en esta semana
@@ -41,171 +73,311 @@ def generar_turnos(fecha_base):
     agregar_festivo = lunes_festivo and fecha_base == fecha_lunes
 
     # Calcular semana y rotar parejas en cadena
-    semanas = semanas_desde_inicio(fecha_lunes)
+    semanas = semana_rotacion(fecha_lunes, version)
     offset = semanas % len(parejas)
     parejas_rotadas = parejas[-offset:] + parejas[:-offset]
 
 
     # Asignar a cuadrillas 1 a 5
-    cuadrillas_rotativas = [c for c in CUADRILLAS if c["nombre"].startswith("Correctivos")]
+    cuadrillas_rotativas = datos.cargar_json(version["cuadrillas"], cuadrillas_modelo)
     inicia_en_martes = fecha_base.weekday() == 1
 
-    for i, cuadrilla in enumerate(cuadrillas_rotativas):
-        horario = corregir_horario(cuadrilla["horario"], inicia_en_martes)
-        asignaciones.append({
-            "cuadrilla": cuadrilla["nombre"],
-            "vehiculo": cuadrilla["vehiculo"],
-            "horario": horario,
-            "tecnicos": parejas_rotadas[i % len(parejas_rotadas)]
-        })
+    correctivo_2 = None
+    for i, (cuadrilla, horario) in enumerate(cuadrillas_rotativas):
+        if inicia_en_martes:
+            horario = horario.desde_martes()
+        turno = Turno(cuadrilla, horario, parejas_rotadas[i % len(parejas_rotadas)])
+        if CATALOGO.cuadrillas[cuadrilla][0] == "Correctivos 2":
+            correctivo_2 = turno
+        asignaciones.append(turno)
 
 
     # Asignar Domingo al técnico del Correctivo 2
-    correctivo_2 = next((a for a in asignaciones if a["cuadrilla"] == "Correctivos 2"), None)
-    if correctivo_2:
-        horario_domingo = corregir_horario("08:00 - 18:00 Domingo", inicia_en_martes)
-        asignaciones.append({
-            "cuadrilla": "Domingo",
-            "vehiculo": "LSY 026",
-            "horario": horario_domingo,
-            "tecnicos": correctivo_2["tecnicos"]
-        })
+    domingo = datos.cargar_json(version["cuadrillas"], cuadrilla_domingo)
+    if correctivo_2 and domingo:
+        asignaciones.append(Turno(*domingo, correctivo_2.personas))
 
     if lunes_festivo and agregar_festivo and correctivo_2:
-        horario_festivo = corregir_horario("Lunes Festivo 08:00 - 18:00", inicia_en_martes)
-        asignaciones.insert(0, {
-            "cuadrilla": "Correctivos Lunes Festivo",
-            "vehiculo": correctivo_2["vehiculo"],
-            "horario": horario_festivo,
-            "tecnicos": correctivo_2["tecnicos"]
-        })
+        asignaciones.insert(0, Turno(
+            CATALOGO.cuadrilla("Correctivos Lunes Festivo", correctivo_2.vehiculo()),
+            HORARIO_FESTIVO,
+            correctivo_2.personas
+        ))
 
+    return asignaciones
 
 
-    return asignaciones
+def generar_turnos(fecha_base):
+    return turnos_a_dicts(generar_turnos_modelo(fecha_base))
 
 
 def es_lunes_festivo(fecha):
-    fecha_lunes = normalizar_a_lunes(fecha)
-    return fecha_lunes in CO_HOLIDAYS
+    return calendario.es_lunes_festivo(fecha)
 
 def lunes_festivo_en_semana(fecha_lunes):
-    for i in range(8):  # incluye el lunes siguiente
-        dia = fecha_lunes + timedelta(days=i)
-        if dia.weekday() == 0 and es_lunes_festivo(dia):
-            return dia
-    return None
-
+    return calendario.lunes_festivo_en_semana(fecha_lunes)
 
 
+def _avisar(fecha):
+    for funcion in AL_GUARDAR:
+        funcion(fecha)
 
 
+@medicion.medido()
 def guardar_rotacion(fecha, asignaciones):
-    try:
-        with open("data/rotaciones.json", "r") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        data = {}
-
     fecha_lunes = normalizar_a_lunes(fecha)
     clave = fecha_lunes.strftime("%Y-%m-%d")
-    data[clave] = asignaciones
-
-    with open("data/rotaciones.json", "w") as f:
-        json.dump(data, f, indent=2)
+    obtener_almacen().guardar("tecnicos", clave, asignaciones)
+    _avisar(fecha_lunes)
 
 
+@medicion.medido()
 def cargar_rotacion(fecha):
-    try:
-        with open("data/rotaciones.json") as f:
-            data = json.load(f)
-            return data.get(fecha.strftime("%Y-%m-%d"))
-    except FileNotFoundError:
-        return None
+    # Misma clave que guardar_rotacion: el lunes, aunque la semana empiece en martes
+    return obtener_almacen().cargar("tecnicos", normalizar_a_lunes(fecha).strftime("%Y-%m-%d"))
 
 
-def semanas_desde_inicio(fecha, inicio=date(2025, 10, 14)):
+def semanas_desde_inicio(fecha, inicio=INICIO_ROTACION):
     return ((fecha - inicio).days // 7) + 3  # semana del 20 es la 3
 
 
-def generar_ehs(fecha_base):
+# Horarios SST: los mismos en todas las sedes (solo cambian los supervisores)
+EHS_TURNO_1 = parse_horario("Lun - Sab 06:00 - 14:00")
+EHS_TURNO_2 = parse_horario("Lun - Sab 13:00 - 22:00")
+EHS_TURNO_3 = parse_horario("Dom - Vie 21:00 - 06:00")
+EHS_ADMINISTRATIVO = parse_horario("Administrativo")
+EHS_DOMINGO = parse_horario("Domingo 08:00 - 18:00")
+
+
+@medicion.medido()
+def generar_ehs_modelo(fecha_base):
     fecha_lunes_real = normalizar_a_lunes(fecha_base)
     lunes_festivo = lunes_festivo_en_semana(fecha_lunes_real)
 
     # La rotación se calcula desde el lunes real, no desde martes
-    semanas_transcurridas = semanas_desde_inicio(fecha_lunes_real)
-    asignaciones = []
+    version = datos.version_roster(fecha_lunes_real)
+    semanas_transcurridas = semana_rotacion(fecha_lunes_real, version)
 
-    
-    orden_base = [SUPERVISORES[0], SUPERVISORES[1], SUPERVISORES[2]]  # Nathaly, Andrés, Oscar
+    supervisores = datos.cargar_json(version["supervisores"], grupos_roster)
+    orden_base = [supervisores[0], supervisores[1], supervisores[2]]  # Nathaly, Andrés, Oscar
     offset = semanas_transcurridas % 3
     rotados = orden_base[-offset:] + orden_base[:-offset]  # rotación izquierda
 
     supervisor_1 = rotados[0]  # turno 1
-    supervisor_2 = rotados[1]  # turno 2
-    supervisor_3 = rotados[2]  # turno 3
-
-
-    # Turnos rotativos
-    asignaciones.append({
-        "horario": "Lun - Sab 06:00 - 14:00",
-        "supervisor": supervisor_1
-    })
-    asignaciones.append({
-        "horario": "Lun - Sab 13:00 - 22:00",
-        "supervisor": supervisor_2
-    })
-    asignaciones.append({
-        "horario": "Dom - Vie 21:00 - 06:00",
-        "supervisor": supervisor_3
-    })
-
-    # Fijo
-    asignaciones.append({
-        "horario": "Administrativo",
-        "supervisor": ["Jeimy Pachon"]
-    })
-
-    # Dinámico (domingo) → lo hace el del primer turno
-    asignaciones.append({
-        "horario": "Domingo 08:00 - 18:00",
-        "supervisor": supervisor_1
-    })
+
+    asignaciones = [
+        # Turnos rotativos
+        TurnoEHS(EHS_TURNO_1, supervisor_1),
+        TurnoEHS(EHS_TURNO_2, rotados[1]),
+        TurnoEHS(EHS_TURNO_3, rotados[2]),
+        # Fijo
+        TurnoEHS(EHS_ADMINISTRATIVO, CATALOGO.grupo(version["administrativo"])),
+        # Dinámico (domingo) → lo hace el del primer turno
+        TurnoEHS(EHS_DOMINGO, supervisor_1),
+    ]
 
     # Festivo → también lo hace el del primer turno
     if lunes_festivo and fecha_base == fecha_lunes_real:
-        asignaciones.insert(0, {
-            "horario": "Lunes Festivo 08:00 - 18:00",
-            "supervisor": supervisor_1
-        })
+        asignaciones.insert(0, TurnoEHS(HORARIO_FESTIVO, supervisor_1))
 
     return asignaciones
 
 
+def generar_ehs(fecha_base):
+    return ehs_a_dicts(generar_ehs_modelo(fecha_base))
+
 
 
 
-def guardar_rotacion_ehs(fecha, asignaciones):
-    try:
-        with open("data/rotacion_ehs.json", "r") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        data = {}
 
+@medicion.medido()
+def guardar_rotacion_ehs(fecha, asignaciones):
     fecha_lunes = normalizar_a_lunes(fecha)
     clave = fecha_lunes.strftime("%Y-%m-%d")
-    data[clave] = asignaciones
-
-    with open("data/rotacion_ehs.json", "w") as f:
-        json.dump(data, f, indent=2)
+    obtener_almacen().guardar("ehs", clave, asignaciones)
+    _avisar(fecha_lunes)
 
+@medicion.medido()
 def cargar_rotacion_ehs(fecha):
-    try:
-        with open("data/rotacion_ehs.json") as f:
-            data = json.load(f)
-            return data.get(normalizar_a_lunes(fecha).strftime("%Y-%m-%d"))
-    except FileNotFoundError:
-        return None
+    return obtener_almacen().cargar("ehs", normalizar_a_lunes(fecha).strftime("%Y-%m-%d"))
+
+
+@medicion.medido()
+def resolver_semana(fecha):
+    # 🔁 Normalizar a lunes
+    fecha_lunes = normalizar_a_lunes(fecha)
+    lunes_festivo = lunes_festivo_en_semana(fecha_lunes)
+
+    # Caso 1: el día seleccionado es un lunes festivo → mostrar semana anterior
+    if fecha.weekday() == 0 and es_lunes_festivo(fecha):
+        fecha_lunes = fecha_lunes - timedelta(days=7)
+        lunes_festivo = lunes_festivo_en_semana(fecha_lunes)
+
+    # Caso 2: si el lunes anterior fue festivo y estamos en martes o más → nueva semana desde martes
+    if fecha.weekday() >= 1 and es_lunes_festivo(fecha_lunes):
+        fecha_inicio = fecha_lunes + timedelta(days=1)  # martes
+        fecha_fin = fecha_inicio + timedelta(days=5)    # hasta domingo
+        clave_rotacion = fecha_inicio
+    else:
+        # Semana normal o semana que termina en lunes festivo
+        fecha_inicio = fecha_lunes
+        fecha_fin = lunes_festivo if lunes_festivo else fecha_lunes + timedelta(days=6)
+        clave_rotacion = fecha_lunes
+
+    return {
+        "semana": semanas_desde_inicio(fecha_inicio),
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "clave_rotacion": clave_rotacion,
+        "festivo_texto": ""
+    }
+
+
+def guardar_ajuste(fecha, turnos=None, supervisores=None):
+    # Ajuste manual de la semana de `fecha`, bajo el lunes como las semanas guardadas
+    fecha_lunes = normalizar_a_lunes(fecha)
+    clave = fecha_lunes.strftime("%Y-%m-%d")
+    if turnos is not None:
+        obtener_almacen().guardar("ajustes_tecnicos", clave, turnos)
+    if supervisores is not None:
+        obtener_almacen().guardar("ajustes_ehs", clave, supervisores)
+    _avisar(fecha_lunes)
+
+
+def cargar_ajuste(fecha):
+    clave = normalizar_a_lunes(fecha).strftime("%Y-%m-%d")
+    almacen = obtener_almacen()
+    return almacen.cargar("ajustes_tecnicos", clave), almacen.cargar("ajustes_ehs", clave)
+
+
+def semana_derivada(clave_rotacion):
+    # Sin escrituras: el ajuste manual si existe (aunque sea una lista vacía),
+    # si no la rotación calculada
+    turnos, supervisores = cargar_ajuste(clave_rotacion)
+    return (generar_turnos(clave_rotacion) if turnos is None else turnos,
+            generar_ehs(clave_rotacion) if supervisores is None else supervisores)
+
+
+def clave_de_lunes(fecha_lunes):
+    # Clave de rotación de la semana que se guarda bajo `fecha_lunes`: el martes
+    # si el lunes es festivo (como resolver_semana y semana_exportacion)
+    if es_lunes_festivo(fecha_lunes):
+        return fecha_lunes + timedelta(days=1)
+    return fecha_lunes
+
+
+def migrar_a_ajustes():
+    # Pasa a la capa de ajustes las semanas guardadas que no coinciden con la
+    # rotación calculada, para poder usar MODO = "derivado" sin perder historia
+    almacen = obtener_almacen()
+    migradas = []
+    for tabla, ajustes, generar in (("tecnicos", "ajustes_tecnicos", generar_turnos),
+                                    ("ehs", "ajustes_ehs", generar_ehs)):
+        for clave in almacen.claves(tabla):
+            guardada = almacen.cargar(tabla, clave)
+            if guardada and guardada != generar(clave_de_lunes(date.fromisoformat(clave))):
+                almacen.guardar(ajustes, clave, guardada)
+                migradas.append((tabla, clave))
+    return migradas
+
+
+def recalcular_desde(fecha):
+    # Regenera las semanas guardadas desde `fecha` (p. ej. tras una versión nueva
+    # del roster); las anteriores no se tocan
+    almacen = obtener_almacen()
+    desde = normalizar_a_lunes(fecha).strftime("%Y-%m-%d")
+    recalculadas = 0
+    for tabla, generar in (("tecnicos", generar_turnos), ("ehs", generar_ehs)):
+        for clave in almacen.claves(tabla):
+            if clave < desde:
+                continue
+            # Se guarda bajo el lunes pero se genera desde el martes si es festivo
+            almacen.guardar(tabla, clave, generar(clave_de_lunes(date.fromisoformat(clave))))
+            recalculadas += 1
+    return recalculadas
+
+
+def nueva_version_roster(desde, parejas=None, cuadrillas=None, supervisores=None, semana_inicial=None):
+    # Agrega una versión vigente desde el lunes de `desde`. Lo que no se pasa
+    # se hereda de la versión anterior; lo nuevo se guarda en archivos propios.
+    # Sin semana_inicial la rotación sigue donde iba la versión anterior
+    desde = normalizar_a_lunes(desde)
+    anterior = datos.version_roster(desde)
+    if semana_inicial is None:
+        semana_inicial = semana_rotacion(desde, anterior)
+    version = {"desde": desde.isoformat(), "semana_inicial": semana_inicial,
+               "administrativo": anterior["administrativo"]}
+    for campo, contenido in (("parejas", parejas), ("cuadrillas", cuadrillas), ("supervisores", supervisores)):
+        if contenido is None:
+            version[campo] = anterior[campo]
+        else:
+            version[campo] = f"{campo}_{desde.isoformat()}.json"
+            escribir_atomico(datos.ruta(version[campo]), json.dumps(contenido, indent=2, ensure_ascii=False))
+
+    ruta_versiones = datos.ruta(datos.ARCHIVO_VERSIONES)
+    with bloqueo_archivo(ruta_versiones):
+        with open(ruta_versiones) as f:
+            versiones = [v for v in json.load(f) if v["desde"] != version["desde"]]
+        versiones.append(version)
+        versiones.sort(key=lambda v: v["desde"])
+        escribir_atomico(ruta_versiones, json.dumps(versiones, indent=2, ensure_ascii=False))
+    datos.invalidar()
+
+    if MODO != "derivado":
+        recalcular_desde(desde)
+    return version
+
+
+@medicion.medido()
+def obtener_semana(clave_rotacion):
+    if MODO == "derivado":
+        return semana_derivada(clave_rotacion)
+
+    # Rotación guardada de la semana; si no existe se genera y se guarda
+    turnos = cargar_rotacion(clave_rotacion)
+    if not turnos:
+        turnos = generar_turnos(clave_rotacion)
+        guardar_rotacion(clave_rotacion, turnos)
+
+    supervisores = cargar_rotacion_ehs(clave_rotacion)
+    if not supervisores:
+        supervisores = generar_ehs(clave_rotacion)
+        guardar_rotacion_ehs(clave_rotacion, supervisores)
+
+    return turnos, supervisores
+
+
+@medicion.medido()
+def semana_exportacion(fecha_lunes):
+    # ¿La semana debe comenzar en martes? (lunes festivo)
+    if es_lunes_festivo(fecha_lunes):
+        fecha_inicio = fecha_lunes + timedelta(days=1)  # martes
+        fecha_fin = fecha_inicio + timedelta(days=5)    # domingo
+    else:
+        fecha_inicio = fecha_lunes
+        fecha_fin = fecha_lunes + timedelta(days=7)
+    clave_rotacion = fecha_inicio
+
+    turnos = supervisores = None
+    if MODO == "derivado":
+        turnos, supervisores = cargar_ajuste(clave_rotacion)
+
+    return {
+        "semana": semanas_desde_inicio(fecha_lunes),
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "turnos": generar_turnos_modelo(clave_rotacion) if turnos is None else turnos_desde_dicts(turnos),
+        "supervisores_ehs": generar_ehs_modelo(clave_rotacion) if supervisores is None else ehs_desde_dicts(supervisores),
+        "nota_festivo": "",
+        "normalizado": True
+    }
+
+
+def semanas_exportacion(fecha, n_semanas):
+    # Generador: una semana a la vez, para exportar sin acumular todo el horizonte
+    base = normalizar_a_lunes(fecha)
+    for i in range(n_semanas):
+        yield semana_exportacion(base + timedelta(weeks=i))
 
 
 def normalizar_a_lunes(fecha):
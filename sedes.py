@@ -0,0 +1,108 @@
+"""Varias sedes (centros de operación) con la misma lógica de rotación.
+
+Cada sede es un directorio <DATA_DIR>/sedes/<nombre> con los mismos archivos
+que data/ (roster, versiones y almacén propios) y se activa con datos.sede:
+los datos cargados, el almacén y la caché de PDF quedan separados por sede y
+en memoria solo se guardan los de las datos.MAX_SEDES_EN_MEMORIA más usadas.
+
+generar_semana resuelve (y en modo persistido guarda) la misma semana en todas
+las sedes repartiéndolas en bloques entre procesos: cada proceso recorre sus
+sedes una tras otra, así la memoria no crece con el número de sedes.
+"""
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+
+import datos
+from rotacion import obtener_semana, resolver_semana
+
+# Presupuesto de latencia de generar_semana para todas las sedes (ver horas sedes)
+OBJETIVO_MS = 2000
+# Bloques por proceso: reparte mejor las sedes lentas sin multiplicar los envíos
+BLOQUES_POR_PROCESO = 4
+
+
+@dataclass(slots=True)
+class ResultadoSede:
+    sede: str
+    semana: int = 0
+    turnos: int = 0
+    ms: float = 0.0
+    archivo: str = ""
+    error: str = ""
+
+
+def crear_sede(nombre, origen=None):
+    # Copia el roster de `origen` (por defecto data/) al directorio de una sede nueva
+    with datos.sede(nombre):
+        destino = datos.directorio()
+    origen = origen or datos.DATA_DIR
+    with open(os.path.join(origen, datos.ARCHIVO_VERSIONES)) as f:
+        versiones = json.load(f)
+    archivos = {datos.ARCHIVO_VERSIONES, *datos.ARCHIVOS_ROSTER}
+    archivos.update(v[c] for v in versiones for c in datos.CAMPOS_VERSION if c in v)
+    os.makedirs(destino, exist_ok=True)
+    for archivo in sorted(archivos):
+        ruta = os.path.join(origen, archivo)
+        if os.path.exists(ruta):
+            shutil.copy(ruta, destino)
+    return destino
+
+
+def _generar_sede(fecha, salida):
+    resultado = ResultadoSede(datos.sede_activa())
+    inicio = time.perf_counter()
+    try:
+        info = resolver_semana(fecha)
+        turnos, supervisores = obtener_semana(info["clave_rotacion"])
+        resultado.semana, resultado.turnos = info["semana"], len(turnos)
+        if salida:
+            from pdf_generator import generar_pdf, nombre_pdf_semana
+
+            directorio = os.path.join(salida, resultado.sede)
+            os.makedirs(directorio, exist_ok=True)
+            resultado.archivo = os.path.join(directorio, nombre_pdf_semana(info["semana"], info["fecha_inicio"]))
+            generar_pdf(turnos, info["semana"], info["fecha_inicio"], info["fecha_fin"], supervisores,
+                        ruta=resultado.archivo)
+    except Exception as e:
+        resultado.error = f"{type(e).__name__}: {e}"
+    resultado.ms = (time.perf_counter() - inicio) * 1000
+    return resultado
+
+
+def _generar_bloque(args):
+    # Trabajo de un proceso: varias sedes, una tras otra
+    directorio, nombres, fecha, salida = args
+    if datos.DATA_DIR != directorio:
+        datos.configurar_directorio(directorio)
+    resultados = []
+    for nombre in nombres:
+        with datos.sede(nombre):
+            resultados.append(_generar_sede(fecha, salida))
+    return resultados
+
+
+def generar_semana(fecha, nombres=None, procesos=None, salida=None):
+    """[ResultadoSede] de la semana de `fecha` en cada sede (por defecto todas).
+
+    procesos=None usa todos los núcleos; con salida se escribe además el PDF
+    de cada sede en <salida>/<sede>/.
+    """
+    nombres = datos.sedes() if nombres is None else list(nombres)
+    if not nombres:
+        return []
+    procesos = min(procesos or os.cpu_count() or 1, len(nombres))
+    if procesos == 1:
+        return _generar_bloque((datos.DATA_DIR, nombres, fecha, salida))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    n_bloques = min(len(nombres), procesos * BLOQUES_POR_PROCESO)
+    bloques = [(datos.DATA_DIR, nombres[i::n_bloques], fecha, salida) for i in range(n_bloques)]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        resultados = [r for rs in pool.map(_generar_bloque, bloques) for r in rs]
+    orden = {nombre: i for i, nombre in enumerate(nombres)}
+    resultados.sort(key=lambda r: orden[r.sede])
+    return resultados
@@ -0,0 +1,42 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from entorno import preparar_directorio  # noqa: E402
+
+import almacen  # noqa: E402
+import datos  # noqa: E402
+import rotacion  # noqa: E402
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "historial: el directorio de datos incluye el historial guardado de data/")
+
+
+@pytest.fixture(autouse=True)
+def directorio_datos(request):
+    """Cada prueba corre con una copia del roster de data/ en un directorio temporal."""
+    original = datos.DATA_DIR, almacen.BACKEND, rotacion.MODO
+    directorio = preparar_directorio(historial=request.node.get_closest_marker("historial") is not None,
+                                     prefijo="horas-prueba-")
+    yield directorio
+    datos.configurar_directorio(original[0])
+    almacen.BACKEND, rotacion.MODO = original[1:]
+    shutil.rmtree(directorio, ignore_errors=True)
+
+
+@pytest.fixture
+def correctivos_2_primero():
+    # Cuadrillas con "Correctivos 2" en la primera posición en lugar de la segunda
+    ruta = datos.ruta("cuadrillas.json")
+    with open(ruta) as f:
+        cuadrillas = json.load(f)
+    cuadrillas[0], cuadrillas[1] = cuadrillas[1], cuadrillas[0]
+    with open(ruta, "w") as f:
+        json.dump(cuadrillas, f)
+    assert cuadrillas[0]["nombre"] == "Correctivos 2"
@@ -0,0 +1,22 @@
+from datetime import date, timedelta
+
+import analitica
+import rotacion
+
+MARTES = date(2025, 11, 4)
+
+
+def test_incremental_igual_a_completa():
+    # Editar una semana que empieza en martes: los totales corregidos con el
+    # aviso de rotacion son los mismos que recalculando todo
+    desde, hasta = date(2025, 10, 20), date(2025, 12, 28)
+    analitica.totales(desde, hasta)
+    turnos, _ = rotacion.obtener_semana(MARTES)
+    quitado = turnos[0]["tecnicos"][0]
+    rotacion.guardar_rotacion(MARTES, [dict(t, tecnicos=[n for n in t["tecnicos"] if n != quitado]) for t in turnos])
+    incremental = analitica.obtener().totales(desde, hasta)
+
+    assert incremental == analitica.Acumulados(analitica.obtener().lunes0, None).totales(desde, hasta)
+    lunes = MARTES - timedelta(days=1)
+    assert analitica.carga_semana(analitica.semana_vigente(lunes)) != \
+        analitica.carga_semana(rotacion.semana_exportacion(lunes))
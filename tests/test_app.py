@@ -0,0 +1,50 @@
+import os
+import time
+
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+import datos
+import sedes
+import trabajos
+from entorno import RAIZ
+
+
+def archivos(*partes):
+    ruta = os.path.join(datos.DATA_DIR, *partes)
+    return set(os.listdir(ruta)) if os.path.isdir(ruta) else set()
+
+
+def test_sede_elegida_en_descarga_y_trabajo(monkeypatch):
+    # El PDF diferido del botón y la programación en segundo plano corren fuera
+    # del rerun: deben usar la sede elegida, no la principal
+    sedes.crear_sede("norte")
+    # Sin servidor, AppTest no registra los datos diferidos: se guardan para
+    # llamarlos desde este hilo, como haría el servidor al hacer clic
+    diferidos = []
+    boton = streamlit.download_button
+
+    def download_button(etiqueta, data, *args, **kwargs):
+        if callable(data):
+            diferidos.append(data)
+        return boton(etiqueta, data, *args, **kwargs)
+
+    monkeypatch.setattr(streamlit, "download_button", download_button)
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=30).run()
+    at.sidebar.selectbox[0].select("norte").run()
+    assert not at.exception
+
+    diferidos[-1]()
+    assert archivos("sedes", "norte", "cache_pdf")
+    assert not archivos("cache_pdf")
+
+    at.button[0].click().run()
+    id_trabajo = at.session_state["trabajo_programacion:norte"]
+    with datos.sede("norte"):
+        limite = time.monotonic() + 30
+        while not trabajos.estado(id_trabajo).terminado and time.monotonic() < limite:
+            time.sleep(0.05)
+        assert trabajos.estado(id_trabajo).estado == trabajos.LISTO
+    assert f"{id_trabajo}.json" in archivos("sedes", "norte", "trabajos")
+    assert f"{id_trabajo}.pdf" in archivos("sedes", "norte", "cache_pdf")
+    assert not archivos("trabajos") and not archivos("cache_pdf")
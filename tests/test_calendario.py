@@ -0,0 +1,38 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+import calendario
+
+
+@pytest.fixture
+def calendario_vacio():
+    anterior = calendario._calendario
+    calendario._calendario = calendario._Calendario()
+    yield
+    calendario._calendario = anterior
+
+
+def test_carga_concurrente_ve_indices_completos(calendario_vacio):
+    # Mientras un hilo carga los años, los demás no deben ver el año cargado
+    # con los índices todavía viejos
+    lunes = date(2025, 11, 3)
+    barrera = threading.Barrier(8)
+
+    def consultar(_):
+        barrera.wait()
+        return [calendario.lunes_festivo_en_semana(lunes) for _ in range(200)]
+
+    with ThreadPoolExecutor(8) as pool:
+        resultados = [r for rs in pool.map(consultar, range(8)) for r in rs]
+    assert set(resultados) == {lunes}
+
+
+def test_agregar_no_laborables(calendario_vacio):
+    lunes = date(2026, 6, 1)
+    assert not calendario.es_festivo(lunes)
+    calendario.agregar_no_laborables([lunes])
+    assert calendario.es_festivo(lunes)
+    assert calendario.lunes_festivo_en_semana(date(2026, 5, 25)) == lunes
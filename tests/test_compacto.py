@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+import almacen
+import compacto
+import datos
+
+
+@pytest.fixture
+def archivo():
+    # Abre un ArchivoCompacto con las tablas dadas
+    abiertos = []
+
+    def abrir(tablas):
+        ruta = os.path.join(datos.DATA_DIR, "prueba.bin")
+        with open(ruta, "wb") as f:
+            f.write(compacto.codificar(tablas))
+        abiertos.append(compacto.ArchivoCompacto(ruta))
+        return abiertos[-1]
+
+    yield abrir
+    for a in abiertos:
+        a.cerrar()
+
+
+def test_conserva_campos_none(archivo):
+    # Un campo de personas con valor None no es el hueco de las personas
+    tablas = {"tecnicos": {"2025-10-20": [
+        {"cuadrilla": None, "tecnicos": ["A", "B"], "horario": "07:00"},
+        {"supervisor": None, "tecnicos": ["C"]},
+    ]}}
+    assert archivo(tablas).todo() == tablas
+
+
+def test_devuelve_objetos_nuevos(archivo):
+    tablas = {"tecnicos": {"2025-10-20": [{"cuadrilla": 1, "tecnicos": ["A"], "dias": ["Lunes"]}]}}
+    a = archivo(tablas)
+    fila = a.cargar("tecnicos", "2025-10-20")[0]
+    fila["tecnicos"].append("B")
+    fila["dias"].append("Martes")
+    fila["cuadrilla"] = 2
+    assert a.todo() == tablas
+
+
+def test_almacen_cierra_mmap_anterior():
+    almacen_c = almacen.AlmacenCompacto(os.path.join(datos.DATA_DIR, "rotaciones.bin"), importar={})
+    almacen_c.guardar("tecnicos", "2025-10-20", [{"tecnicos": ["A"]}])
+    anterior = almacen_c._abrir()
+    almacen_c.guardar("tecnicos", "2025-10-27", [{"tecnicos": ["B"]}])
+    assert almacen_c.cargar("tecnicos", "2025-10-20") == [{"tecnicos": ["A"]}]
+    assert anterior.cerrado
+    almacen_c._abrir().cerrar()
@@ -0,0 +1,17 @@
+import pytest
+
+import horas
+
+
+@pytest.mark.parametrize("argv", [
+    ["export", "--desde", "2026-03-01", "--hasta", "2026-02-01"],
+    ["export", "--semanas", "0"],
+    ["validar", "--semanas", "-1"],
+    ["export", "--semanas", "2", "--por-semana", "--procesos", "0"],
+    ["sedes", "--procesos", "-2"],
+])
+def test_rechaza_valores_no_positivos(argv, capsys):
+    # Errores de uso, no un rango vacío ni un pool sin procesos
+    with pytest.raises(SystemExit) as salida:
+        horas.main(argv)
+    assert salida.value.code == 2
@@ -0,0 +1,20 @@
+from datetime import date
+
+import optimizador
+import rotacion
+
+
+def test_busca_correctivos_2_por_nombre(correctivos_2_primero):
+    # Sin optimizar, el plan de la regla es la rotación calculada
+    plan = optimizador.crear_plan(date(2025, 10, 27), 8, ausencias=[], referencia="regla")
+    for i in range(len(plan)):
+        assert plan.turnos(i) == rotacion.generar_turnos(plan.clave(i)), plan.clave(i)
+
+
+def test_guardar_plan_se_lee_en_semana_tras_festivo():
+    # Modo persistido: lo que guarda el plan es lo que lee obtener_semana
+    plan = optimizador.crear_plan(date(2025, 10, 27), 2, ausencias=[], referencia="regla")
+    w = [i for i in range(len(plan)) if plan.rango.martes[i]][0]
+    plan.problema_tecnicos.asignacion[w] = list(reversed(plan.problema_tecnicos.asignacion[w]))
+    optimizador.guardar_plan(plan, [w])
+    assert rotacion.obtener_semana(plan.clave(w))[0] == plan.turnos(w)
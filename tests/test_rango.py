@@ -0,0 +1,43 @@
+import json
+from datetime import date
+
+import datos
+import optimizador
+import rotacion
+from rango import generar_rango
+
+
+def test_igual_a_generar_turnos():
+    r = generar_rango(date(2025, 10, 27), date(2025, 12, 21))
+    assert any(r.festivo) and any(r.martes)
+    for i in range(len(r)):
+        assert r.turnos(i) == rotacion.generar_turnos(r.clave(i)), r.clave(i)
+        assert r.ehs(i) == rotacion.generar_ehs(r.clave(i)), r.clave(i)
+
+
+def test_busca_correctivos_2_por_nombre(correctivos_2_primero):
+    r = generar_rango(date(2025, 10, 27), date(2025, 12, 21))
+    for i in range(len(r)):
+        assert r.turnos(i) == rotacion.generar_turnos(r.clave(i)), r.clave(i)
+
+
+def test_domingo_de_cuadrillas_json():
+    # El turno de domingo sale de la entrada "Domingo" del roster vigente
+    ruta = datos.ruta("cuadrillas.json")
+    with open(ruta) as f:
+        cuadrillas = json.load(f)
+    for c in cuadrillas:
+        if c["nombre"] == "Domingo":
+            c.update(vehiculo="ABC 123", horario="07:00 - 15:00 Domingo")
+    with open(ruta, "w") as f:
+        json.dump(cuadrillas, f)
+
+    r = generar_rango(date(2025, 10, 27), date(2025, 12, 21))
+    for i in range(len(r)):
+        turnos = rotacion.generar_turnos(r.clave(i))
+        assert r.turnos(i) == turnos, r.clave(i)
+        domingo = [t for t in turnos if t["cuadrilla"] == "Domingo"]
+        assert [(t["vehiculo"], t["horario"]) for t in domingo] == [("ABC 123", "07:00 - 15:00 Domingo")]
+
+    plan = optimizador.crear_plan(date(2025, 10, 27), 8, ausencias=[], referencia="regla")
+    assert all(plan.turnos(i) == r.turnos(i) for i in range(len(plan)))
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+import pytest
+
+import almacen
+import datos
+import rotacion
+
+# Semana que empieza en martes: el lunes 2025-11-03 es festivo
+MARTES = date(2025, 11, 4)
+LUNES = [date(2025, 10, 27) + timedelta(weeks=i) for i in range(8)]  # tres lunes festivos
+
+
+def guardadas():
+    actual = almacen.obtener_almacen()
+    return {t: {c: actual.cargar(t, c) for c in actual.claves(t)} for t in ("tecnicos", "ehs")}
+
+
+def test_obtener_semana_martes_no_reescribe():
+    # Una semana tras lunes festivo se guarda bajo el lunes; leerla de nuevo no
+    # debe regenerarla ni cambiar la versión del almacén
+    assert rotacion.es_lunes_festivo(MARTES - timedelta(days=1))
+    primera = rotacion.obtener_semana(MARTES)
+    version = almacen.obtener_almacen().version()
+    assert rotacion.obtener_semana(MARTES) == primera
+    assert almacen.obtener_almacen().version() == version
+
+
+def test_migrar_semanas_sin_editar_no_crea_ajustes():
+    assert sum(rotacion.es_lunes_festivo(f) for f in LUNES) >= 3
+    for fecha in LUNES:
+        rotacion.obtener_semana(rotacion.clave_de_lunes(fecha))
+    assert rotacion.migrar_a_ajustes() == []
+
+    # Una edición sí se migra y es lo que lee el modo derivado
+    turnos, supervisores = rotacion.obtener_semana(MARTES)
+    editados = [dict(t, tecnicos=list(reversed(t["tecnicos"]))) for t in turnos]
+    rotacion.guardar_rotacion(MARTES, editados)
+    assert rotacion.migrar_a_ajustes() == [("tecnicos", (MARTES - timedelta(days=1)).isoformat())]
+    rotacion.MODO = "derivado"
+    assert rotacion.obtener_semana(MARTES) == (editados, supervisores)
+
+
+@pytest.mark.historial
+def test_migrar_historial_guardado_no_crea_ajustes():
+    # El historial de data/ no tiene ediciones manuales
+    assert rotacion.migrar_a_ajustes() == []
+
+
+def test_recalcular_conserva_semanas_tras_festivo():
+    # Sin cambios de roster, recalcular deja las semanas como las guardó obtener_semana
+    for fecha in LUNES:
+        rotacion.obtener_semana(rotacion.clave_de_lunes(fecha))
+    antes = guardadas()
+    assert rotacion.recalcular_desde(LUNES[0]) == 2 * len(LUNES)
+    assert guardadas() == antes
+
+
+def test_nueva_version_sigue_la_fase_anterior():
+    # Sin semana_inicial la semana N+1 con la versión nueva sigue a la semana N
+    # con la anterior: mismas parejas → mismas semanas que sin la versión nueva
+    desde = date(2026, 3, 2)
+    semanas = [desde + timedelta(weeks=i) for i in range(-2, 4)]
+    antes = [rotacion.generar_turnos(f) for f in semanas]
+    anterior = datos.version_roster(desde)
+
+    version = rotacion.nueva_version_roster(desde, parejas=rotacion.cargar_parejas(desde))
+    nueva = datos.version_roster(desde)
+    assert nueva["desde"] == desde and nueva["parejas"] != anterior["parejas"]
+    assert version["semana_inicial"] == rotacion.semana_rotacion(desde - timedelta(weeks=1), anterior) + 1
+    assert rotacion.semana_rotacion(desde, nueva) == rotacion.semana_rotacion(desde - timedelta(weeks=1), anterior) + 1
+    assert [rotacion.generar_turnos(f) for f in semanas] == antes
+
+
+def test_ajuste_vacio_y_clave_del_lunes():
+    # El ajuste se guarda bajo el lunes aunque se pida con el martes, y una
+    # lista vacía es un ajuste, no la falta de uno
+    rotacion.MODO = "derivado"
+    rotacion.guardar_ajuste(MARTES, turnos=[])
+    assert almacen.obtener_almacen().claves("ajustes_tecnicos") == [(MARTES - timedelta(days=1)).isoformat()]
+    assert rotacion.cargar_ajuste(MARTES) == rotacion.cargar_ajuste(MARTES - timedelta(days=1)) == ([], None)
+    assert rotacion.obtener_semana(MARTES) == ([], rotacion.generar_ehs(MARTES))
+    assert rotacion.semana_exportacion(MARTES - timedelta(days=1))["turnos"] == []
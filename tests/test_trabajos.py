@@ -0,0 +1,44 @@
+import time
+from datetime import date, timedelta
+
+import cache_pdf
+import rotacion
+import trabajos
+
+MARTES = date(2025, 11, 4)
+
+
+def clave_programacion(desde, n_semanas):
+    return cache_pdf.clave_cache(cache_pdf.entradas_programacion(desde, n_semanas))
+
+
+def test_clave_programacion_ignora_otras_escrituras():
+    # La programación no lee las semanas guardadas: escribir una no cambia el id
+    desde = date(2025, 10, 27)
+    clave = clave_programacion(desde, 4)
+    rotacion.obtener_semana(MARTES)
+    rotacion.guardar_ajuste(desde + timedelta(weeks=8), turnos=[])
+    assert clave_programacion(desde, 4) == clave
+
+    # En modo derivado un ajuste dentro del horizonte sí
+    rotacion.MODO = "derivado"
+    derivado = clave_programacion(desde, 4)
+    turnos, _ = rotacion.obtener_semana(MARTES)
+    rotacion.guardar_ajuste(MARTES, turnos=turnos[::-1])
+    assert clave_programacion(desde, 4) != derivado
+
+
+def test_podar_con_pocos_guardados():
+    # Con menos de MAX_GUARDADOS trabajos no se descarta ninguno
+    ahora = time.time()
+    ids = [f"prueba{n}" for n in range(trabajos.MAX_GUARDADOS * 3 // 4)]
+    for id_trabajo in ids:
+        trabajo = trabajos.Trabajo(id_trabajo, "prueba", trabajos.LISTO, creado=ahora, actualizado=ahora)
+        trabajos._trabajos[id_trabajo] = trabajo
+        trabajos._guardar(trabajo)
+    try:
+        trabajos._podar()
+        assert all(i in trabajos._trabajos for i in ids)
+    finally:
+        for id_trabajo in ids:
+            trabajos._trabajos.pop(id_trabajo, None)
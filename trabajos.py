@@ -0,0 +1,188 @@
+"""Trabajos de exportación en segundo plano para la app.
+
+Un pool de hilos compartido por todas las sesiones genera los PDF largos sin
+bloquear el rerun de Streamlit. El id de un trabajo es la clave de cache_pdf
+de sus entradas, así:
+    - dos pedidos iguales mientras el primero corre comparten el trabajo
+    - si el PDF ya está en caché el trabajo queda listo sin generar nada
+    - el resultado se lee de cache_pdf (memoria o disco)
+
+El estado se guarda en data/trabajos/<id>.json, lo que permite seguir un
+trabajo desde otro proceso. Un trabajo sin avances durante VENCIMIENTO
+segundos en otro proceso se da por interrumpido y se puede volver a pedir.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+import cache_pdf
+import datos
+from almacen import escribir_atomico
+from pdf_generator import generar_pdf_multiple
+from rotacion import semanas_exportacion
+
+TRABAJADORES = int(os.environ.get("HORAS_TRABAJADORES", 2))
+DIRECTORIO = "trabajos"
+MAX_GUARDADOS = 200
+INTERVALO_GUARDADO = 0.5  # segundos entre escrituras del avance
+VENCIMIENTO = 60
+
+EN_COLA = "en_cola"
+EN_CURSO = "en_curso"
+LISTO = "listo"
+ERROR = "error"
+INTERRUMPIDO = "interrumpido"
+TERMINADOS = (LISTO, ERROR, INTERRUMPIDO)
+
+_lock = threading.Lock()
+_pool = None
+_trabajos = {}  # id → Trabajo de este proceso
+
+
+@dataclass(slots=True)
+class Trabajo:
+    id: str
+    tipo: str
+    estado: str = EN_COLA
+    hechas: int = 0
+    total: int = 0
+    error: str = ""
+    creado: float = 0.0
+    actualizado: float = 0.0
+
+    @property
+    def terminado(self):
+        return self.estado in TERMINADOS
+
+    @property
+    def avance(self):
+        return self.hechas / self.total if self.total else 0.0
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        _pool = ThreadPoolExecutor(max_workers=TRABAJADORES, thread_name_prefix="trabajo")
+    return _pool
+
+
+def _ruta(id_trabajo):
+    return os.path.join(datos.ruta(DIRECTORIO), f"{id_trabajo}.json")
+
+
+def _guardar(trabajo):
+    os.makedirs(datos.ruta(DIRECTORIO), exist_ok=True)
+    escribir_atomico(_ruta(trabajo.id), json.dumps(asdict(trabajo)))
+
+
+def _leer(id_trabajo):
+    try:
+        with open(_ruta(id_trabajo), encoding="utf-8") as f:
+            return Trabajo(**json.load(f))
+    except (FileNotFoundError, ValueError, TypeError):
+        return None
+
+
+def _podar():
+    # Deja solo los MAX_GUARDADOS trabajos más recientes (en memoria y en disco)
+    sobrantes = max(0, len(_trabajos) - MAX_GUARDADOS)
+    for id_trabajo in [i for i, t in _trabajos.items() if t.terminado][:sobrantes]:
+        del _trabajos[id_trabajo]
+    directorio = datos.ruta(DIRECTORIO)
+    archivos = sorted((e.stat().st_mtime_ns, e.path) for e in os.scandir(directorio) if e.name.endswith(".json"))
+    for _, ruta in archivos[:-MAX_GUARDADOS]:
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def estado(id_trabajo):
+    """Copia del Trabajo (de este proceso o del archivo de estado), o None."""
+    with _lock:
+        trabajo = _trabajos.get(id_trabajo)
+        if trabajo is not None:
+            return Trabajo(**asdict(trabajo))
+    trabajo = _leer(id_trabajo)
+    if trabajo is not None and not trabajo.terminado and time.time() - trabajo.actualizado > VENCIMIENTO:
+        # Lo empezó otro proceso que ya no avanza (p. ej. se reinició el servidor)
+        trabajo.estado = INTERRUMPIDO
+    return trabajo
+
+
+def resultado(id_trabajo):
+    # Bytes del PDF de un trabajo listo (None si se desalojó de la caché)
+    return cache_pdf.buscar(id_trabajo)
+
+
+def _ejecutar(trabajo, generar):
+    ultimo = 0.0
+
+    def progreso(hechas, total):
+        nonlocal ultimo
+        with _lock:
+            trabajo.hechas, trabajo.total = hechas, total
+            trabajo.actualizado = ahora = time.time()
+        if ahora - ultimo >= INTERVALO_GUARDADO:
+            ultimo = ahora
+            _guardar(trabajo)
+
+    with _lock:
+        trabajo.estado = EN_CURSO
+        trabajo.actualizado = time.time()
+    _guardar(trabajo)
+    try:
+        cache_pdf.guardar(trabajo.id, generar(progreso))
+        estado_final, error = LISTO, ""
+    except Exception as e:
+        estado_final, error = ERROR, f"{type(e).__name__}: {e}"
+    with _lock:
+        trabajo.estado, trabajo.error = estado_final, error
+        trabajo.actualizado = time.time()
+    _guardar(trabajo)
+
+
+def enviar(tipo, entradas, generar, total=0):
+    """Encola generar(progreso) → bytes y devuelve el id del trabajo.
+
+    progreso(hechas, total) actualiza el avance. Si ya hay un trabajo con las
+    mismas entradas en curso (aquí o en otro proceso) o el PDF está en caché,
+    no se genera de nuevo.
+    """
+    id_trabajo = cache_pdf.clave_cache(entradas)
+    with _lock:
+        trabajo = _trabajos.get(id_trabajo)
+        if trabajo is not None and trabajo.estado in (EN_COLA, EN_CURSO):
+            return id_trabajo
+    previo = estado(id_trabajo)
+    if previo is not None and previo.estado in (EN_COLA, EN_CURSO):
+        return id_trabajo
+
+    ahora = time.time()
+    trabajo = Trabajo(id_trabajo, tipo, total=total, creado=ahora, actualizado=ahora)
+    if cache_pdf.buscar(id_trabajo) is not None:
+        trabajo.estado, trabajo.hechas = LISTO, total
+    with _lock:
+        actual = _trabajos.get(id_trabajo)
+        if actual is not None and actual.estado in (EN_COLA, EN_CURSO):
+            return id_trabajo  # otro hilo lo encoló mientras tanto
+        _trabajos[id_trabajo] = trabajo
+        _guardar(trabajo)
+        if trabajo.estado == EN_COLA:
+            # Con el contexto de quien lo pide: la sede activa (ver datos.sede)
+            _obtener_pool().submit(contextvars.copy_context().run, _ejecutar, trabajo, generar)
+        _podar()
+    return id_trabajo
+
+
+def enviar_programacion(fecha, n_semanas, procesos=1):
+    # La programación completa de n_semanas desde la semana de `fecha`
+    entradas = cache_pdf.entradas_programacion(fecha, n_semanas)
+    return enviar("programacion", entradas, lambda progreso: generar_pdf_multiple(
+        semanas_exportacion(entradas["desde"], n_semanas), total=n_semanas, progreso=progreso, procesos=procesos
+    ), total=n_semanas)